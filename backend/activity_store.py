@@ -0,0 +1,545 @@
+"""
+Activity log storage for LinguaQuest.
+
+User activities (logins, profile updates, XP grants, ...) are written far more
+often than they are read. ActivityStore hides where they live:
+
+- DatabaseActivityStore keeps them in the user_activities table (default).
+- LogActivityStore keeps them out of the transactional database in an
+  append-only NDJSON log. The active segment is plain NDJSON; once it grows
+  past ACTIVITY_LOG_SEGMENT_BYTES it is sealed into a gzip file made of
+  independently decompressible blocks. A small SQLite index on
+  (user_id, timestamp) points at each record so the latest N activities of a
+  user are served without scanning the log. Sealed segments can be compacted
+  into larger ones and archived once they pass the retention window.
+
+Log records are staged on the session and only written once it commits, so
+a rolled-back (or retried) transaction never leaves activities behind.
+
+Select the backend with ACTIVITY_STORE=database|log.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, tuple_
+from sqlalchemy.orm import Session
+
+from database import UserActivity, insert_rows
+from models import ActivityResponse
+
+ACTIVITY_STORE = os.getenv("ACTIVITY_STORE", "database")
+ACTIVITY_LOG_DIR = os.getenv("ACTIVITY_LOG_DIR", "./activity_log")
+ACTIVITY_LOG_SEGMENT_BYTES = int(os.getenv("ACTIVITY_LOG_SEGMENT_BYTES", 4 * 1024 * 1024))
+ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv("ACTIVITY_LOG_RETENTION_DAYS", 90))
+ACTIVITY_LOG_FSYNC = os.getenv("ACTIVITY_LOG_FSYNC", "").lower() in ("1", "true", "yes")
+
+BLOCK_RECORDS = 64  # Records per gzip member in sealed segments
+BLOCK_CACHE_SIZE = 256
+ACTIVE_SUFFIX = ".ndjson"
+SEALED_SUFFIX = ".ndjson.gz"
+SEGMENT_NAME = re.compile(r"^(\d{8})(?:-(\d{8}))?$")
+
+
+class ActivityStore(ABC):
+    """Interface for activity log backends"""
+
+    @abstractmethod
+    def append(self, db, user_id: int, activity_type: str, details: Optional[Dict[str, Any]] = None,
+               timestamp: Optional[datetime] = None):
+        """Record an activity as part of db's transaction; the caller commits."""
+
+    def append_many(self, db, activities: List[Tuple[int, str, Optional[Dict[str, Any]]]],
+                    timestamp: Optional[datetime] = None) -> List[int]:
+        """Record (user_id, activity_type, details) activities; returns their ids in order. The caller commits."""
+        return [self.append(db, user_id, activity_type, details, timestamp).id
+                for user_id, activity_type, details in activities]
+
+    @abstractmethod
+    def get_user_activities(self, db, user_id: int, limit: int = 50, before: Optional[Tuple[datetime, int]] = None) -> List[Any]:
+        """Latest activities of a user, newest first; before is the (timestamp, id) of the last one already seen"""
+
+
+class DatabaseActivityStore(ActivityStore):
+    """Activities in the user_activities table of the main database"""
+
+    def append(self, db, user_id, activity_type, details=None, timestamp=None):
+        db_activity = UserActivity(
+            user_id=user_id,
+            activity_type=activity_type,
+            details=details or {}
+        )
+        if timestamp is not None:
+            db_activity.timestamp = timestamp
+        db.add(db_activity)
+        return db_activity
+
+    def append_many(self, db, activities, timestamp=None):
+        timestamp = timestamp or datetime.utcnow()
+        return insert_rows(db, UserActivity, [
+            {"user_id": user_id, "activity_type": activity_type, "details": details or {}, "timestamp": timestamp}
+            for user_id, activity_type, details in activities
+        ])
+
+    def get_user_activities(self, db, user_id, limit=50, before=None):
+        query = db.query(UserActivity).filter(UserActivity.user_id == user_id)
+        if before is not None:
+            query = query.filter(tuple_(UserActivity.timestamp, UserActivity.id) < tuple(before))
+        return query.order_by(UserActivity.timestamp.desc(), UserActivity.id.desc()).limit(limit).all()
+
+
+class LogActivityStore(ActivityStore):
+    """Append-only, segment-rotated, compressed NDJSON activity log with a (user_id, timestamp) index"""
+
+    def __init__(self, directory: str = ACTIVITY_LOG_DIR, segment_bytes: int = ACTIVITY_LOG_SEGMENT_BYTES,
+                 fsync: bool = ACTIVITY_LOG_FSYNC):
+        self.directory = directory
+        self.segments_dir = os.path.join(directory, "segments")
+        self.archive_dir = os.path.join(directory, "archive")
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._block_cache: "OrderedDict[Tuple[str, int], List[bytes]]" = OrderedDict()
+        os.makedirs(self.segments_dir, exist_ok=True)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        self._index = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        # The index can always be rebuilt from the segments, so it does not need to be durable
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=OFF")
+        self._index.executescript("""
+            CREATE TABLE IF NOT EXISTS activities (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                line INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_activities_user_id_timestamp ON activities (user_id, timestamp, id);
+            CREATE INDEX IF NOT EXISTS ix_activities_segment ON activities (segment);
+            CREATE TABLE IF NOT EXISTS segments (
+                name TEXT PRIMARY KEY,
+                sealed INTEGER NOT NULL,
+                records INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                max_timestamp TEXT
+            );
+        """)
+        self._recover()
+
+    # Paths and names
+    def _path(self, name: str, sealed: bool, archived: bool = False) -> str:
+        return os.path.join(self.archive_dir if archived else self.segments_dir,
+                            name + (SEALED_SUFFIX if sealed else ACTIVE_SUFFIX))
+
+    @staticmethod
+    def _segment_range(name: str) -> Tuple[int, int]:
+        match = SEGMENT_NAME.match(name)
+        first = int(match.group(1))
+        return first, int(match.group(2) or first)
+
+    def _segment_files(self) -> Dict[str, bool]:
+        """Segment name -> sealed, for every segment file on disk"""
+        files = {}
+        for filename in os.listdir(self.segments_dir):
+            for suffix, sealed in ((SEALED_SUFFIX, True), (ACTIVE_SUFFIX, False)):
+                name = filename[:-len(suffix)]
+                if filename.endswith(suffix) and SEGMENT_NAME.match(name):
+                    files[name] = files.get(name, False) or sealed
+                    break
+        return files
+
+    # Startup recovery
+    def _recover(self):
+        """Reconcile the index with the segment files after a restart or crash"""
+        with self._lock:
+            # Half-written sealed segments never replaced anything; the originals are still in place
+            for filename in os.listdir(self.segments_dir):
+                if filename.endswith(".tmp"):
+                    os.remove(os.path.join(self.segments_dir, filename))
+            files = self._segment_files()
+            registered = {name for (name,) in self._index.execute("SELECT name FROM segments")}
+
+            # A sealed file next to its plain twin means the crash happened after sealing: keep the sealed one
+            for name, sealed in files.items():
+                if sealed and os.path.exists(self._path(name, sealed=False)):
+                    os.remove(self._path(name, sealed=False))
+                    registered.discard(name)
+
+            # Overlapping ranges are leftovers of an interrupted compaction. Until the index
+            # switches to the merged segment the originals win; afterwards the merged one does.
+            ranges = {name: self._segment_range(name) for name in files}
+            for merged, (first, last) in ranges.items():
+                covered = [name for name, (name_first, name_last) in ranges.items()
+                           if name != merged and first <= name_first and name_last <= last]
+                if not covered or merged not in files:
+                    continue
+                if merged not in registered and any(name in registered for name in covered):
+                    stale = [merged]
+                else:
+                    stale = covered
+                for name in stale:
+                    if name in files:
+                        os.remove(self._path(name, files.pop(name)))
+                        registered.discard(name)
+
+            # Segments registered in the index but gone from disk were archived or lost
+            for name in registered - set(files):
+                self._drop_segment(name)
+
+            for name, sealed in sorted(files.items()):
+                if name not in registered or not sealed:
+                    self._reindex_segment(name, sealed)
+            self._index.commit()
+
+            active = [name for name, sealed in files.items() if not sealed]
+            if active:
+                self._active_name = max(active)
+            else:
+                last = max((self._segment_range(name)[1] for name in files), default=0)
+                self._active_name = f"{last + 1:08d}"
+                self._register_segment(self._active_name, sealed=False)
+                self._index.commit()
+            self._active = open(self._path(self._active_name, sealed=False), "ab")
+            self._active_size = self._active.tell()
+            max_id = self._index.execute("SELECT MAX(id) FROM activities").fetchone()[0]
+            self._next_id = (max_id or 0) + 1
+
+    def _register_segment(self, name: str, sealed: bool):
+        self._index.execute(
+            "INSERT OR REPLACE INTO segments (name, sealed, records, bytes, max_timestamp) "
+            "SELECT ?, ?, COUNT(*), 0, MAX(timestamp) FROM activities WHERE segment = ?",
+            (name, int(sealed), name)
+        )
+        path = self._path(name, sealed)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._index.execute("UPDATE segments SET bytes = ? WHERE name = ?", (size, name))
+
+    def _drop_segment(self, name: str):
+        self._index.execute("DELETE FROM activities WHERE segment = ?", (name,))
+        self._index.execute("DELETE FROM segments WHERE name = ?", (name,))
+
+    def _reindex_segment(self, name: str, sealed: bool):
+        """Rebuild the index entries of one segment from its file"""
+        self._index.execute("DELETE FROM activities WHERE segment = ?", (name,))
+        if sealed:
+            entries = self._sealed_entries(name)
+        else:
+            entries = self._active_entries(name)
+        self._index.executemany(
+            "INSERT OR REPLACE INTO activities (id, user_id, timestamp, segment, offset, length, line) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(record["id"], record["user_id"], record["timestamp"], name, offset, length, line)
+             for record, offset, length, line in entries]
+        )
+        self._register_segment(name, sealed)
+
+    def _active_entries(self, name: str):
+        """Index entries of a plain segment, truncating a torn final line"""
+        path = self._path(name, sealed=False)
+        entries = []
+        offset = 0
+        with open(path, "rb") as f:
+            data = f.read()
+        for raw in data.splitlines(keepends=True):
+            if not raw.endswith(b"\n"):
+                break
+            entries.append((json.loads(raw), offset, len(raw), 0))
+            offset += len(raw)
+        if offset < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return entries
+
+    def _sealed_entries(self, name: str):
+        """Index entries of a sealed segment, one gzip member per block"""
+        with open(self._path(name, sealed=True), "rb") as f:
+            data = f.read()
+        entries = []
+        offset = 0
+        while offset < len(data):
+            decompressor = zlib.decompressobj(wbits=31)
+            block = decompressor.decompress(data[offset:])
+            length = len(data) - offset - len(decompressor.unused_data)
+            for line, raw in enumerate(block.splitlines()):
+                entries.append((json.loads(raw), offset, length, line))
+            offset += length
+        return entries
+
+    # Writes
+    def append(self, db, user_id, activity_type, details=None, timestamp=None):
+        """Stage the record on db until it commits; with db=None it is written right away"""
+        record = self._new_records([(user_id, activity_type, details)], timestamp)[0]
+        self._stage(db, [record])
+        return self._to_response(record)
+
+    def append_many(self, db, activities, timestamp=None):
+        records = self._new_records(activities, timestamp)
+        self._stage(db, records)
+        return [record["id"] for record in records]
+
+    def _new_records(self, activities, timestamp=None) -> List[Dict[str, Any]]:
+        """Records for (user_id, activity_type, details) activities, with ids reserved now.
+
+        Ids of records whose transaction rolls back are never written, which
+        only leaves a gap.
+        """
+        timestamp = (timestamp or datetime.utcnow()).isoformat()
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += len(activities)
+        return [
+            {"id": first_id + i, "user_id": user_id, "activity_type": activity_type,
+             "details": details or {}, "timestamp": timestamp}
+            for i, (user_id, activity_type, details) in enumerate(activities)
+        ]
+
+    def _stage(self, db, records: List[Dict[str, Any]]):
+        if db is None:
+            self._write(records)
+        else:
+            db.info.setdefault(PENDING_ACTIVITIES, []).append((self, records))
+
+    def _write(self, records: List[Dict[str, Any]]):
+        """Append records with one write, fsync and index commit for the whole batch"""
+        with self._lock:
+            entries, chunks = [], []
+            offset = self._active_size
+            for record in records:
+                data = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+                entries.append((record["id"], record["user_id"], record["timestamp"], self._active_name, offset, len(data)))
+                chunks.append(data)
+                offset += len(data)
+            self._active.write(b"".join(chunks))
+            self._active.flush()
+            if self.fsync:
+                os.fsync(self._active.fileno())
+            self._active_size = offset
+
+            self._index.executemany(
+                "INSERT INTO activities (id, user_id, timestamp, segment, offset, length, line) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                entries
+            )
+            # Transactions commit out of order, so a later write can carry older timestamps
+            self._index.execute(
+                "UPDATE segments SET records = records + ?, bytes = ?, "
+                "max_timestamp = MAX(COALESCE(max_timestamp, ''), ?) WHERE name = ?",
+                (len(records), self._active_size, max(record["timestamp"] for record in records), self._active_name)
+            )
+            self._index.commit()
+
+            if self._active_size >= self.segment_bytes:
+                self.rotate()
+
+    def rotate(self):
+        """Seal the active segment into a compressed one and start a new active segment"""
+        with self._lock:
+            if self._active_size == 0:
+                return
+            name = self._active_name
+            self._active.close()
+            with open(self._path(name, sealed=False), "rb") as f:
+                lines = f.read().splitlines(keepends=True)
+            self._write_sealed(name, [json.loads(raw) for raw in lines])
+            os.remove(self._path(name, sealed=False))
+
+            self._active_name = f"{self._segment_range(name)[1] + 1:08d}"
+            self._active = open(self._path(self._active_name, sealed=False), "ab")
+            self._active_size = 0
+            self._register_segment(self._active_name, sealed=False)
+            self._index.commit()
+
+    def _write_sealed(self, name: str, records: List[Dict[str, Any]]):
+        """Write records as a sealed segment (atomically) and point the index at it"""
+        path = self._path(name, sealed=True)
+        entries = []
+        with open(path + ".tmp", "wb") as f:
+            for start in range(0, len(records), BLOCK_RECORDS):
+                block = records[start:start + BLOCK_RECORDS]
+                member = gzip.compress(b"".join(
+                    json.dumps(record, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+                    for record in block
+                ))
+                offset = f.tell()
+                f.write(member)
+                entries.extend((record["id"], offset, len(member), line) for line, record in enumerate(block))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        self._index.executemany(
+            "UPDATE activities SET segment = ?, offset = ?, length = ?, line = ? WHERE id = ?",
+            [(name, offset, length, line, record_id) for record_id, offset, length, line in entries]
+        )
+        self._register_segment(name, sealed=True)
+        self._index.commit()
+
+    # Reads
+    def get_user_activities(self, db, user_id, limit=50, before=None):
+        condition, parameters = "user_id = ?", [user_id]
+        if before is not None:
+            condition += " AND (timestamp, id) < (?, ?)"
+            parameters += [before[0].isoformat(), before[1]]
+        with self._lock:
+            rows = self._index.execute(
+                f"SELECT segment, offset, length, line FROM activities WHERE {condition} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (*parameters, limit)
+            ).fetchall()
+            sealed = {name: bool(flag) for name, flag in self._index.execute("SELECT name, sealed FROM segments")}
+            return [self._to_response(json.loads(self._read(segment, offset, length, line, sealed.get(segment, False))))
+                    for segment, offset, length, line in rows]
+
+    def _read(self, segment: str, offset: int, length: int, line: int, sealed: bool) -> bytes:
+        if not sealed:
+            if segment == self._active_name:
+                self._active.flush()
+            with open(self._path(segment, sealed=False), "rb") as f:
+                f.seek(offset)
+                return f.read(length)
+        key = (segment, offset)
+        block = self._block_cache.get(key)
+        if block is None:
+            with open(self._path(segment, sealed=True), "rb") as f:
+                f.seek(offset)
+                block = gzip.decompress(f.read(length)).splitlines()
+            self._block_cache[key] = block
+            if len(self._block_cache) > BLOCK_CACHE_SIZE:
+                self._block_cache.popitem(last=False)
+        else:
+            self._block_cache.move_to_end(key)
+        return block[line]
+
+    @staticmethod
+    def _to_response(record: Dict[str, Any]) -> ActivityResponse:
+        return ActivityResponse(
+            id=record["id"],
+            user_id=record["user_id"],
+            activity_type=record["activity_type"],
+            details=record["details"],
+            timestamp=datetime.fromisoformat(record["timestamp"])
+        )
+
+    # Maintenance
+    def sealed_segments(self) -> List[Tuple[str, int, Optional[str]]]:
+        """(name, bytes, max_timestamp) of every sealed segment, oldest first"""
+        with self._lock:
+            return self._index.execute(
+                "SELECT name, bytes, max_timestamp FROM segments WHERE sealed = 1 ORDER BY name"
+            ).fetchall()
+
+    def compact(self, target_bytes: Optional[int] = None) -> int:
+        """Merge runs of small adjacent sealed segments into segments of about target_bytes.
+
+        Returns the number of segments removed by merging.
+        """
+        target_bytes = target_bytes or self.segment_bytes
+        with self._lock:
+            runs, run, run_bytes = [], [], 0
+            for name, size, _ in self.sealed_segments():
+                if run and run_bytes + size > target_bytes:
+                    runs.append(run)
+                    run, run_bytes = [], 0
+                run.append(name)
+                run_bytes += size
+            runs.append(run)
+
+            removed = 0
+            for run in runs:
+                if len(run) < 2:
+                    continue
+                merged = f"{self._segment_range(run[0])[0]:08d}-{self._segment_range(run[-1])[1]:08d}"
+                records = []
+                for name in run:
+                    records.extend(record for record, _, _, _ in self._sealed_entries(name))
+                self._write_sealed(merged, records)
+                for name in run:
+                    self._index.execute("DELETE FROM segments WHERE name = ?", (name,))
+                self._index.commit()
+                for name in run:
+                    os.remove(self._path(name, sealed=True))
+                removed += len(run) - 1
+            self._block_cache.clear()
+            return removed
+
+    def archive(self, older_than: Optional[datetime] = None) -> List[str]:
+        """Move sealed segments whose newest record is older than the cutoff into the archive directory.
+
+        Defaults to the ACTIVITY_LOG_RETENTION_DAYS window. Archived activities
+        are no longer served by get_user_activities.
+        """
+        cutoff = older_than or datetime.utcnow() - timedelta(days=ACTIVITY_LOG_RETENTION_DAYS)
+        archived = []
+        with self._lock:
+            for name, _, max_timestamp in self.sealed_segments():
+                if max_timestamp is None or max_timestamp >= cutoff.isoformat():
+                    continue
+                os.replace(self._path(name, sealed=True), self._path(name, sealed=True, archived=True))
+                self._drop_segment(name)
+                self._index.commit()
+                archived.append(name)
+            self._block_cache.clear()
+        return archived
+
+    def close(self):
+        with self._lock:
+            self._active.close()
+            self._index.close()
+
+
+# Log records ride on the session and are written after it commits, like the leaderboard index updates
+PENDING_ACTIVITIES = "pending_activities"
+
+
+def write_pending_activities(pending: List[Tuple[LogActivityStore, List[Dict[str, Any]]]]):
+    for store, records in pending:
+        store._write(records)
+
+
+@event.listens_for(Session, "after_commit")
+def write_committed_activities(session):
+    pending = session.info.pop(PENDING_ACTIVITIES, None)
+    if pending:
+        write_pending_activities(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_pending_activities(session):
+    session.info.pop(PENDING_ACTIVITIES, None)
+
+
+async def commit_with_activities(db):
+    """Commit an AsyncSession, then write its staged log records on a worker thread instead of the event loop"""
+    pending = db.info.pop(PENDING_ACTIVITIES, None)
+    await db.commit()
+    if pending:
+        await asyncio.to_thread(write_pending_activities, pending)
+
+
+_activity_store: Optional[ActivityStore] = None
+_activity_store_lock = threading.Lock()
+
+
+def get_activity_store() -> ActivityStore:
+    """Process-wide activity store selected by ACTIVITY_STORE"""
+    global _activity_store
+    with _activity_store_lock:
+        if _activity_store is None:
+            if ACTIVITY_STORE == "log":
+                _activity_store = LogActivityStore()
+            else:
+                _activity_store = DatabaseActivityStore()
+    return _activity_store
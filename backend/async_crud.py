@@ -0,0 +1,134 @@
+from sqlalchemy import select, func, update, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+from database import User, UserStreak, UserProgression, UserStatsRollup, UserLanguageXP, LanguageTotal
+from progression_catalog import CATALOG_VERSION, DEFAULT_UNLOCKED, unlock_expression
+import crud
+
+# Async counterparts of the crud operations used by the async def routers
+# (progression_tracking, language_club, progression_api). They run on the
+# AsyncSession from database.get_async_db so queries never block the event loop.
+
+# User operations
+async def get_user_by_nickname(db: AsyncSession, nickname: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.nickname == nickname))
+    return result.scalars().first()
+
+# Streak operations
+async def get_user_streak(db: AsyncSession, user_id: int) -> Optional[UserStreak]:
+    result = await db.execute(select(UserStreak).where(UserStreak.user_id == user_id))
+    return result.scalars().first()
+
+# Score operations
+async def record_score_stats(db: AsyncSession, user_id: int, score: int, language: str) -> UserStatsRollup:
+    """Apply a new score to the user's stats rollup (caller commits)"""
+    return await db.run_sync(crud.record_score_stats, user_id, score, language)
+
+async def record_language_xp(db: AsyncSession, user_id: int, language: str, xp: int) -> None:
+    """Add a score to the user's language XP counter and the language totals (caller commits)"""
+    await db.run_sync(crud.record_language_xp, user_id, language, xp)
+
+async def record_daily_score(db: AsyncSession, user_id: int, language: str, score: int) -> None:
+    """Add a score to the user's bucket for the language and today (caller commits)"""
+    await db.run_sync(crud.record_daily_score, user_id, language, score)
+
+async def get_user_total_xp(db: AsyncSession, user_id: int) -> int:
+    result = await db.execute(select(func.sum(UserLanguageXP.xp)).where(UserLanguageXP.user_id == user_id))
+    return result.scalar() or 0
+
+async def get_user_language_xp(db: AsyncSession, user_id: int, language: str) -> int:
+    result = await db.execute(
+        select(UserLanguageXP.xp).where(
+            UserLanguageXP.user_id == user_id,
+            UserLanguageXP.language == language
+        )
+    )
+    return result.scalar() or 0
+
+# Language club operations
+async def get_language_club_totals(db: AsyncSession, language: str) -> Tuple[int, int]:
+    """(member count, total XP) of a language club"""
+    totals = await db.get(LanguageTotal, language)
+    if not totals:
+        return 0, 0
+    return totals.member_count, totals.total_xp
+
+async def get_language_club_members(db: AsyncSession, language: str, limit: int = 50, offset: int = 0) -> List[Any]:
+    """A page of club members by XP (highest first) with their streaks, in one query"""
+    result = await db.execute(
+        select(
+            User.nickname,
+            User.avatar,
+            UserLanguageXP.xp,
+            func.coalesce(UserStreak.current_streak, 0).label("current_streak"),
+            func.coalesce(UserStreak.longest_streak, 0).label("longest_streak")
+        ).join(UserLanguageXP, User.id == UserLanguageXP.user_id).outerjoin(
+            UserStreak, User.id == UserStreak.user_id
+        ).where(
+            UserLanguageXP.language == language,
+            UserLanguageXP.xp > 0
+        ).order_by(UserLanguageXP.xp.desc(), User.nickname).offset(offset).limit(limit)
+    )
+    return list(result.all())
+
+async def get_language_club_rank(db: AsyncSession, language: str, user: User, xp: int) -> Optional[int]:
+    """1-based position of a user with xp in the club ordering, or None if they are not a member"""
+    if xp <= 0:
+        return None
+    result = await db.execute(
+        select(func.count()).select_from(UserLanguageXP).join(User, User.id == UserLanguageXP.user_id).where(
+            UserLanguageXP.language == language,
+            or_(
+                UserLanguageXP.xp > xp,
+                and_(UserLanguageXP.xp == xp, User.nickname < user.nickname)
+            )
+        )
+    )
+    return result.scalar() + 1
+
+# Progression operations
+async def get_user_unlocked_stages(db: AsyncSession, user_id: int) -> Optional[int]:
+    """The user's unlocked-stages bitmask, or None if their progression was never initialized"""
+    result = await db.execute(select(UserProgression.unlocked_stages).where(UserProgression.user_id == user_id))
+    return result.scalar()
+
+async def initialize_user_progression(db: AsyncSession, user_id: int) -> int:
+    """Create the user's progression with the catalog defaults unless it exists (caller commits); returns the stored mask"""
+    progression = crud.upsert_statement(db, UserProgression).values(
+        user_id=user_id, unlocked_stages=DEFAULT_UNLOCKED, catalog_version=CATALOG_VERSION, updated_at=datetime.utcnow()
+    )
+    result = await db.execute(progression.on_conflict_do_nothing(
+        index_elements=[UserProgression.user_id]
+    ).returning(UserProgression.unlocked_stages))
+    inserted = result.scalar()
+    return inserted if inserted is not None else await get_user_unlocked_stages(db, user_id)
+
+async def unlock_progression_stage(db: AsyncSession, user_id: int, stage_id: str) -> Optional[int]:
+    """Unlock a stage and the stages it opens in one atomic UPDATE (caller commits).
+
+    Returns the new mask, or None if the user's progression was never initialized.
+    """
+    result = await db.execute(
+        update(UserProgression).where(UserProgression.user_id == user_id).values(
+            unlocked_stages=unlock_expression(UserProgression.unlocked_stages, stage_id),
+            catalog_version=CATALOG_VERSION,
+            updated_at=datetime.utcnow()
+        ).returning(UserProgression.unlocked_stages).execution_options(synchronize_session=False)
+    )
+    return result.scalar()
+
+async def reset_user_progression(db: AsyncSession, user_id: int) -> int:
+    """Put the user's progression back to the catalog defaults (caller commits)"""
+    progression = crud.upsert_statement(db, UserProgression).values(
+        user_id=user_id, unlocked_stages=DEFAULT_UNLOCKED, catalog_version=CATALOG_VERSION, updated_at=datetime.utcnow()
+    )
+    await db.execute(progression.on_conflict_do_update(
+        index_elements=[UserProgression.user_id],
+        set_={
+            "unlocked_stages": progression.excluded.unlocked_stages,
+            "catalog_version": progression.excluded.catalog_version,
+            "updated_at": progression.excluded.updated_at
+        }
+    ))
+    return DEFAULT_UNLOCKED
@@ -0,0 +1,103 @@
+"""
+Bulk ingestion endpoints for LinguaQuest.
+
+A game on a flaky mobile connection can buffer its scores, activities and
+session updates and send them as one request instead of one round trip each.
+Every item is validated on its own, nicknames and session ids are resolved
+with one query per batch, and the accepted items are written with
+executemany in a single transaction. The response reports, per item, either
+the id of the new row or why it was rejected; rejected items do not stop the
+rest of the batch.
+"""
+
+import os
+from fastapi import APIRouter, Body, Depends, HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+from database import get_db
+from models import GameSessionUpdate, BatchScoreCreate, BatchActivityCreate, BatchSessionUpdate, BatchItemResult, BatchResponse
+from crud import get_user_ids_by_nickname, create_scores, create_activities, update_game_sessions
+from write_queue import run_write
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+
+router = APIRouter()
+
+def check_batch_size(items: list):
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch.")
+
+def validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}" for detail in error.errors()
+    )
+
+def parse_items(items: List[Any], model, results: Dict[int, BatchItemResult]) -> List[tuple]:
+    """(index, item) for the items that are valid models; the others are rejected in results"""
+    adapter = TypeAdapter(model)
+    parsed = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append((index, adapter.validate_python(item)))
+        except ValidationError as error:
+            results[index] = BatchItemResult(index=index, ok=False, error=validation_error(error))
+    return parsed
+
+def batch_response(results: Dict[int, BatchItemResult], count: int) -> BatchResponse:
+    ordered = [results[index] for index in range(count)]
+    accepted = sum(result.ok for result in ordered)
+    return BatchResponse(accepted=accepted, rejected=count - accepted, results=ordered)
+
+def resolve_users(db: Session, items: List[tuple], results: Dict[int, BatchItemResult]) -> List[tuple]:
+    """(index, user_id, item) for the (index, item) pairs whose nickname exists; the others are rejected in results"""
+    user_ids = get_user_ids_by_nickname(db, [item.nickname for _, item in items])
+    resolved = []
+    for index, item in items:
+        if item.nickname in user_ids:
+            resolved.append((index, user_ids[item.nickname], item))
+        else:
+            results[index] = BatchItemResult(index=index, ok=False, error="User not found.")
+    return resolved
+
+@router.post("/batch/scores", response_model=BatchResponse)
+def submit_scores(scores: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """Submit many scores, possibly for different users, in one transaction"""
+    check_batch_size(scores)
+    results: Dict[int, BatchItemResult] = {}
+    resolved = resolve_users(db, parse_items(scores, BatchScoreCreate, results), results)
+    if resolved:
+        score_ids = run_write(db, create_scores, [(user_id, score) for _, user_id, score in resolved])
+        for (index, _, _), score_id in zip(resolved, score_ids):
+            results[index] = BatchItemResult(index=index, ok=True, id=score_id)
+    return batch_response(results, len(scores))
+
+@router.post("/batch/activities", response_model=BatchResponse)
+def submit_activities(activities: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """Record many activities, possibly for different users, in one transaction"""
+    check_batch_size(activities)
+    results: Dict[int, BatchItemResult] = {}
+    resolved = resolve_users(db, parse_items(activities, BatchActivityCreate, results), results)
+    if resolved:
+        activity_ids = run_write(db, create_activities, [(user_id, activity) for _, user_id, activity in resolved])
+        for (index, _, _), activity_id in zip(resolved, activity_ids):
+            results[index] = BatchItemResult(index=index, ok=True, id=activity_id)
+    return batch_response(results, len(activities))
+
+@router.post("/batch/sessions", response_model=BatchResponse)
+def submit_session_updates(sessions: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """Apply many game session updates, in order, in one transaction"""
+    check_batch_size(sessions)
+    results: Dict[int, BatchItemResult] = {}
+    updates = parse_items(sessions, BatchSessionUpdate, results)
+    if updates:
+        session_ids = run_write(db, update_game_sessions, [
+            (update.session_id, GameSessionUpdate(**update.dict(exclude={"session_id"}, exclude_unset=True)))
+            for _, update in updates
+        ])
+        for (index, _), session_id in zip(updates, session_ids):
+            if session_id is None:
+                results[index] = BatchItemResult(index=index, ok=False, error="Game session not found.")
+            else:
+                results[index] = BatchItemResult(index=index, ok=True, id=session_id)
+    return batch_response(results, len(sessions))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bulk ingestion endpoints
+Times --items single POST /scores (and PUT /sessions/{id}) requests against
+one POST /batch/scores (/batch/sessions) request carrying the same items, on
+a fresh SQLite database, and reports the median wall time and SQL
+statements of each over --rounds rounds.
+
+Usage:
+    python benchmarks/batch_ingestion.py --items 100 --rounds 10
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point the engines at a scratch database before anything imports them
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'linguaquest_batch_bench.db')}"
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from database import SessionLocal, engine, init_db
+from crud import create_user, create_game_session
+from models import UserCreate, GameSessionCreate
+from game_api import router as game_router
+from batch_api import router as batch_router
+
+LANGUAGES = ["twi", "gaa", "ewe"]
+
+def seed(players, sessions_per_player):
+    with SessionLocal() as db:
+        for i in range(players):
+            user_id = create_user(db, UserCreate(nickname=f"learner_{i}")).id
+            for j in range(sessions_per_player):
+                create_game_session(db, user_id, GameSessionCreate(session_id=f"s_{i}_{j}", language="twi"))
+
+def session_updates(rng, args):
+    return [{"session_id": f"s_{rng.randrange(args.players)}_{rng.randrange(args.sessions)}",
+             "rounds_played": rng.randint(1, 1000), "rounds_won": rng.randint(0, 1000)} for _ in range(args.items)]
+
+async def timed(client, requests, statements):
+    """Send requests one after another; returns (seconds, SQL statements)"""
+    statements["count"] = 0
+    start = time.perf_counter()
+    for method, url, body in requests:
+        response = await client.request(method, url, json=body)
+        assert response.status_code == 200, response.text
+    return time.perf_counter() - start, statements["count"]
+
+async def run(args):
+    statements = {"count": 0}
+    def count_statement(*_):
+        statements["count"] += 1
+    event.listen(engine, "before_cursor_execute", count_statement)
+
+    app = FastAPI()
+    app.include_router(game_router, prefix="/api/v1")
+    app.include_router(batch_router, prefix="/api/v1")
+    rng = random.Random(args.seed)
+    results = {name: [] for name in ("scores: single", "scores: batch", "sessions: single", "sessions: batch")}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for _ in range(args.rounds):
+            scores = [{"nickname": f"learner_{rng.randrange(args.players)}", "score": rng.randint(0, 500),
+                       "language": rng.choice(LANGUAGES)} for _ in range(args.items)]
+            results["scores: single"].append(await timed(client, [
+                ("POST", f"/api/v1/scores?nickname={score['nickname']}", {k: v for k, v in score.items() if k != "nickname"})
+                for score in scores
+            ], statements))
+            results["scores: batch"].append(await timed(client, [("POST", "/api/v1/batch/scores", scores)], statements))
+
+            # Fresh values for each run: re-applying the same rounds would leave nothing to update
+            results["sessions: single"].append(await timed(client, [
+                ("PUT", f"/api/v1/sessions/{update.pop('session_id')}", update)
+                for update in session_updates(rng, args)
+            ], statements))
+            results["sessions: batch"].append(await timed(client, [
+                ("POST", "/api/v1/batch/sessions", session_updates(rng, args))
+            ], statements))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single versus batch ingestion")
+    parser.add_argument("--items", type=int, default=100, help="items per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=5, help="game sessions per player")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    init_db()
+    seed(args.players, args.sessions)
+    results = asyncio.run(run(args))
+
+    print(f"{args.items} items per request set, median of {args.rounds} rounds")
+    print(f"{'ingestion':<18} {'total ms':>10} {'ms/item':>10} {'items/s':>10} {'sql':>8}")
+    for name, samples in results.items():
+        seconds = statistics.median(sample[0] for sample in samples)
+        sql = statistics.median(sample[1] for sample in samples)
+        print(f"{name:<18} {seconds * 1000:>10.1f} {seconds * 1000 / args.items:>10.3f} "
+              f"{args.items / seconds:>10.0f} {sql:>8.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
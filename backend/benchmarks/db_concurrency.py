@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write throughput benchmark for the SQLite engine configuration
+Compares the legacy engine (default rollback journal, no pragmas) against
+database.create_db_engine with WAL and the SQLITE_PRAGMAS tuning.
+
+Usage:
+    python benchmarks/db_concurrency.py --writers 8 --readers 8 --seconds 10
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from crud import create_user, create_score, get_user_stats, get_leaderboard
+from models import UserCreate, ScoreCreate
+
+CONFIGURATIONS = {
+    "legacy": {},  # Default journal mode and locking, as before DATABASE_URL support
+    "tuned": None,  # database.SQLITE_PRAGMAS
+}
+
+def run_workload(session_factory, user_ids, writers, readers, seconds):
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(is_writer, index):
+        done = errors = 0
+        user_id = user_ids[index % len(user_ids)]
+        while time.perf_counter() < deadline:
+            db = session_factory()
+            try:
+                if is_writer:
+                    create_score(db, user_id, ScoreCreate(score=done % 500, language="twi"))
+                else:
+                    get_user_stats(db, user_id)
+                    get_leaderboard(db, limit=20)
+                done += 1
+            except OperationalError:
+                db.rollback()
+                errors += 1
+            finally:
+                db.close()
+        with lock:
+            counts["writes" if is_writer else "reads"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=worker, args=(True, i)) for i in range(writers)]
+    threads += [threading.Thread(target=worker, args=(False, i)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def benchmark(name, pragmas, writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", sqlite_pragmas=pragmas)
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = session_factory()
+        user_ids = [create_user(db, UserCreate(nickname=f"bench_{i}")).id for i in range(max(writers, readers, 1))]
+        db.close()
+
+        counts = run_workload(session_factory, user_ids, writers, readers, seconds)
+        engine.dispose()
+
+    print(f"{name:>7}: {counts['writes'] / seconds:8.1f} writes/s  {counts['reads'] / seconds:8.1f} reads/s  "
+          f"{counts['errors']} lock errors")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite concurrent read/write throughput benchmark")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writer and {args.readers} reader threads for {args.seconds}s each")
+    for name, pragmas in CONFIGURATIONS.items():
+        benchmark(name, pragmas, args.writers, args.readers, args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for the database-backed endpoints
+Boots the API routers in-process against a large synthetic SQLite database
+(create_sample_data.generate_dataset) and drives each endpoint with
+concurrent clients. Reports p50/p95/p99 latency, requests per second and SQL
+statements per request, and compares them against a saved JSON baseline:
+the run fails (exit status 1) when an endpoint regresses beyond --threshold.
+Single runs are noisy, so --runs N repeats the measurement N times on the
+same database, each with its own random requests, and keeps the median of
+every metric, both when saving a baseline and when comparing. A baseline is
+only compared against runs with the same settings (exit status 2 otherwise).
+
+Usage:
+    python benchmarks/endpoints.py --runs 5 --save-baseline     # record benchmarks/endpoints_baseline.json
+    python benchmarks/endpoints.py --runs 5                     # compare against it
+    python benchmarks/endpoints.py --users 100000 --clients 16 --requests 1000 --threshold 0.3
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "endpoints_baseline.json")
+AS_OF = datetime(2024, 6, 1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the database-backed endpoints")
+    parser.add_argument("--users", type=int, default=20000, help="synthetic users in the database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=400, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per endpoint")
+    parser.add_argument("--runs", type=int, default=1, help="repeat the benchmark and keep per-metric medians")
+    parser.add_argument("--database-dir", default=tempfile.gettempdir(),
+                        help="where the generated database is cached between runs")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative slowdown of p95 latency and requests per second")
+    parser.add_argument("--sql-tolerance", type=float, default=0.5,
+                        help="allowed increase of SQL statements per request")
+    return parser.parse_args()
+
+ARGS = parse_args()
+# The generated database is kept as a template; every run works on a fresh copy so writes do not pile up
+TEMPLATE_PATH = os.path.join(ARGS.database_dir, f"linguaquest_bench_{ARGS.users}_{ARGS.seed}.db")
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "linguaquest_bench.db")
+if os.path.exists(TEMPLATE_PATH):
+    shutil.copyfile(TEMPLATE_PATH, DATABASE_PATH)
+# Point the engines at the benchmark database before anything imports them
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from database import engine, async_engine, init_db
+from create_sample_data import generate_dataset
+from user_api import router as user_router
+from game_api import router as game_router
+from progression_api import router as progression_router
+from progression_tracking import router as progression_tracking_router
+from language_club import router as language_club_router
+
+def endpoints(users):
+    """name -> function(rng) returning (method, url, json body)"""
+    def learner(rng):
+        return f"learner_{rng.randint(1, users)}"
+    return {
+        "validate": lambda rng: ("GET", f"/api/v1/users/validate?nickname={learner(rng)}", None),
+        "submit_score": lambda rng: ("POST", f"/api/v1/scores?nickname={learner(rng)}",
+                                     {"score": rng.randint(0, 500), "language": rng.choice(["twi", "gaa", "ewe"])}),
+        "leaderboard": lambda rng: ("GET", "/api/v1/leaderboard?limit=50", None),
+        "stats": lambda rng: ("GET", f"/api/v1/stats/{learner(rng)}", None),
+        "club": lambda rng: ("GET", f"/api/v1/clubs/{rng.choice(['twi', 'gaa', 'ewe'])}", None),
+        "progression": lambda rng: ("GET", f"/api/v1/progression/{learner(rng)}", None),
+        "xp_add": lambda rng: ("POST", f"/api/v1/xp/{learner(rng)}/add",
+                               {"xp_amount": rng.randint(5, 50), "activity_type": "lesson"}),
+    }
+
+def create_app():
+    app = FastAPI()
+    for router in (user_router, game_router, progression_router, progression_tracking_router, language_club_router):
+        app.include_router(router, prefix="/api/v1")
+    return app
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+async def drive(client, make_request, rng, count, clients):
+    """Issue count requests from clients concurrent workers; returns latencies and wall time"""
+    requests = [make_request(rng) for _ in range(count)]
+    latencies, errors = [], 0
+
+    async def worker(worker_requests):
+        nonlocal errors
+        for method, url, body in worker_requests:
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(requests[i::clients]) for i in range(clients)))
+    return latencies, time.perf_counter() - start, errors
+
+async def run(users, seed, clients, requests, warmup, number=1):
+    """One measurement of every endpoint; each run number draws its own requests so runs start equally cold"""
+    statements = {"count": 0}
+    def count_statement(*args):
+        statements["count"] += 1
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", count_statement)
+
+    results = {}
+    async with httpx.AsyncClient(app=create_app(), base_url="http://bench") as client:
+        for name, make_request in endpoints(users).items():
+            rng = random.Random(f"{seed}:{name}" if number == 1 else f"{seed}:{name}:{number}")
+            await drive(client, make_request, rng, warmup, clients)
+            statements["count"] = 0
+            latencies, elapsed, errors = await drive(client, make_request, rng, requests, clients)
+            results[name] = {
+                "p50_ms": round(statistics.median(latencies) * 1000, 3),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                "rps": round(requests / elapsed, 1),
+                "sql_per_request": round(statements["count"] / requests, 2),
+                "errors": errors,
+            }
+    for target in targets:
+        event.remove(target, "before_cursor_execute", count_statement)
+    await async_engine.dispose()  # aiosqlite connection threads would otherwise keep the process alive
+    return results
+
+def median_results(runs):
+    """Per-endpoint, per-metric median of several runs' results (errors: the worst run)"""
+    digits = {"p50_ms": 3, "p95_ms": 3, "p99_ms": 3, "rps": 1, "sql_per_request": 2}
+    return {
+        name: {
+            **{metric: round(statistics.median(run[name][metric] for run in runs), places) for metric, places in digits.items()},
+            "errors": max(run[name]["errors"] for run in runs),
+        }
+        for name in runs[0]
+    }
+
+def compare(results, baseline, threshold, sql_tolerance):
+    """Regression messages for endpoints that got slower or chattier than the baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {before['rps']} -> {result['rps']} requests/s")
+        if result["sql_per_request"] > before["sql_per_request"] + sql_tolerance:
+            regressions.append(f"{name}: {before['sql_per_request']} -> {result['sql_per_request']} SQL statements/request")
+        if result["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: {result['errors']} failed requests")
+    return regressions
+
+def main():
+    init_db()  # Also adds tables created since the template was generated
+    if not os.path.exists(TEMPLATE_PATH):
+        print(f"Generating {ARGS.users} users into {TEMPLATE_PATH}...")
+        generate_dataset(engine, ARGS.users, seed=ARGS.seed, as_of=AS_OF)
+        engine.dispose()  # Checkpoints the WAL into the database file
+        shutil.copyfile(DATABASE_PATH, TEMPLATE_PATH)
+
+    runs = []
+    for number in range(1, ARGS.runs + 1):
+        if ARGS.runs > 1:
+            print(f"Run {number}/{ARGS.runs}...")
+        runs.append(asyncio.run(run(ARGS.users, ARGS.seed, ARGS.clients, ARGS.requests, ARGS.warmup, number)))
+    results = median_results(runs)
+
+    print(f"{'endpoint':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'sql/req':>8} {'errors':>7}")
+    for name, result in results.items():
+        print(f"{name:<14} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+              f"{result['rps']:>8} {result['sql_per_request']:>8} {result['errors']:>7}")
+
+    config = {"users": ARGS.users, "seed": ARGS.seed, "clients": ARGS.clients, "requests": ARGS.requests, "runs": ARGS.runs}
+    if ARGS.save_baseline:
+        with open(ARGS.baseline, "w") as f:
+            json.dump({"config": config, "endpoints": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {ARGS.baseline}")
+        return 0
+
+    if not os.path.exists(ARGS.baseline):
+        print("No baseline to compare against; run with --save-baseline first")
+        return 0
+    with open(ARGS.baseline) as f:
+        baseline = json.load(f)
+    if baseline["config"] != config:
+        print(f"Not compared: the baseline was recorded with {baseline['config']}, this run used {config}. "
+              "Re-run with the baseline's settings, or record a new baseline with --save-baseline.")
+        return 2
+    regressions = compare(results, baseline["endpoints"], ARGS.threshold, ARGS.sql_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regression(s) beyond {ARGS.threshold:.0%} of the baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Latency and memory of the encoder models on torch versus ONNX Runtime
+Runs the RoBERTa sentiment classifier or the MiniLM sentence encoder with
+eager torch, the fp32 ONNX graph and the int8 ONNX graph, each in its own
+process so peak memory is measured separately. Reports load time, peak RSS,
+p50/p95 latency of single-text calls, texts per second in batches, and how
+far each ONNX variant's outputs are from torch's. Export the graphs first:
+python onnx_backend.py export sentiment embeddings --int8
+
+Usage:
+    python benchmarks/onnx_inference.py --model sentiment
+    python benchmarks/onnx_inference.py --model embeddings --requests 500 --batch-size 32
+"""
+
+import sys
+import os
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VARIANTS = ("torch", "onnx", "onnx-int8")
+TEXTS = [
+    "I believe it is important to work hard in school.",
+    "Traditional values are more important than modern ideas.",
+    "Honestly this is the worst idea I have heard all week.",
+    "Learning a second language opens doors to new friendships, better jobs and a deeper understanding "
+    "of the people and the culture behind the words we use every day.",
+    "Thank you, that was a great explanation!",
+    "No.",
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare torch and ONNX Runtime encoder inference")
+    parser.add_argument("--model", choices=["sentiment", "embeddings"], default="sentiment")
+    parser.add_argument("--requests", type=int, default=200, help="single-text calls to time")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--model-dir", default=None, help="exported graphs (default ONNX_MODEL_DIR)")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)  # Set in the worker processes
+    return parser.parse_args()
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def load(args):
+    """run(texts) -> 2-D numpy array of probabilities or embeddings, for the variant"""
+    from onnx_backend import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR, SENTIMENT_MODEL_NAME, load_onnx_model
+
+    if args.variant == "torch":
+        if args.model == "sentiment":
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME)
+            model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME).eval()
+
+            def run(texts):
+                inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
+                with torch.no_grad():
+                    return torch.softmax(model(**inputs).logits, dim=1).numpy()
+            return run
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu").encode
+
+    model_name = SENTIMENT_MODEL_NAME if args.model == "sentiment" else EMBEDDING_MODEL_NAME
+    model = load_onnx_model(model_name, args.model_dir or ONNX_MODEL_DIR, int8=args.variant == "onnx-int8")
+    if model is None:
+        raise SystemExit(f"{model_name} has not been exported; run: python onnx_backend.py export {args.model} --int8")
+    return model.predict_proba if args.model == "sentiment" else model.encode
+
+def run_variant(args):
+    """Worker process: time one variant and print the results as JSON"""
+    start = time.perf_counter()
+    run = load(args)
+    load_seconds = time.perf_counter() - start
+
+    run(TEXTS)  # Warm up
+    latencies = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        run([TEXTS[i % len(TEXTS)]])
+        latencies.append(time.perf_counter() - start)
+
+    batch = [TEXTS[i % len(TEXTS)] for i in range(args.batch_size)]
+    rounds = max(args.requests // args.batch_size, 1)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        run(batch)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "load_seconds": round(load_seconds, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "texts_per_second": round(rounds * args.batch_size / elapsed, 1),
+        "outputs": run(TEXTS).tolist(),
+    }))
+    return 0
+
+def main():
+    args = parse_args()
+    if args.variant:
+        return run_variant(args)
+    import numpy as np
+
+    results = {}
+    for variant in VARIANTS:
+        command = [sys.executable, os.path.abspath(__file__), "--variant", variant, "--model", args.model,
+                   "--requests", str(args.requests), "--batch-size", str(args.batch_size)]
+        if args.model_dir:
+            command += ["--model-dir", args.model_dir]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+
+    reference = np.array(results["torch"]["outputs"])
+    print(f"{args.model}: {args.requests} single-text calls, batches of {args.batch_size}")
+    print(f"{'variant':<10} {'load s':>7} {'peak MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>9} {'max diff':>9}")
+    for variant, result in results.items():
+        max_diff = float(np.abs(np.array(result["outputs"]) - reference).max())
+        print(f"{variant:<10} {result['load_seconds']:>7} {result['peak_rss_mb']:>8} {result['p50_ms']:>8} "
+              f"{result['p95_ms']:>8} {result['texts_per_second']:>9} {max_diff:>9.2e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
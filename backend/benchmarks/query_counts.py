@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+SQL statements and commits per request for the sync API endpoints
+Runs each endpoint once against a fresh temporary SQLite database through the
+real get_db dependency and prints what it cost.
+
+Usage:
+    python benchmarks/query_counts.py
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point the engine at a scratch database before anything imports it
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR, 'query_counts.db')}"
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import engine, init_db
+from user_api import router as user_router
+from game_api import router as game_router
+from engagement_api_v2 import router as engagement_router
+
+REQUESTS = [
+    ("POST", "/api/v1/users", {"json": {"nickname": "kwame"}}),
+    ("GET", "/api/v1/users/validate?nickname=ab", {}),
+    ("GET", "/api/v1/users/validate?nickname=kwame", {}),
+    ("GET", "/api/v1/users/kwame", {}),
+    ("PUT", "/api/v1/users/kwame", {"json": {"avatar": "owl"}}),
+    ("POST", "/api/v1/users/kwame/login", {}),
+    ("GET", "/api/v1/users/kwame/activities", {}),
+    ("POST", "/api/v1/scores?nickname=kwame", {"json": {"score": 40, "language": "twi"}}),
+    ("GET", "/api/v1/scores/kwame", {}),
+    ("GET", "/api/v1/scores/kwame/highest", {}),
+    ("GET", "/api/v1/leaderboard", {}),
+    ("POST", "/api/v1/sessions?nickname=kwame", {"json": {"session_id": "s1", "language": "twi"}}),
+    ("PUT", "/api/v1/sessions/s1", {"json": {"rounds_played": 3, "rounds_won": 2}}),
+    ("GET", "/api/v1/sessions/s1", {}),
+    ("GET", "/api/v1/stats/kwame", {}),
+    ("GET", "/api/v1/streak?nickname=kwame", {}),
+    ("PATCH", "/api/v1/streak?nickname=kwame&streak=4", {}),
+    ("POST", "/api/v1/streak/increment?nickname=kwame", {}),
+    ("POST", "/api/v1/streak/reset?nickname=kwame", {}),
+    ("PATCH", "/api/v1/level?nickname=kwame&level=3", {}),
+    ("POST", "/api/v1/badges/kwame?badge_type=highscore&badge_name=High", {}),
+    ("GET", "/api/v1/badges/kwame", {}),
+]
+
+def main():
+    init_db()
+    counts = {"statements": 0, "commits": 0, "checkouts": 0}
+    event.listen(engine, "before_cursor_execute", lambda *args: counts.__setitem__("statements", counts["statements"] + 1))
+    event.listen(engine, "commit", lambda conn: counts.__setitem__("commits", counts["commits"] + 1))
+    event.listen(engine.pool, "checkout", lambda *args: counts.__setitem__("checkouts", counts["checkouts"] + 1))
+
+    app = FastAPI()
+    for router in (user_router, game_router, engagement_router):
+        app.include_router(router, prefix="/api/v1")
+    client = TestClient(app)
+
+    print(f"{'endpoint':<62} {'status':>6} {'sql':>4} {'commits':>7} {'checkouts':>9}")
+    totals = {key: 0 for key in counts}
+    for method, url, kwargs in REQUESTS:
+        for key in counts:
+            counts[key] = 0
+        response = client.request(method, url, **kwargs)
+        print(f"{method + ' ' + url:<62} {response.status_code:>6} {counts['statements']:>4} "
+              f"{counts['commits']:>7} {counts['checkouts']:>9}")
+        for key in counts:
+            totals[key] += counts[key]
+    print(f"{'total':<62} {'':>6} {totals['statements']:>4} {totals['commits']:>7} {totals['checkouts']:>9}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
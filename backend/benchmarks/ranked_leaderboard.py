@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the in-memory ranked leaderboard index
+Bulk loads synthetic players, then times rank, around-me, top-K and score
+update operations against it.
+
+Usage:
+    python benchmarks/ranked_leaderboard.py --players 1000000 --operations 20000
+"""
+
+import sys
+import os
+import argparse
+import random
+import resource
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard_index import LeaderboardIndex
+
+def synthetic_players(count, rng):
+    for user_id in range(1, count + 1):
+        yield user_id, f"player_{user_id}", None, rng.randint(0, 250000), rng.randint(0, 60), 1
+
+def time_operation(name, operations, fn):
+    start = time.perf_counter()
+    for _ in range(operations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed / operations * 1e6:>10.1f} us/op {operations / elapsed:>12.0f} ops/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ranked leaderboard index")
+    parser.add_argument("--players", type=int, default=1000000)
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = LeaderboardIndex(seed=args.seed)
+    start = time.perf_counter()
+    index.load_players(synthetic_players(args.players, rng))
+    print(f"Loaded {len(index)} players in {time.perf_counter() - start:.2f}s "
+          f"(peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB)")
+
+    def random_nickname():
+        return f"player_{rng.randint(1, args.players)}"
+
+    def score_update():
+        user_id = rng.randint(1, args.players)
+        index.update(user_id, total_score=index._players[user_id].total_score + rng.randint(1, 500))
+
+    time_operation("rank", args.operations, lambda: index.rank(random_nickname()))
+    time_operation("around (5 each side)", args.operations, lambda: index.around(random_nickname(), 5))
+    time_operation("top 10", args.operations, lambda: index.top(10))
+    time_operation("page of 50 at random", args.operations, lambda: index.top(50, rng.randint(0, args.players - 50)))
+    time_operation("score update", args.operations, score_update)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
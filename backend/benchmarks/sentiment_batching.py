@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency benchmark for micro-batched sentiment inference
+Drives SimpleSentimentAnalyzer (cardiffnlp RoBERTa) at several concurrency
+levels, once with a forward pass per request and once through the
+InferenceBatcher, from threads (like the sync FastAPI endpoints) and from
+asyncio tasks. Reports requests per second, p50/p95/p99 latency and the mean
+batch size.
+
+Usage:
+    python benchmarks/sentiment_batching.py --concurrency 1 4 16 64 --requests 256
+    python benchmarks/sentiment_batching.py --max-batch 64 --max-delay-ms 10
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_batcher import InferenceBatcher
+from simple_nlp_services import SimpleSentimentAnalyzer
+
+ARGUMENTS = [
+    "I believe it is important to work hard in school.",
+    "Traditional values are more important than modern ideas.",
+    "Honestly this is the worst idea I have heard all week.",
+    "Learning a second language opens doors to new friendships, better jobs and a deeper understanding "
+    "of the people and the culture behind the words we use every day.",
+    "Thank you, that was a great explanation!",
+    "No.",
+]
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def run_threads(analyze, texts, concurrency):
+    """Each of concurrency threads sends its share of texts one after another; returns latencies and wall time"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_texts):
+        for text in worker_texts:
+            start = time.perf_counter()
+            analyze(text)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(texts[i::concurrency],)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+def run_tasks(analyze_async, texts, concurrency):
+    """Like run_threads with asyncio tasks on one event loop"""
+    latencies = []
+
+    async def worker(worker_texts):
+        for text in worker_texts:
+            start = time.perf_counter()
+            await analyze_async(text)
+            latencies.append(time.perf_counter() - start)
+
+    async def main():
+        await asyncio.gather(*(worker(texts[i::concurrency]) for i in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return latencies, time.perf_counter() - start
+
+def report(mode, concurrency, latencies, elapsed, batch_size):
+    print(f"{mode:<18} {concurrency:>6} {len(latencies) / elapsed:>9.1f} "
+          f"{statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f} "
+          f"{percentile(latencies, 0.99) * 1000:>9.1f} {batch_size:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched sentiment inference")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=256, help="requests per run")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-delay-ms", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    analyzer = SimpleSentimentAnalyzer()
+    if not analyzer.use_model:
+        print("The sentiment model could not be loaded; nothing to benchmark")
+        return 1
+    if analyzer.sentiment_batcher:
+        analyzer.sentiment_batcher.stop()
+    rng = random.Random(args.seed)
+    texts = [rng.choice(ARGUMENTS) for _ in range(args.requests)]
+    analyzer._model_sentiment(texts[:8])  # Warm up
+
+    print(f"{'mode':<18} {'conc':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'batch':>8}")
+    for concurrency in args.concurrency:
+        latencies, elapsed = run_threads(lambda text: analyzer._model_sentiment([text])[0], texts, concurrency)
+        report("unbatched", concurrency, latencies, elapsed, 1)
+
+        for mode in ("batched threads", "batched asyncio"):
+            batcher = InferenceBatcher(analyzer._model_sentiment, max_batch=args.max_batch, max_delay_ms=args.max_delay_ms)
+            if mode == "batched threads":
+                latencies, elapsed = run_threads(batcher.infer, texts, concurrency)
+            else:
+                latencies, elapsed = run_tasks(batcher.infer_async, texts, concurrency)
+            batcher.stop()
+            report(mode, concurrency, latencies, elapsed, batcher.stats["requests"] / max(batcher.stats["calls"], 1))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Quality, memory and speed of int8-quantized translation models against fp32
+Translates the held-out scenario sentences in benchmarks/translation_heldout.tsv
+from English with the fp32 model and with its int8 dynamically quantized
+version (integrations/translation/quantization.py). Each variant runs in its
+own process so their peak memory is measured separately. Reports BLEU and chrF
+(sacrebleu) against the reference translations where the file has them, the
+agreement of int8 with fp32 on every sentence, load time, peak RSS, model
+size and sentences per second. The first int8 run also quantizes the model
+and fills the cache; run again to see the load time of a cached start.
+
+Usage:
+    python benchmarks/translation_quantization.py --model nllb --lang twi
+    python benchmarks/translation_quantization.py --model marian --lang ewe --batch-size 8
+"""
+
+import sys
+import os
+import argparse
+import csv
+import io
+import json
+import resource
+import subprocess
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA = os.path.join(BENCHMARK_DIR, "translation_heldout.tsv")
+NLLB_MODEL_NAME = "facebook/nllb-200-distilled-600M"
+NLLB_CODES = {"en": "eng_Latn", "twi": "aka_Latn", "gaa": "gaa_Latn", "ewe": "ewe_Latn"}  # As in main.LANG_CODE_MAP
+VARIANTS = ("fp32", "int8")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 translation models")
+    parser.add_argument("--model", choices=["nllb", "marian"], default="nllb")
+    parser.add_argument("--lang", choices=["twi", "gaa", "ewe"], default="twi", help="target language")
+    parser.add_argument("--data", default=DEFAULT_DATA)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--cache-dir", default=None, help="quantized model cache (default QUANTIZED_MODEL_DIR)")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)  # Set in the worker processes
+    return parser.parse_args()
+
+def read_heldout(path, lang):
+    """(source sentences, reference or None for each)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f, delimiter="\t"))
+    return [row["source"] for row in rows], [row[lang] or None for row in rows]
+
+def load(args):
+    """(model name, model, translate(batch) -> list of str) for the variant"""
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, MarianMTModel, MarianTokenizer
+    from integrations.translation.quantization import QUANTIZED_MODEL_DIR, load_seq2seq_model
+    from integrations.translation.marianmt import MarianMTTranslator
+
+    quantize = args.variant == "int8"
+    cache_dir = args.cache_dir or QUANTIZED_MODEL_DIR
+    if args.model == "nllb":
+        model_name = NLLB_MODEL_NAME
+        tokenizer = AutoTokenizer.from_pretrained(model_name, src_lang=NLLB_CODES["en"])
+        model = load_seq2seq_model(AutoModelForSeq2SeqLM, model_name, quantize=quantize, cache_dir=cache_dir)
+        generate_kwargs = {"forced_bos_token_id": tokenizer.convert_tokens_to_ids(NLLB_CODES[args.lang]), "max_length": 512}
+    else:
+        model_name = MarianMTTranslator.MODEL_NAMES[("en", args.lang)]
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        model = load_seq2seq_model(MarianMTModel, model_name, quantize=quantize, cache_dir=cache_dir)
+        generate_kwargs = {}
+    model.eval()
+
+    def translate(batch):
+        inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True)
+        with torch.no_grad():
+            generated = model.generate(**inputs, **generate_kwargs)
+        return tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+    return model_name, model, translate
+
+def model_bytes(model):
+    """Size of the model's serialized state dict"""
+    import torch
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+def run_variant(args):
+    """Worker process: load one variant, translate the held-out set and print the results as JSON"""
+    sources, _ = read_heldout(args.data, args.lang)
+    start = time.perf_counter()
+    model_name, model, translate = load(args)
+    load_seconds = time.perf_counter() - start
+
+    translate(sources[:1])  # Warm up
+    start = time.perf_counter()
+    translations = []
+    for i in range(0, len(sources), args.batch_size):
+        translations.extend(translate(sources[i:i + args.batch_size]))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "model": model_name,
+        "load_seconds": round(load_seconds, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "model_mb": round(model_bytes(model) / 2 ** 20),
+        "sentences_per_second": round(len(sources) / elapsed, 2),
+        "translations": translations,
+    }))
+    return 0
+
+def main():
+    args = parse_args()
+    if args.variant:
+        return run_variant(args)
+    import sacrebleu
+
+    results = {}
+    for variant in VARIANTS:
+        command = [sys.executable, os.path.abspath(__file__), "--variant", variant, "--model", args.model,
+                   "--lang", args.lang, "--data", args.data, "--batch-size", str(args.batch_size)]
+        if args.cache_dir:
+            command += ["--cache-dir", args.cache_dir]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+
+    sources, references = read_heldout(args.data, args.lang)
+    scored = [i for i, reference in enumerate(references) if reference]
+    print(f"{results['fp32']['model']} en -> {args.lang}: {len(sources)} sentences, {len(scored)} with references")
+    print(f"{'variant':<8} {'BLEU':>7} {'chrF':>7} {'load s':>8} {'peak MB':>8} {'model MB':>9} {'sent/s':>8}")
+    for variant, result in results.items():
+        hypotheses = [result["translations"][i] for i in scored]
+        reference_rows = [[references[i] for i in scored]]
+        bleu = sacrebleu.corpus_bleu(hypotheses, reference_rows).score if scored else float("nan")
+        chrf = sacrebleu.corpus_chrf(hypotheses, reference_rows).score if scored else float("nan")
+        print(f"{variant:<8} {bleu:>7.1f} {chrf:>7.1f} {result['load_seconds']:>8} {result['peak_rss_mb']:>8} "
+              f"{result['model_mb']:>9} {result['sentences_per_second']:>8}")
+
+    # How far int8 drifts from the fp32 output, on every sentence
+    fp32, int8 = results["fp32"]["translations"], results["int8"]["translations"]
+    print(f"int8 vs fp32: BLEU {sacrebleu.corpus_bleu(int8, [fp32]).score:.1f}, "
+          f"chrF {sacrebleu.corpus_chrf(int8, [fp32]).score:.1f}, "
+          f"{sum(a == b for a, b in zip(fp32, int8))}/{len(fp32)} identical")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
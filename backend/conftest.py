@@ -0,0 +1,102 @@
+"""
+Shared pytest fixtures for the LinguaQuest backend tests.
+Each test gets its own SQLite database file so the real linguaquest.db is never touched.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from crud import rebuild_user_stats
+from database import Base, create_db_engine, create_async_db_engine, get_db, User, UserScore, UserStreak
+from game_api import router as game_router
+from user_api import router as user_router
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'linguaquest_test.db'}"
+
+
+@pytest.fixture
+def engine(database_url):
+    test_engine = create_db_engine(database_url)
+    Base.metadata.create_all(bind=test_engine)
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def async_engine(engine, database_url):
+    """Async engine on the same database file as the engine fixture"""
+    test_engine = create_async_db_engine(database_url)
+    yield test_engine
+    asyncio.run(test_engine.dispose())
+
+
+@pytest.fixture
+def async_session_factory(async_engine):
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def query_counter(engine):
+    return QueryCounter(engine)
+
+
+@pytest.fixture
+def client(db):
+    """TestClient for the game and user routers, on the db fixture's session"""
+    app = FastAPI()
+    app.include_router(game_router, prefix="/api/v1")
+    app.include_router(user_router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+@pytest.fixture
+def seed_players(db):
+    """seed_players(count) adds count players; scores and streaks repeat so sort keys tie"""
+    def seed(count):
+        for i in range(count):
+            user = User(nickname=f"player_{i:03d}", preferences={})
+            db.add(user)
+            db.flush()
+            db.add(UserStreak(user_id=user.id, current_streak=i % 5 + 1, longest_streak=5))
+            db.add(UserScore(user_id=user.id, score=10 * (i % 7), language="twi"))
+        db.commit()
+        rebuild_user_stats(db)
+    return seed
+
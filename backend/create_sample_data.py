@@ -1,7 +1,39 @@
-from database import SessionLocal, User, UserScore, UserStreak, UserActivity
-from sqlalchemy import func
-from datetime import datetime, timedelta
+#!/usr/bin/env python3
+"""
+Sample and synthetic data for LinguaQuest
+Without --users, adds a few random scores, streaks and activities to the users
+that already exist. With --users N, generates N new users with play histories
+(sessions, scores, activities, streaks, badges and progression across
+twi/gaa/ewe) using bulk inserts. The same --seed and --as-of always produce
+the same rows, so benchmarks and query-plan tests get a repeatable large
+dataset.
+
+Usage:
+    python create_sample_data.py                                 # sprinkle data over existing users
+    python create_sample_data.py --users 100000 --seed 42        # generate 100k synthetic users
+    python create_sample_data.py --users 1000000 --as-of 2024-06-01
+"""
+
+import sys
+import os
+import argparse
 import random
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal, User, UserScore, UserStreak, UserActivity, UserBadge, GameSession, UserProgression, UserStatsRollup, init_db, engine
+from crud import rebuild_language_xp, rebuild_daily_scores
+from progression_catalog import CATALOG_VERSION, DEFAULT_UNLOCKED, PARENTS, SUB_STAGES, stage_mask
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+LANGUAGES = ['twi', 'gaa', 'ewe']
+LANGUAGE_WEIGHTS = [0.5, 0.3, 0.2]  # Share of users whose main language it is
+CATEGORIES = ['vocabulary', 'phrases', 'grammar', 'listening']
+DIFFICULTIES = ['easy', 'medium', 'hard']
+TABLE_ORDER = (User, UserStreak, GameSession, UserScore, UserActivity, UserBadge, UserProgression, UserStatsRollup)
 
 def create_sample_data():
     db = SessionLocal()
@@ -51,6 +83,8 @@ def create_sample_data():
                 db.add(activity)
         
         db.commit()
+        rebuild_language_xp(db)
+        rebuild_daily_scores(db)
         print("Sample language club data created successfully!")
         
         # Print some statistics
@@ -67,5 +101,167 @@ def create_sample_data():
     finally:
         db.close()
 
+# Synthetic datasets
+def _runs(days: List[int]) -> List[int]:
+    """Lengths of the runs of consecutive days in a sorted list of day numbers"""
+    runs = []
+    for previous, day in zip([None] + days, days):
+        if previous is not None and day == previous + 1:
+            runs[-1] += 1
+        else:
+            runs.append(1)
+    return runs
+
+def generate_user(rng: random.Random, user_id: int, as_of: datetime, days: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Rows for one synthetic user, keyed by table"""
+    # Engagement is heavy-tailed: most users play a little, a few play a lot, some never play
+    sessions_count = 0 if rng.random() < 0.15 else min(300, int(rng.paretovariate(1.2) * 2))
+    skill = rng.betavariate(2, 3)
+    main_language = rng.choices(LANGUAGES, LANGUAGE_WEIGHTS)[0]
+    # Play is biased towards recent days; day 0 is the day before as_of
+    day_offsets = sorted(min(days - 1, int(rng.expovariate(1 / 15))) for _ in range(sessions_count))
+    created_at = as_of - timedelta(days=(day_offsets[-1] if day_offsets else rng.randrange(days)) + rng.randint(1, 30), seconds=rng.randrange(86400))
+
+    sessions, scores, activities = [], [], [{
+        "user_id": user_id, "activity_type": "user_created", "details": {"nickname": f"learner_{user_id}"}, "timestamp": created_at
+    }]
+    last_played = {}
+    for n, offset in enumerate(reversed(day_offsets)):
+        # Sessions last at most 20 minutes, so every one ends before as_of
+        start = as_of - timedelta(days=offset, seconds=rng.randrange(1800, 86400))
+        language = main_language if rng.random() < 0.75 else rng.choice(LANGUAGES)
+        rounds_played = rng.randint(3, 10)
+        rounds_won = sum(rng.random() < skill for _ in range(rounds_played))
+        score = min(500, int(rounds_won * 50 * (0.8 + 0.4 * rng.random())))
+        session_id = f"s{user_id}-{n}"
+        difficulty = DIFFICULTIES[min(2, int(skill * 3 + rng.random() * 0.5))]
+        end = start + timedelta(minutes=rounds_played * 2)
+        sessions.append({
+            "session_id": session_id, "user_id": user_id, "start_time": start, "end_time": end,
+            "total_score": score, "rounds_played": rounds_played, "rounds_won": rounds_won,
+            "language": language, "category": rng.choice(CATEGORIES), "difficulty": difficulty, "session_data": {}
+        })
+        scores.append({
+            "user_id": user_id, "score": score, "language": language, "category": sessions[-1]["category"],
+            "difficulty": difficulty, "game_session_id": session_id, "created_at": end
+        })
+        activities.append({"user_id": user_id, "activity_type": "login", "details": {}, "timestamp": start - timedelta(seconds=30)})
+        activities.append({"user_id": user_id, "activity_type": "game_end", "details": {"session_id": session_id, "score": score}, "timestamp": end})
+        last_played[language] = max(end, last_played.get(language, end))
+
+    # Streaks come from the days actually played; only a run reaching day 0 is still current
+    played_days = sorted({-offset for offset in day_offsets})
+    runs = _runs(played_days)
+    current_streak = runs[-1] if played_days and played_days[-1] == 0 else 1
+    longest_streak = max(runs, default=1)
+    last_activity = max((session["end_time"] for session in sessions), default=created_at)
+
+    badges = []
+    highest_score = max((s["score"] for s in scores), default=0)
+    for badge_type, badge_name, earned in (
+        ("streak", "Week Streak", longest_streak >= 7),
+        ("highscore", "High Scorer", highest_score >= 400),
+        ("dedicated", "Dedicated Learner", sessions_count >= 50),
+        ("polyglot", "Polyglot", len(last_played) == len(LANGUAGES)),
+    ):
+        if earned:
+            badges.append({
+                "user_id": user_id, "badge_type": badge_type, "badge_name": badge_name,
+                "earned_at": last_activity, "is_active": rng.random() > 0.02
+            })
+
+    # One sub-stage unlocks per five sessions; a main stage is unlocked once any of its sub-stages is
+    unlocked_subs = SUB_STAGES[:1 + sessions_count // 5]
+    progression = {
+        "user_id": user_id, "catalog_version": CATALOG_VERSION, "updated_at": last_activity,
+        "unlocked_stages": DEFAULT_UNLOCKED | stage_mask(unlocked_subs) | stage_mask(PARENTS[sub] for sub in unlocked_subs)
+    }
+
+    # Stats rollup as crud.compute_user_stats_rollups would compute it
+    language_counts = {}
+    for language in sorted(last_played, key=lambda language: (last_played[language], language)):
+        language_counts[language] = sum(1 for s in scores if s["language"] == language)
+    stats = {
+        "user_id": user_id, "total_score": sum(s["score"] for s in scores), "highest_score": highest_score,
+        "scores_count": len(scores), "games_played": len(sessions),
+        "total_rounds_won": sum(s["rounds_won"] for s in sessions),
+        "total_rounds_played": sum(s["rounds_played"] for s in sessions),
+        "badges_count": sum(1 for badge in badges if badge["is_active"]), "language_counts": language_counts,
+        "updated_at": last_activity
+    }
+
+    return {
+        User: [{
+            "id": user_id, "nickname": f"learner_{user_id}", "avatar": f"avatar_{rng.randrange(24)}",
+            "created_at": created_at, "last_login": last_activity, "is_active": True,
+            "preferences": {"language": main_language}
+        }],
+        UserStreak: [{
+            "user_id": user_id, "current_streak": current_streak, "longest_streak": longest_streak,
+            "last_activity_date": last_activity, "updated_at": last_activity
+        }],
+        GameSession: sessions,
+        UserScore: scores,
+        UserActivity: activities,
+        UserBadge: badges,
+        UserProgression: [progression],
+        UserStatsRollup: [stats],
+    }
+
+def generate_dataset(bind, users: int, seed: int = 42, as_of: Optional[datetime] = None,
+                     days: int = 90, batch_users: int = 2000, progress: bool = False) -> Dict[str, int]:
+    """Bulk insert users synthetic users (ids after the current maximum) and return rows written per table.
+
+    Each user draws from their own seeded generator, so a given seed and as_of
+    always produce the same rows regardless of batch size.
+    """
+    as_of = as_of or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    with bind.connect() as conn:
+        first_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+    counts = {model.__tablename__: 0 for model in TABLE_ORDER}
+    started = time.perf_counter()
+
+    for batch_start in range(first_id, first_id + users, batch_users):
+        batch = {model: [] for model in TABLE_ORDER}
+        for user_id in range(batch_start, min(batch_start + batch_users, first_id + users)):
+            rows = generate_user(random.Random(f"{seed}:{user_id - first_id}"), user_id, as_of, days)
+            for model, model_rows in rows.items():
+                batch[model].extend(model_rows)
+        with bind.begin() as conn:
+            for model in TABLE_ORDER:
+                if batch[model]:
+                    conn.execute(insert(model), batch[model])
+                    counts[model.__tablename__] += len(batch[model])
+        if progress:
+            done = min(batch_start + batch_users, first_id + users) - first_id
+            print(f"{done}/{users} users ({time.perf_counter() - started:.1f}s)")
+
+    with Session(bind) as db:
+        rebuild_language_xp(db)
+        rebuild_daily_scores(db, today=as_of.date())
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Create sample data or generate a synthetic dataset")
+    parser.add_argument("--users", type=int, help="number of synthetic users to generate")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default 42)")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, help="date the histories end on (default today)")
+    parser.add_argument("--days", type=int, default=90, help="days of play history (default 90)")
+    parser.add_argument("--batch-size", type=int, default=2000, help="users per insert transaction")
+    args = parser.parse_args()
+
+    if args.users is None:
+        create_sample_data()
+        return 0
+
+    init_db()
+    started = time.perf_counter()
+    counts = generate_dataset(engine, args.users, seed=args.seed, as_of=args.as_of, days=args.days,
+                              batch_users=args.batch_size, progress=True)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+    print(f"Synthetic dataset generated in {time.perf_counter() - started:.1f}s")
+    return 0
+
 if __name__ == "__main__":
-    create_sample_data()
+    sys.exit(main())
@@ -1,9 +1,14 @@
+import threading
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from database import User, UserActivity, UserScore, UserStreak, UserBadge, GameSession
+from sqlalchemy import event, func, desc, case, cast, delete, insert, literal, select, text, tuple_, union, update, and_, or_, bindparam, Date, DateTime, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple
+from database import insert_rows, User, UserActivity, UserScore, UserStreak, UserBadge, GameSession, UserStatsRollup, UserLanguageXP, LanguageTotal, UserDailyScore
 from models import UserCreate, UserUpdate, ActivityCreate, ScoreCreate, StreakUpdate, BadgeCreate, GameSessionCreate, GameSessionUpdate
+from activity_store import get_activity_store
+from leaderboard_index import queue_leaderboard_update, queue_score_update
+from leaderboard_snapshot import queue_snapshot_write
 
 # User CRUD operations
 def create_user(db: Session, user: UserCreate) -> User:
@@ -14,12 +19,12 @@ def create_user(db: Session, user: UserCreate) -> User:
         preferences={}
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db.flush()  # Assigns db_user.id
     
     # Create initial streak record
     streak = UserStreak(user_id=db_user.id)
     db.add(streak)
+    db.add(UserStatsRollup(user_id=db_user.id, language_counts={}))
     db.commit()
     
     return db_user
@@ -27,8 +32,13 @@ def create_user(db: Session, user: UserCreate) -> User:
 def get_user_by_nickname(db: Session, nickname: str) -> Optional[User]:
     return db.query(User).filter(User.nickname == nickname).first()
 
+def get_user_ids_by_nickname(db: Session, nicknames: List[str]) -> Dict[str, int]:
+    """nickname -> user id for the nicknames that exist, in one query"""
+    return dict(db.execute(select(User.nickname, User.id).where(User.nickname.in_(set(nicknames)))).all())
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+    # Served from the session's identity map when the user is already loaded
+    return db.get(User, user_id)
 
 def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
     db_user = get_user_by_id(db, user_id)
@@ -38,9 +48,10 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_user, field, value)
+    if "avatar" in update_data:
+        queue_leaderboard_update(db, user_id, avatar=db_user.avatar)
     
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def update_user_last_login(db: Session, user_id: int):
@@ -51,20 +62,21 @@ def update_user_last_login(db: Session, user_id: int):
 
 # Activity CRUD operations
 def create_activity(db: Session, user_id: int, activity: ActivityCreate) -> UserActivity:
-    db_activity = UserActivity(
-        user_id=user_id,
-        activity_type=activity.activity_type,
-        details=activity.details or {}
-    )
-    db.add(db_activity)
+    db_activity = get_activity_store().append(db, user_id, activity.activity_type, activity.details)
     db.commit()
-    db.refresh(db_activity)
     return db_activity
 
-def get_user_activities(db: Session, user_id: int, limit: int = 50) -> List[UserActivity]:
-    return db.query(UserActivity).filter(
-        UserActivity.user_id == user_id
-    ).order_by(desc(UserActivity.timestamp)).limit(limit).all()
+def create_activities(db: Session, activities: List[Tuple[int, ActivityCreate]]) -> List[int]:
+    """Record (user_id, activity) pairs in one transaction; returns the new activity ids in order"""
+    activity_ids = get_activity_store().append_many(
+        db, [(user_id, activity.activity_type, activity.details) for user_id, activity in activities]
+    )
+    db.commit()
+    return activity_ids
+
+def get_user_activities(db: Session, user_id: int, limit: int = 50, before: Optional[tuple] = None) -> List[UserActivity]:
+    """Most recent activities first; before is the (timestamp, id) of the last activity already seen"""
+    return get_activity_store().get_user_activities(db, user_id, limit, before)
 
 # Score CRUD operations
 def create_score(db: Session, user_id: int, score: ScoreCreate) -> UserScore:
@@ -76,59 +88,104 @@ def create_score(db: Session, user_id: int, score: ScoreCreate) -> UserScore:
         difficulty=score.difficulty,
         game_session_id=score.game_session_id
     )
+    record_score_stats(db, user_id, score.score, score.language)
+    record_language_xp(db, user_id, score.language, score.score)
+    record_daily_score(db, user_id, score.language, score.score)
     db.add(db_score)
     db.commit()
-    db.refresh(db_score)
     return db_score
 
-def get_user_scores(db: Session, user_id: int, limit: int = 50) -> List[UserScore]:
-    return db.query(UserScore).filter(
-        UserScore.user_id == user_id
-    ).order_by(desc(UserScore.created_at)).limit(limit).all()
+def create_scores(db: Session, scores: List[Tuple[int, ScoreCreate]]) -> List[int]:
+    """Record (user_id, score) pairs in one transaction; returns the new score ids in order.
+
+    Scores are inserted with one multi-row INSERT, and the counters they feed
+    are updated once per user, (user, language) and daily bucket rather than
+    once per score.
+    """
+    by_user: Dict[int, List[Tuple[int, str]]] = {}
+    by_language: Dict[Tuple[int, str], List[int]] = {}
+    for user_id, score in scores:
+        by_user.setdefault(user_id, []).append((score.score, score.language))
+        by_language.setdefault((user_id, score.language), []).append(score.score)
+    # Before the insert: a missing rollup is rebuilt from user_scores, which must not hold the new scores yet
+    rollups = get_user_stats_rollups(db, list(by_user))
+    for user_id, user_scores in by_user.items():
+        record_scores_stats(db, user_id, user_scores, rollups[user_id])
+
+    scored_at = datetime.utcnow()
+    score_ids = insert_rows(db, UserScore, [
+        {
+            "user_id": user_id, "score": score.score, "language": score.language, "category": score.category,
+            "difficulty": score.difficulty, "game_session_id": score.game_session_id, "created_at": scored_at
+        }
+        for user_id, score in scores
+    ])
+    record_language_xp_many(db, {key: (sum(points), len(points)) for key, points in by_language.items()}, scored_at)
+    record_daily_buckets(db, [
+        {
+            "day": scored_at.date(), "user_id": user_id, "language": language,
+            "score": sum(points), "highest_score": max(points), "scores_count": len(points)
+        }
+        for (user_id, language), points in by_language.items()
+    ])
+    db.commit()
+    return score_ids
+
+def get_user_scores(db: Session, user_id: int, limit: int = 50, before: Optional[tuple] = None) -> List[UserScore]:
+    """Most recent scores first; before is the (created_at, id) of the last score already seen"""
+    query = db.query(UserScore).filter(UserScore.user_id == user_id)
+    if before is not None:
+        query = query.filter(tuple_(UserScore.created_at, UserScore.id) < tuple(before))
+    return query.order_by(desc(UserScore.created_at), desc(UserScore.id)).limit(limit).all()
 
 def get_user_highest_score(db: Session, user_id: int) -> Optional[UserScore]:
     return db.query(UserScore).filter(
         UserScore.user_id == user_id
     ).order_by(desc(UserScore.score)).first()
 
-def get_leaderboard(db: Session, limit: int = 100, offset: int = 0, sort_by: str = 'score', sort_dir: str = 'desc') -> List[Dict[str, Any]]:
-    """Get leaderboard with user stats, badges, favorite language, and support for sorting/pagination"""
-    subquery = db.query(
-        UserScore.user_id,
-        func.sum(UserScore.score).label('total_score'),
-        func.max(UserScore.score).label('highest_score'),
-        func.count(UserScore.id).label('games_played')
-    ).group_by(UserScore.user_id).subquery()
+LEADERBOARD_SORT_KEYS = {
+    # sort_by -> keyset columns; level is derived from the streak, so it pages on the streak
+    'score': (UserStatsRollup.total_score, UserStatsRollup.user_id),
+    'streak': (UserStreak.current_streak, UserStreak.user_id),
+    'level': (UserStreak.current_streak, UserStreak.user_id),
+}
+
+def get_leaderboard(db: Session, limit: int = 100, offset: int = 0, sort_by: str = 'score', sort_dir: str = 'desc',
+                    after: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Get leaderboard with user stats, badges, favorite language, and support for sorting/pagination.
 
-    # Join user, streak, and aggregate score
+    Rows come from the user_stats rollup, so a page is a single indexed range
+    read. Pass the "next" value of the previous page's last entry as after
+    (keyset pagination) to continue from it instead of skipping offset rows.
+    """
+    sort_columns = LEADERBOARD_SORT_KEYS.get(sort_by, LEADERBOARD_SORT_KEYS['score'])
     query = db.query(
         User.id,
         User.nickname,
         User.avatar,
-        subquery.c.total_score,
-        subquery.c.highest_score,
-        subquery.c.games_played,
+        UserStatsRollup.total_score,
+        UserStatsRollup.highest_score,
+        UserStatsRollup.scores_count.label('games_played'),
+        UserStatsRollup.badges_count,
+        UserStatsRollup.language_counts,
         UserStreak.current_streak,
         UserStreak.longest_streak,
         User.last_login.label('last_activity')
-    ).join(subquery, User.id == subquery.c.user_id).join(
+    ).join(UserStatsRollup, User.id == UserStatsRollup.user_id).join(
         UserStreak, User.id == UserStreak.user_id
-    )
+    ).filter(UserStatsRollup.scores_count > 0)
 
-    # Sorting
-    if sort_by == 'score':
-        order = subquery.c.total_score
-    elif sort_by == 'streak':
-        order = UserStreak.current_streak
-    elif sort_by == 'level':
-        # Level is derived from streak
-        order = func.min(10, func.max(1, (UserStreak.current_streak // 3) + 1))
+    # Sorting (ties broken by user id so every row has a unique position)
+    if after is not None:
+        position = tuple_(*sort_columns)
+        query = query.filter(position > tuple(after["key"]) if sort_dir == 'asc' else position < tuple(after["key"]))
+        offset, start_rank = 0, after["rank"]
     else:
-        order = subquery.c.total_score
+        start_rank = offset
     if sort_dir == 'asc':
-        query = query.order_by(order.asc())
+        query = query.order_by(*(column.asc() for column in sort_columns))
     else:
-        query = query.order_by(order.desc())
+        query = query.order_by(*(column.desc() for column in sort_columns))
 
     # Pagination
     query = query.offset(offset).limit(limit)
@@ -136,18 +193,12 @@ def get_leaderboard(db: Session, limit: int = 100, offset: int = 0, sort_by: str
 
     leaderboard = []
     for idx, row in enumerate(result):
-        # Get badges_count and favorite_language
-        badges_count = len(get_user_badges(db, row.id))
-        # Favorite language: get all scores for user
-        scores = get_user_scores(db, row.id, limit=1000)
-        language_counts = {}
-        for score in scores:
-            language_counts[score.language] = language_counts.get(score.language, 0) + 1
-        favorite_language = max(language_counts.items(), key=lambda x: x[1])[0] if language_counts else "twi"
         # Level from streak
         level = min(10, max(1, (row.current_streak // 3) + 1))
+        rank = start_rank + idx + 1
+        key = (row.total_score, row.id) if sort_columns[0] is UserStatsRollup.total_score else (row.current_streak, row.id)
         leaderboard.append({
-            "rank": offset + idx + 1,
+            "rank": rank,
             "nickname": row.nickname,
             "avatar": row.avatar,
             "total_score": row.total_score,
@@ -156,9 +207,10 @@ def get_leaderboard(db: Session, limit: int = 100, offset: int = 0, sort_by: str
             "current_streak": row.current_streak,
             "longest_streak": row.longest_streak,
             "last_activity": row.last_activity,
-            "badges_count": badges_count,
-            "favorite_language": favorite_language,
-            "level": level
+            "badges_count": row.badges_count,
+            "favorite_language": get_favorite_language(row.language_counts or {}),
+            "level": level,
+            "next": {"key": key, "rank": rank}
         })
     return leaderboard
 
@@ -176,9 +228,9 @@ def update_user_streak(db: Session, user_id: int, streak_update: StreakUpdate) -
         db_streak.longest_streak = max(db_streak.longest_streak, streak_update.longest_streak)
     db_streak.last_activity_date = datetime.utcnow()
     db_streak.updated_at = datetime.utcnow()
+    queue_leaderboard_update(db, user_id, current_streak=db_streak.current_streak)
     
     db.commit()
-    db.refresh(db_streak)
     return db_streak
 
 def increment_streak(db: Session, user_id: int) -> Optional[UserStreak]:
@@ -196,8 +248,8 @@ def increment_streak(db: Session, user_id: int) -> Optional[UserStreak]:
         db_streak.longest_streak = max(db_streak.longest_streak, db_streak.current_streak)
         db_streak.last_activity_date = datetime.utcnow()
         db_streak.updated_at = datetime.utcnow()
+        queue_leaderboard_update(db, user_id, current_streak=db_streak.current_streak)
         db.commit()
-        db.refresh(db_streak)
     
     return db_streak
 
@@ -209,11 +261,108 @@ def reset_streak(db: Session, user_id: int) -> Optional[UserStreak]:
     db_streak.current_streak = 1
     db_streak.last_activity_date = datetime.utcnow()
     db_streak.updated_at = datetime.utcnow()
+    queue_leaderboard_update(db, user_id, current_streak=db_streak.current_streak)
     
     db.commit()
-    db.refresh(db_streak)
     return db_streak
 
+def _day_number(db: Session, value):
+    """Whole days since a fixed epoch for a datetime expression, so consecutive days differ by one"""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(value, Date) - cast(literal("1970-01-01"), Date)
+    return cast(func.julianday(func.date(value)), Integer)
+
+def _larger(a, b):
+    return case((a >= b, a), else_=b)
+
+def reconcile_streaks(db: Session, today: Optional[date] = None, check_only: bool = False) -> List[Dict[str, Any]]:
+    """Recompute every stored streak from the days users were active, in set-based SQL.
+
+    Activity days are the UTC days of user_scores plus each streak's
+    last_activity_date. Runs of consecutive days are found with a window
+    function, and a streak is current if its run reaches yesterday or today.
+    Expired streaks are reset to 1, as reset_streak does. A live streak never goes below its stored
+    value, because streak endpoints can advance it without writing a score,
+    and longest_streak never decreases. Returns the drift found; unless
+    check_only is set, the changed rows are updated.
+    """
+    today = today or datetime.utcnow().date()
+    yesterday = _day_number(db, literal(datetime.combine(today - timedelta(days=1), datetime.min.time())))
+    activity_days = union(
+        select(UserScore.user_id, _day_number(db, UserScore.created_at).label("day")),
+        select(UserStreak.user_id, _day_number(db, UserStreak.last_activity_date)).where(UserStreak.last_activity_date.isnot(None))
+    ).subquery()
+    # Day number minus position among the user's days is the same for every day of a run
+    numbered = select(
+        activity_days.c.user_id,
+        activity_days.c.day,
+        (activity_days.c.day - func.row_number().over(partition_by=activity_days.c.user_id, order_by=activity_days.c.day)).label("run")
+    ).subquery()
+    runs = select(
+        numbered.c.user_id, func.count().label("length"), func.max(numbered.c.day).label("last_day")
+    ).group_by(numbered.c.user_id, numbered.c.run).subquery()
+    # Only the latest run can reach yesterday
+    computed = select(
+        runs.c.user_id,
+        func.max(runs.c.length).label("longest"),
+        func.max(case((runs.c.last_day >= yesterday, runs.c.length), else_=0)).label("current")
+    ).group_by(runs.c.user_id).subquery()
+    last_scores = select(
+        UserScore.user_id, func.max(UserScore.created_at).label("last_scored_at")
+    ).group_by(UserScore.user_id).subquery()
+
+    current = case(
+        (computed.c.current == 0, 1),
+        (_day_number(db, UserStreak.last_activity_date) >= yesterday, _larger(computed.c.current, UserStreak.current_streak)),
+        else_=computed.c.current
+    )
+    longest = _larger(_larger(UserStreak.longest_streak, computed.c.longest), current)
+    last_activity = case(
+        (last_scores.c.last_scored_at > UserStreak.last_activity_date, last_scores.c.last_scored_at),
+        else_=UserStreak.last_activity_date
+    )
+    rows = db.execute(
+        select(
+            UserStreak.id, UserStreak.user_id, UserStreak.current_streak, UserStreak.longest_streak,
+            UserStreak.last_activity_date, current.label("expected_current"), longest.label("expected_longest"),
+            last_activity.label("expected_last_activity")
+        ).join(computed, computed.c.user_id == UserStreak.user_id).outerjoin(
+            last_scores, last_scores.c.user_id == UserStreak.user_id
+        ).where(or_(
+            UserStreak.current_streak.is_(None),
+            UserStreak.longest_streak.is_(None),
+            UserStreak.current_streak != current,
+            UserStreak.longest_streak != longest,
+            UserStreak.last_activity_date != last_activity
+        ))
+    ).all()
+
+    drift = []
+    for row in rows:
+        for field, stored, expected in (
+            ("current_streak", row.current_streak, row.expected_current),
+            ("longest_streak", row.longest_streak, row.expected_longest),
+            ("last_activity_date", row.last_activity_date, row.expected_last_activity),
+        ):
+            if stored != expected:
+                drift.append({"user_id": row.user_id, "field": field, "stored": stored, "expected": expected})
+    if check_only or not rows:
+        return drift
+
+    now = datetime.utcnow()
+    db.execute(update(UserStreak), [{
+        "id": row.id,
+        "current_streak": row.expected_current,
+        "longest_streak": row.expected_longest,
+        "last_activity_date": row.expected_last_activity,
+        "updated_at": now
+    } for row in rows])
+    for row in rows:
+        queue_leaderboard_update(db, row.user_id, current_streak=row.expected_current)
+    queue_snapshot_write(db, len(rows))
+    db.commit()
+    return drift
+
 # Badge CRUD operations
 def create_badge(db: Session, user_id: int, badge: BadgeCreate) -> UserBadge:
     db_badge = UserBadge(
@@ -222,9 +371,10 @@ def create_badge(db: Session, user_id: int, badge: BadgeCreate) -> UserBadge:
         badge_name=badge.badge_name,
         badge_description=badge.badge_description
     )
+    stats = get_or_create_user_stats_rollup(db, user_id)
+    stats.badges_count += 1
     db.add(db_badge)
     db.commit()
-    db.refresh(db_badge)
     return db_badge
 
 def get_user_badges(db: Session, user_id: int) -> List[UserBadge]:
@@ -250,9 +400,10 @@ def create_game_session(db: Session, user_id: int, session: GameSessionCreate) -
         difficulty=session.difficulty,
         session_data=session.session_data or {}
     )
+    stats = get_or_create_user_stats_rollup(db, user_id)
+    stats.games_played += 1
     db.add(db_session)
     db.commit()
-    db.refresh(db_session)
     return db_session
 
 def update_game_session(db: Session, session_id: str, session_update: GameSessionUpdate) -> Optional[GameSession]:
@@ -260,61 +411,512 @@ def update_game_session(db: Session, session_id: str, session_update: GameSessio
     if not db_session:
         return None
     
+    old_rounds_won = db_session.rounds_won or 0
+    old_rounds_played = db_session.rounds_played or 0
     update_data = session_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_session, field, value)
     
+    # Session rounds are absolute values, so apply the difference to the rollup
+    stats = get_or_create_user_stats_rollup(db, db_session.user_id)
+    stats.total_rounds_won += (db_session.rounds_won or 0) - old_rounds_won
+    stats.total_rounds_played += (db_session.rounds_played or 0) - old_rounds_played
+    
     db.commit()
-    db.refresh(db_session)
     return db_session
 
+def update_game_sessions(db: Session, session_updates: List[Tuple[str, GameSessionUpdate]]) -> List[Optional[int]]:
+    """Apply (session_id, update) pairs in order in one transaction; returns the updated sessions' ids, None where not found"""
+    sessions = {
+        db_session.session_id: db_session
+        for db_session in db.query(GameSession).filter(
+            GameSession.session_id.in_({session_id for session_id, _ in session_updates})
+        )
+    }
+    rounds: Dict[int, List[int]] = {}  # user_id -> [rounds won, rounds played] deltas
+    updated = []
+    for session_id, session_update in session_updates:
+        db_session = sessions.get(session_id)
+        updated.append(db_session.id if db_session else None)
+        if not db_session:
+            continue
+        old_rounds_won = db_session.rounds_won or 0
+        old_rounds_played = db_session.rounds_played or 0
+        for field, value in session_update.dict(exclude_unset=True).items():
+            setattr(db_session, field, value)
+        deltas = rounds.setdefault(db_session.user_id, [0, 0])
+        deltas[0] += (db_session.rounds_won or 0) - old_rounds_won
+        deltas[1] += (db_session.rounds_played or 0) - old_rounds_played
+    
+    rollups = get_user_stats_rollups(db, list(rounds))
+    for user_id, (rounds_won, rounds_played) in rounds.items():
+        stats = rollups[user_id]
+        stats.total_rounds_won += rounds_won
+        stats.total_rounds_played += rounds_played
+    
+    db.commit()
+    return updated
+
 def get_game_session(db: Session, session_id: str) -> Optional[GameSession]:
     return db.query(GameSession).filter(GameSession.session_id == session_id).first()
 
 # User Stats operations
+ROLLUP_FIELDS = (
+    "total_score", "highest_score", "scores_count", "games_played",
+    "total_rounds_won", "total_rounds_played", "badges_count", "language_counts"
+)
+
+def compute_user_stats_rollups(db: Session, user_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """Recompute stats rollup values from the raw score, session and badge tables"""
+    def scoped(query, column):
+        return query.filter(column.in_(user_ids)) if user_ids is not None else query
+
+    users_query = scoped(db.query(User.id), User.id)
+    rollups = {
+        user_id: {
+            "total_score": 0, "highest_score": 0, "scores_count": 0, "games_played": 0,
+            "total_rounds_won": 0, "total_rounds_played": 0, "badges_count": 0, "language_counts": {}
+        }
+        for (user_id,) in users_query.all()
+    }
+
+    score_rows = scoped(db.query(
+        UserScore.user_id,
+        func.sum(UserScore.score),
+        func.max(UserScore.score),
+        func.count(UserScore.id)
+    ), UserScore.user_id).group_by(UserScore.user_id).all()
+    for user_id, total, highest, count in score_rows:
+        if user_id in rollups:
+            rollups[user_id].update(total_score=total or 0, highest_score=highest or 0, scores_count=count)
+
+    # Ordered by last play so language_counts keeps the most recent language last
+    language_rows = scoped(db.query(
+        UserScore.user_id,
+        UserScore.language,
+        func.count(UserScore.id)
+    ), UserScore.user_id).group_by(UserScore.user_id, UserScore.language).order_by(
+        UserScore.user_id, func.max(UserScore.created_at), UserScore.language
+    ).all()
+    for user_id, language, count in language_rows:
+        if user_id in rollups:
+            rollups[user_id]["language_counts"][language] = count
+
+    session_rows = scoped(db.query(
+        GameSession.user_id,
+        func.count(GameSession.id),
+        func.coalesce(func.sum(GameSession.rounds_won), 0),
+        func.coalesce(func.sum(GameSession.rounds_played), 0)
+    ), GameSession.user_id).group_by(GameSession.user_id).all()
+    for user_id, count, rounds_won, rounds_played in session_rows:
+        if user_id in rollups:
+            rollups[user_id].update(games_played=count, total_rounds_won=rounds_won, total_rounds_played=rounds_played)
+
+    badge_rows = scoped(db.query(
+        UserBadge.user_id,
+        func.count(UserBadge.id)
+    ).filter(UserBadge.is_active == True), UserBadge.user_id).group_by(UserBadge.user_id).all()
+    for user_id, count in badge_rows:
+        if user_id in rollups:
+            rollups[user_id]["badges_count"] = count
+
+    return rollups
+
+def get_or_create_user_stats_rollup(db: Session, user_id: int) -> UserStatsRollup:
+    """Get the stats rollup row for update, backfilling it from raw tables if missing"""
+    stats = db.query(UserStatsRollup).filter(
+        UserStatsRollup.user_id == user_id
+    ).with_for_update().first()
+    if not stats:
+        values = compute_user_stats_rollups(db, [user_id]).get(user_id, {})
+        stats = UserStatsRollup(user_id=user_id, **values)
+        for field in ROLLUP_FIELDS:
+            if getattr(stats, field) is None:
+                setattr(stats, field, {} if field == "language_counts" else 0)
+        db.add(stats)
+    return stats
+
+def get_user_stats_rollups(db: Session, user_ids: List[int]) -> Dict[int, UserStatsRollup]:
+    """get_or_create_user_stats_rollup for many users, loading the existing rows in one query"""
+    rollups = {
+        stats.user_id: stats
+        for stats in db.query(UserStatsRollup).filter(UserStatsRollup.user_id.in_(user_ids)).with_for_update()
+    }
+    for user_id in user_ids:
+        if user_id not in rollups:
+            rollups[user_id] = get_or_create_user_stats_rollup(db, user_id)
+    return rollups
+
+def record_score_stats(db: Session, user_id: int, score: int, language: str) -> UserStatsRollup:
+    """Apply a new score to the user's stats rollup and leaderboard rank (caller commits)"""
+    return record_scores_stats(db, user_id, [(score, language)])
+
+def record_scores_stats(db: Session, user_id: int, scores: List[Tuple[int, str]],
+                        stats: Optional[UserStatsRollup] = None) -> UserStatsRollup:
+    """Apply new (score, language) pairs, oldest first, to the user's stats rollup and leaderboard rank (caller commits).
+
+    stats is the user's rollup if the caller already loaded it for update.
+    """
+    stats = stats or get_or_create_user_stats_rollup(db, user_id)
+    language_counts = dict(stats.language_counts or {})
+    for score, language in scores:
+        stats.total_score += score
+        stats.highest_score = max(stats.highest_score, score)
+        stats.scores_count += 1
+        # Re-insert the language so the most recently played one is always last
+        language_counts[language] = language_counts.pop(language, 0) + 1
+    stats.language_counts = language_counts
+    queue_score_update(db, user_id, stats.total_score, stats.scores_count)
+    queue_snapshot_write(db, len(scores))
+    return stats
+
+def get_favorite_language(language_counts: Dict[str, int]) -> str:
+    """Most played language, ties going to the most recently played"""
+    favorite_language = "twi"
+    best_count = 0
+    for language, count in reversed(list(language_counts.items())):
+        if count > best_count:
+            favorite_language, best_count = language, count
+    return favorite_language
+
+def rebuild_user_stats(db: Session, check_only: bool = False) -> List[Dict[str, Any]]:
+    """Recompute every stats rollup from the raw tables.
+
+    Returns the drift found between stored and recomputed values. Unless
+    check_only is set, the rollup table is rewritten to the recomputed values.
+    """
+    expected = compute_user_stats_rollups(db)
+    stored = {stats.user_id: stats for stats in db.query(UserStatsRollup).all()}
+
+    drift = []
+    for user_id, values in expected.items():
+        stats = stored.get(user_id)
+        for field in ROLLUP_FIELDS:
+            stored_value = getattr(stats, field) if stats else None
+            if stored_value != values[field]:
+                drift.append({"user_id": user_id, "field": field, "stored": stored_value, "expected": values[field]})
+        if not check_only:
+            if stats:
+                for field, value in values.items():
+                    setattr(stats, field, value)
+            else:
+                db.add(UserStatsRollup(user_id=user_id, **values))
+
+    if not check_only:
+        db.commit()
+    return drift
+
 def get_user_stats(db: Session, user_id: int) -> Dict[str, Any]:
-    """Get comprehensive user statistics"""
-    user = get_user_by_id(db, user_id)
-    if not user:
-        return {}
-    
-    # Get scores
-    scores = get_user_scores(db, user_id)
-    total_score = sum(score.score for score in scores)
-    highest_score = max((score.score for score in scores), default=0)
+    """Get comprehensive user statistics from the stats rollup"""
+    stats = db.get(UserStatsRollup, user_id)
+    if not stats:
+        if not get_user_by_id(db, user_id):
+            return {}
+        stats = get_or_create_user_stats_rollup(db, user_id)
+        db.commit()
     
     # Get streak
     streak = get_user_streak(db, user_id)
     current_streak = streak.current_streak if streak else 0
     longest_streak = streak.longest_streak if streak else 0
     
-    # Get badges
-    badges = get_user_badges(db, user_id)
-    badges_count = len(badges)
-    
-    # Get favorite language
-    language_counts = {}
-    for score in scores:
-        language_counts[score.language] = language_counts.get(score.language, 0) + 1
-    
-    favorite_language = max(language_counts.items(), key=lambda x: x[1])[0] if language_counts else "twi"
-    
-    # Get game sessions
-    sessions = db.query(GameSession).filter(GameSession.user_id == user_id).all()
-    games_played = len(sessions)
-    total_rounds_won = sum(session.rounds_won for session in sessions)
-    total_rounds_played = sum(session.rounds_played for session in sessions)
+    total_rounds_won = stats.total_rounds_won
+    total_rounds_played = stats.total_rounds_played
     win_rate = (total_rounds_won / total_rounds_played * 100) if total_rounds_played > 0 else 0
     
     return {
-        "total_score": total_score,
-        "highest_score": highest_score,
-        "games_played": games_played,
+        "total_score": stats.total_score,
+        "highest_score": stats.highest_score,
+        "games_played": stats.games_played,
         "current_streak": current_streak,
         "longest_streak": longest_streak,
-        "badges_count": badges_count,
-        "favorite_language": favorite_language,
+        "badges_count": stats.badges_count,
+        "favorite_language": get_favorite_language(stats.language_counts or {}),
         "total_rounds_won": total_rounds_won,
         "total_rounds_played": total_rounds_played,
         "win_rate": round(win_rate, 2)
-    } 
\ No newline at end of file
+    }
+
+# Language XP operations
+def upsert_statement(db: Session, model):
+    """INSERT statement supporting ON CONFLICT for the session's database"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+def record_language_xp(db: Session, user_id: int, language: str, xp: int, scored_at: Optional[datetime] = None):
+    """Atomically add a score to the user's language XP counter and the language totals (caller commits)"""
+    scored_at = scored_at or datetime.utcnow()
+    counter = upsert_statement(db, UserLanguageXP).values(
+        user_id=user_id, language=language, xp=xp, scores_count=1, last_scored_at=scored_at
+    )
+    new_xp = db.execute(counter.on_conflict_do_update(
+        index_elements=[UserLanguageXP.user_id, UserLanguageXP.language],
+        set_={
+            "xp": UserLanguageXP.xp + counter.excluded.xp,
+            "scores_count": UserLanguageXP.scores_count + 1,
+            "last_scored_at": counter.excluded.last_scored_at
+        }
+    ).returning(UserLanguageXP.xp)).scalar_one()
+    
+    # Club totals only count members, i.e. users with positive XP in the language
+    old_xp = new_xp - xp
+    totals = upsert_statement(db, LanguageTotal).values(
+        language=language,
+        total_xp=max(new_xp, 0) - max(old_xp, 0),
+        member_count=int(new_xp > 0) - int(old_xp > 0),
+        updated_at=scored_at
+    )
+    db.execute(totals.on_conflict_do_update(
+        index_elements=[LanguageTotal.language],
+        set_={
+            "total_xp": LanguageTotal.total_xp + totals.excluded.total_xp,
+            "member_count": LanguageTotal.member_count + totals.excluded.member_count,
+            "updated_at": totals.excluded.updated_at
+        }
+    ))
+
+LANGUAGE_XP_UPSERT = text(
+    "INSERT INTO user_language_xp (user_id, language, xp, scores_count, last_scored_at) "
+    "VALUES (:user_id, :language, :xp, :scores_count, :scored_at) "
+    "ON CONFLICT (user_id, language) DO UPDATE SET "
+    "xp = user_language_xp.xp + excluded.xp, "
+    "scores_count = user_language_xp.scores_count + excluded.scores_count, "
+    "last_scored_at = excluded.last_scored_at"
+).bindparams(bindparam("scored_at", type_=DateTime))
+
+LANGUAGE_TOTAL_UPSERT = text(
+    "INSERT INTO language_totals (language, total_xp, member_count, updated_at) "
+    "VALUES (:language, :total_xp, :member_count, :updated_at) "
+    "ON CONFLICT (language) DO UPDATE SET "
+    "total_xp = language_totals.total_xp + excluded.total_xp, "
+    "member_count = language_totals.member_count + excluded.member_count, "
+    "updated_at = excluded.updated_at"
+).bindparams(bindparam("updated_at", type_=DateTime))
+
+def record_language_xp_many(db: Session, counters: Dict[Tuple[int, str], Tuple[int, int]], scored_at: datetime):
+    """record_language_xp for many (user_id, language) -> (xp, scores_count) counters with executemany (caller commits).
+
+    The counters' previous XP is read up front to tell which users join or
+    leave a club, so call this after the transaction has taken its write lock.
+    """
+    old_xp = dict(((row.user_id, row.language), row.xp) for row in db.execute(
+        select(UserLanguageXP.user_id, UserLanguageXP.language, UserLanguageXP.xp)
+        .where(tuple_(UserLanguageXP.user_id, UserLanguageXP.language).in_(list(counters)))
+        .with_for_update()
+    ))
+    db.execute(LANGUAGE_XP_UPSERT, [
+        {"user_id": user_id, "language": language, "xp": xp, "scores_count": scores_count, "scored_at": scored_at}
+        for (user_id, language), (xp, scores_count) in counters.items()
+    ])
+    
+    totals: Dict[str, List[int]] = {}  # language -> [total_xp, member_count] deltas
+    for (user_id, language), (xp, _) in counters.items():
+        before = old_xp.get((user_id, language), 0)
+        deltas = totals.setdefault(language, [0, 0])
+        deltas[0] += max(before + xp, 0) - max(before, 0)
+        deltas[1] += int(before + xp > 0) - int(before > 0)
+    db.execute(LANGUAGE_TOTAL_UPSERT, [
+        {"language": language, "total_xp": total_xp, "member_count": member_count, "updated_at": scored_at}
+        for language, (total_xp, member_count) in totals.items()
+    ])
+
+def rebuild_language_xp(db: Session) -> Dict[str, int]:
+    """Recompute user_language_xp and language_totals from user_scores with bulk INSERT ... SELECT"""
+    db.execute(delete(UserLanguageXP))
+    db.execute(delete(LanguageTotal))
+    db.execute(insert(UserLanguageXP).from_select(
+        ["user_id", "language", "xp", "scores_count", "last_scored_at"],
+        select(
+            UserScore.user_id,
+            UserScore.language,
+            func.sum(UserScore.score),
+            func.count(UserScore.id),
+            func.max(UserScore.created_at)
+        ).group_by(UserScore.user_id, UserScore.language)
+    ))
+    db.execute(insert(LanguageTotal).from_select(
+        ["language", "total_xp", "member_count", "updated_at"],
+        select(
+            UserLanguageXP.language,
+            func.sum(case((UserLanguageXP.xp > 0, UserLanguageXP.xp), else_=0)),
+            func.sum(case((UserLanguageXP.xp > 0, 1), else_=0)),
+            literal(datetime.utcnow())
+        ).group_by(UserLanguageXP.language)
+    ))
+    db.commit()
+    return {
+        "counters": db.query(func.count()).select_from(UserLanguageXP).scalar(),
+        "languages": db.query(func.count()).select_from(LanguageTotal).scalar()
+    }
+
+# Windowed leaderboards
+LEADERBOARD_WINDOWS = {'daily': 1, 'weekly': 7, 'monthly': 30}  # window -> days, today (UTC) included
+DAILY_SCORE_RETENTION_DAYS = max(LEADERBOARD_WINDOWS.values())
+_last_daily_score_prune = (None, None)  # (bind, day) of the last committed roll-off
+_daily_score_prune_lock = threading.Lock()
+
+def window_start(window: str, today: Optional[date] = None) -> date:
+    """First day of a leaderboard window ending today"""
+    today = today or datetime.utcnow().date()
+    return today - timedelta(days=LEADERBOARD_WINDOWS[window] - 1)
+
+# Built once as text: SQLAlchemy does not cache dialect INSERT ... ON CONFLICT constructs and recompiles them on every call
+DAILY_SCORE_UPSERT = text(
+    "INSERT INTO user_daily_scores (day, user_id, language, score, highest_score, scores_count) "
+    "VALUES (:day, :user_id, :language, :score, :highest_score, :scores_count) "
+    "ON CONFLICT (day, user_id, language) DO UPDATE SET "
+    "score = user_daily_scores.score + excluded.score, "
+    "highest_score = CASE WHEN excluded.highest_score > user_daily_scores.highest_score "
+    "THEN excluded.highest_score ELSE user_daily_scores.highest_score END, "
+    "scores_count = user_daily_scores.scores_count + excluded.scores_count"
+).bindparams(bindparam("day", type_=Date))
+
+def record_daily_score(db: Session, user_id: int, language: str, score: int, scored_at: Optional[datetime] = None):
+    """Atomically add a score to the user's bucket for the language and day (caller commits)"""
+    record_daily_buckets(db, [{
+        "day": (scored_at or datetime.utcnow()).date(), "user_id": user_id, "language": language,
+        "score": score, "highest_score": score, "scores_count": 1
+    }])
+
+def record_daily_buckets(db: Session, buckets: List[Dict[str, Any]]):
+    """Atomically add pre-aggregated buckets (day, user_id, language, score, highest_score, scores_count)
+    to the stored ones with one executemany (caller commits).
+
+    The first write of each day also rolls off buckets that no window reaches any more.
+    """
+    db.execute(DAILY_SCORE_UPSERT, buckets)
+    day = max(bucket["day"] for bucket in buckets)
+    bind = db.get_bind()
+    with _daily_score_prune_lock:
+        pruned = _last_daily_score_prune == (bind, day)
+    if not pruned:
+        # Concurrent requests may both prune on a new day; the DELETE is idempotent
+        prune_daily_scores(db, day)
+        db.info["daily_score_prune"] = (bind, day)
+
+@event.listens_for(Session, "after_commit")
+def mark_daily_scores_pruned(session):
+    """The roll-off only counts as done once its transaction commits"""
+    global _last_daily_score_prune
+    pruned = session.info.pop("daily_score_prune", None)
+    if pruned is not None:
+        with _daily_score_prune_lock:
+            _last_daily_score_prune = pruned
+
+@event.listens_for(Session, "after_rollback")
+def discard_daily_score_prune(session):
+    session.info.pop("daily_score_prune", None)
+
+def prune_daily_scores(db: Session, today: Optional[date] = None) -> int:
+    """Delete buckets older than the longest window (caller commits); returns the number deleted"""
+    cutoff = (today or datetime.utcnow().date()) - timedelta(days=DAILY_SCORE_RETENTION_DAYS - 1)
+    return db.execute(delete(UserDailyScore).where(UserDailyScore.day < cutoff)).rowcount
+
+def rebuild_daily_scores(db: Session, today: Optional[date] = None) -> int:
+    """Recompute the buckets of the retained days from user_scores; returns the number of buckets"""
+    cutoff = (today or datetime.utcnow().date()) - timedelta(days=DAILY_SCORE_RETENTION_DAYS - 1)
+    day = func.date(UserScore.created_at)
+    db.execute(delete(UserDailyScore))
+    db.execute(insert(UserDailyScore).from_select(
+        ["user_id", "language", "day", "score", "highest_score", "scores_count"],
+        select(
+            UserScore.user_id,
+            UserScore.language,
+            day,
+            func.sum(UserScore.score),
+            func.max(UserScore.score),
+            func.count(UserScore.id)
+        ).where(UserScore.created_at >= datetime.combine(cutoff, datetime.min.time()))
+        .group_by(UserScore.user_id, UserScore.language, day)
+    ))
+    db.commit()
+    return db.query(func.count()).select_from(UserDailyScore).scalar()
+
+def _window_totals(window: str, language: Optional[str] = None, today: Optional[date] = None):
+    """Per-user totals over the buckets of a window, as a subquery"""
+    query = select(
+        UserDailyScore.user_id,
+        func.sum(UserDailyScore.score).label("total_score"),
+        func.max(UserDailyScore.highest_score).label("highest_score"),
+        func.sum(UserDailyScore.scores_count).label("games_played")
+    ).where(UserDailyScore.day >= window_start(window, today))
+    if language is not None:
+        query = query.where(UserDailyScore.language == language)
+    return query.group_by(UserDailyScore.user_id).subquery()
+
+def _windowed_query(db: Session, totals):
+    """Leaderboard rows for every player in the window totals; players without a rollup or streak row are kept"""
+    return db.query(
+        User.id,
+        User.nickname,
+        User.avatar,
+        totals.c.total_score,
+        totals.c.highest_score,
+        totals.c.games_played,
+        func.coalesce(UserStatsRollup.badges_count, 0).label('badges_count'),
+        UserStatsRollup.language_counts,
+        func.coalesce(UserStreak.current_streak, 0).label('current_streak'),
+        func.coalesce(UserStreak.longest_streak, 0).label('longest_streak'),
+        User.last_login.label('last_activity')
+    ).join(totals, User.id == totals.c.user_id).outerjoin(
+        UserStatsRollup, User.id == UserStatsRollup.user_id
+    ).outerjoin(UserStreak, User.id == UserStreak.user_id)
+
+def _windowed_entry(row, rank: int, language: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "rank": rank,
+        "nickname": row.nickname,
+        "avatar": row.avatar,
+        "total_score": row.total_score,
+        "highest_score": row.highest_score,
+        "games_played": row.games_played,
+        "current_streak": row.current_streak,
+        "longest_streak": row.longest_streak,
+        "last_activity": row.last_activity,
+        "badges_count": row.badges_count,
+        "favorite_language": language or get_favorite_language(row.language_counts or {}),
+        "level": min(10, max(1, (row.current_streak // 3) + 1))
+    }
+
+def get_windowed_leaderboard(db: Session, window: str, limit: int = 100, offset: int = 0, sort_by: str = 'score',
+                             sort_dir: str = 'desc', language: Optional[str] = None,
+                             today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Leaderboard over the last daily/weekly/monthly window, optionally for one language.
+
+    Scores, highest score and games played only count the window's daily
+    buckets, so a page reads at most users x days-in-window bucket rows.
+    Players without scores in the window are not listed.
+    """
+    totals = _window_totals(window, language, today)
+    sort_columns = (
+        totals.c.total_score if sort_by == 'score' else func.coalesce(UserStreak.current_streak, 0), User.id
+    )
+    query = _windowed_query(db, totals)
+    if sort_dir == 'asc':
+        query = query.order_by(*(column.asc() for column in sort_columns))
+    else:
+        query = query.order_by(*(column.desc() for column in sort_columns))
+    return [
+        _windowed_entry(row, offset + idx + 1, language)
+        for idx, row in enumerate(query.offset(offset).limit(limit).all())
+    ]
+
+def get_windowed_rank(db: Session, window: str, user_id: int, today: Optional[date] = None) -> Optional[Dict[str, int]]:
+    """A player's rank by score in a window and the number of players ranked in it, or None if they did not score"""
+    totals = _window_totals(window, today=today)
+    mine = db.query(totals.c.total_score).filter(totals.c.user_id == user_id).scalar()
+    if mine is None:
+        return None
+    ahead = db.query(func.count()).select_from(totals).filter(or_(
+        totals.c.total_score > mine,
+        and_(totals.c.total_score == mine, totals.c.user_id > user_id)
+    )).scalar()
+    return {"rank": ahead + 1, "total_players": db.query(func.count()).select_from(totals).scalar()}
+
+def get_windowed_entry(db: Session, window: str, user_id: int, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """A player's windowed leaderboard entry with their rank and total_players, or None if they did not score"""
+    ranking = get_windowed_rank(db, window, user_id, today)
+    if ranking is None:
+        return None
+    row = _windowed_query(db, _window_totals(window, today=today)).filter(User.id == user_id).one()
+    return {**_windowed_entry(row, ranking["rank"]), "total_players": ranking["total_players"]}
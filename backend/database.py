@@ -1,20 +1,122 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import create_engine, event, insert, Column, Integer, String, Date, DateTime, Float, Text, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from datetime import datetime
 import os
 
-# Database URL
-DATABASE_URL = "sqlite:///./linguaquest.db"
+# Database URL (render.yaml and other deployments set DATABASE_URL)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./linguaquest.db")
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+# SQLite tuning, applied to every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # Readers no longer block behind the writer
+    "synchronous": "NORMAL",  # Safe with WAL; fsync at checkpoints instead of every commit
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),  # Wait for the write lock instead of failing
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024)),  # Negative values are KiB
+}
+
+# Connection pool settings for server databases such as PostgreSQL
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+# Async drivers used by the async session layer, keyed by the backend of DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def set_sqlite_pragmas(db_engine, pragmas: dict):
+    """Apply pragmas to every new SQLite connection of db_engine"""
+    @event.listens_for(db_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def server_pool_settings(engine_kwargs: dict) -> dict:
+    """DB_POOL_* settings for server databases, overridable by engine_kwargs"""
+    pool_settings = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    pool_settings.update(engine_kwargs)
+    return pool_settings
+
+def create_db_engine(database_url: str = DATABASE_URL, sqlite_pragmas: dict = None, **engine_kwargs):
+    """Create an engine for database_url.
+
+    SQLite connections get SQLITE_PRAGMAS (or sqlite_pragmas) applied on
+    connect; other backends get the DB_POOL_* pool settings. Extra keyword
+    arguments are passed through to create_engine.
+    """
+    if database_url.startswith("sqlite"):
+        pragmas = SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas
+        connect_args = {"check_same_thread": False}  # Needed for SQLite
+        if "busy_timeout" in pragmas:
+            connect_args["timeout"] = pragmas["busy_timeout"] / 1000
+        db_engine = create_engine(database_url, connect_args=connect_args, **engine_kwargs)
+        set_sqlite_pragmas(db_engine, pragmas)
+        return db_engine
+
+    return create_engine(database_url, **server_pool_settings(engine_kwargs))
+
+def get_async_database_url(database_url: str = DATABASE_URL) -> str:
+    """Swap the driver of database_url for its async equivalent"""
+    scheme, separator, location = database_url.partition("://")
+    backend = scheme.split("+")[0]
+    return f"{ASYNC_DRIVERS.get(backend, scheme)}{separator}{location}"
+
+def create_async_db_engine(database_url: str = DATABASE_URL, sqlite_pragmas: dict = None, **engine_kwargs):
+    """Async counterpart of create_db_engine (aiosqlite for SQLite, asyncpg for PostgreSQL)"""
+    async_url = get_async_database_url(database_url)
+    if async_url.startswith("sqlite"):
+        pragmas = SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas
+        connect_args = {}
+        if "busy_timeout" in pragmas:
+            connect_args["timeout"] = pragmas["busy_timeout"] / 1000
+        db_engine = create_async_engine(async_url, connect_args=connect_args, **engine_kwargs)
+        set_sqlite_pragmas(db_engine.sync_engine, pragmas)
+        return db_engine
+
+    return create_async_engine(async_url, **server_pool_settings(engine_kwargs))
+
+# Create engines
+engine = create_db_engine()
+async_engine = create_async_db_engine()
+
+class UnitOfWorkSession(Session):
+    """Session whose commit() only flushes; its owner commits the whole unit once with commit_unit().
+
+    This lets crud functions, which commit after every write, be composed into
+    a single transaction per request.
+    """
+
+    def commit(self):
+        self.flush()
+        self.info["uncommitted"] = True
+
+    def commit_unit(self):
+        super().commit()
+        self.info["uncommitted"] = False
+
+    def has_uncommitted_work(self) -> bool:
+        return bool(self.info.get("uncommitted") or self.new or self.dirty or self.deleted)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Request sessions: one commit per request; objects stay loaded after it so responses need no reload
+RequestSessionLocal = sessionmaker(class_=UnitOfWorkSession, autoflush=False, expire_on_commit=False, bind=engine)
+# Objects stay usable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Create Base class
 Base = declarative_base()
@@ -37,10 +139,12 @@ class User(Base):
     scores = relationship("UserScore", back_populates="user")
     streaks = relationship("UserStreak", back_populates="user")
     badges = relationship("UserBadge", back_populates="user")
-    progression_stages = relationship("UserProgressionStage", back_populates="user")
 
 class UserActivity(Base):
     __tablename__ = "user_activities"
+    __table_args__ = (
+        Index("ix_user_activities_user_id_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -53,6 +157,11 @@ class UserActivity(Base):
 
 class UserScore(Base):
     __tablename__ = "user_scores"
+    __table_args__ = (
+        Index("ix_user_scores_user_id_created_at", "user_id", "created_at"),
+        Index("ix_user_scores_user_id_score", "user_id", "score"),
+        Index("ix_user_scores_language_user_id", "language", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -68,6 +177,10 @@ class UserScore(Base):
 
 class UserStreak(Base):
     __tablename__ = "user_streaks"
+    __table_args__ = (
+        Index("ix_user_streaks_user_id", "user_id"),
+        Index("ix_user_streaks_current_streak_user_id", "current_streak", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -81,6 +194,9 @@ class UserStreak(Base):
 
 class UserBadge(Base):
     __tablename__ = "user_badges"
+    __table_args__ = (
+        Index("ix_user_badges_user_id_is_active_earned_at", "user_id", "is_active", "earned_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -93,24 +209,20 @@ class UserBadge(Base):
     # Relationships
     user = relationship("User", back_populates="badges")
 
-class UserProgressionStage(Base):
-    __tablename__ = "user_progression_stages"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    stage_id = Column(String, nullable=False)  # Unique identifier for the stage
-    stage_type = Column(String, nullable=False)  # 'main' or 'sub'
-    label = Column(String, nullable=False)
-    unlocked = Column(Boolean, default=False)
-    parent_stage_id = Column(String, nullable=True)  # For sub-stages, references parent stage_id
-    created_at = Column(DateTime, default=datetime.utcnow)
+class UserProgression(Base):
+    """A user's unlocked progression stages as one bitmask over progression_catalog's stage bits"""
+    __tablename__ = "user_progression"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unlocked_stages = Column(Integer, default=0, nullable=False)
+    catalog_version = Column(Integer, default=1, nullable=False)  # progression_catalog.CATALOG_VERSION when last written
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relationships
-    user = relationship("User", back_populates="progression_stages")
 
 class GameSession(Base):
     __tablename__ = "game_sessions"
+    __table_args__ = (
+        Index("ix_game_sessions_user_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True, nullable=False)
@@ -125,15 +237,100 @@ class GameSession(Base):
     difficulty = Column(String, nullable=True)
     session_data = Column(JSON, default={})  # Store session-specific data
 
+class UserStatsRollup(Base):
+    """Per-user aggregates maintained on write so stats reads are a single lookup"""
+    __tablename__ = "user_stats"
+    __table_args__ = (
+        Index("ix_user_stats_total_score_user_id", "total_score", "user_id"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_score = Column(Integer, default=0, nullable=False)
+    highest_score = Column(Integer, default=0, nullable=False)
+    scores_count = Column(Integer, default=0, nullable=False)
+    games_played = Column(Integer, default=0, nullable=False)  # Number of game sessions
+    total_rounds_won = Column(Integer, default=0, nullable=False)
+    total_rounds_played = Column(Integer, default=0, nullable=False)
+    badges_count = Column(Integer, default=0, nullable=False)  # Active badges only
+    language_counts = Column(JSON, default={})  # Scores per language, least recently played first
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class UserLanguageXP(Base):
+    """Per-user XP and score count per language, upserted on every score write"""
+    __tablename__ = "user_language_xp"
+    __table_args__ = (
+        Index("ix_user_language_xp_language_xp", "language", "xp"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    language = Column(String, primary_key=True)
+    xp = Column(Integer, default=0, nullable=False)
+    scores_count = Column(Integer, default=0, nullable=False)
+    last_scored_at = Column(DateTime, nullable=True)
+
+class UserDailyScore(Base):
+    """Per-user score bucket per language and UTC day, upserted on every score write.
+
+    Windowed leaderboards sum the buckets of the days in the window, a range
+    read on the day-first primary key; buckets older than the longest window
+    are pruned.
+    """
+    __tablename__ = "user_daily_scores"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    language = Column(String, primary_key=True)
+    score = Column(Integer, default=0, nullable=False)
+    highest_score = Column(Integer, default=0, nullable=False)
+    scores_count = Column(Integer, default=0, nullable=False)
+
+class LanguageTotal(Base):
+    """Per-language XP totals for language clubs, maintained alongside user_language_xp"""
+    __tablename__ = "language_totals"
+
+    language = Column(String, primary_key=True)
+    total_xp = Column(Integer, default=0, nullable=False)
+    member_count = Column(Integer, default=0, nullable=False)  # Users with positive XP in the language
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # Database utilities
 def get_db():
-    """Get database session"""
-    db = SessionLocal()
+    """Get request-scoped database session, committed once when the request completes.
+
+    The session only checks out a connection on its first query, so requests
+    that never touch the database never hold one.
+    """
+    db = RequestSessionLocal()
     try:
         yield db
+        commit_unit(db)
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
+def commit_unit(db: Session):
+    """Commit a request session's unit of work if it wrote anything (a plain commit for other sessions)"""
+    if isinstance(db, UnitOfWorkSession):
+        if db.has_uncommitted_work():
+            db.commit_unit()
+    else:
+        db.commit()
+
+def insert_rows(db: Session, model, rows: list) -> list:
+    """Insert rows (dicts) with one multi-row INSERT ... RETURNING; returns their new ids in row order"""
+    # A Core insert on the table: the ORM bulk path splits rows into one INSERT per set of non-NULL keys.
+    # sort_by_parameter_order would fall back to one INSERT per row on SQLite; ids of a single
+    # multi-row INSERT are assigned in VALUES order, so sorting them restores the row order
+    table = model.__table__
+    return sorted(db.execute(insert(table).returning(table.c.id), rows).scalars().all())
+
+async def get_async_db():
+    """Get async database session (for async def endpoints)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
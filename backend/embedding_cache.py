@@ -0,0 +1,90 @@
+"""
+Bounded LRU cache of sentence embeddings.
+
+Every player in a game argues against the same topic, so ArgumentEvaluator
+used to embed that topic again for every argument. EmbeddingCache keys
+embeddings by normalized text, encodes all of a call's uncached texts in
+one encoder call, and keeps the EMBEDDING_CACHE_SIZE most recently used.
+Topics are pinned: they live outside the LRU and are never evicted, up to
+EMBEDDING_CACHE_PINNED_SIZE of them.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Sequence
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 4096))
+EMBEDDING_CACHE_PINNED_SIZE = int(os.getenv("EMBEDDING_CACHE_PINNED_SIZE", 256))
+
+
+def normalize_text(text: str) -> str:
+    """Cache key: lowercased with whitespace collapsed (the MiniLM tokenizer is uncased and ignores spacing)"""
+    return " ".join(text.split()).lower()
+
+
+class EmbeddingCache:
+    """Embeddings by normalized text; encode takes a list of texts and returns their embeddings in order"""
+
+    def __init__(self, encode: Callable[[List[str]], Sequence[Any]], max_size: int = EMBEDDING_CACHE_SIZE,
+                 max_pinned: int = EMBEDDING_CACHE_PINNED_SIZE):
+        self.encode = encode
+        self.max_size = max_size
+        self.max_pinned = max_pinned
+        self.stats = {"hits": 0, "misses": 0, "encode_calls": 0}
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._pinned: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pinned)
+
+    def embed(self, texts: Sequence[str], pinned: Sequence[str] = ()) -> List[Any]:
+        """Embeddings of texts, encoding the uncached ones in a single call; texts also in pinned are never evicted"""
+        keys = [normalize_text(text) for text in texts]
+        pinned_keys = {normalize_text(text) for text in pinned}
+        found: Dict[str, Any] = {}
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                if key in self._pinned:
+                    found[key] = self._pinned[key]
+                elif key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                    if key in pinned_keys:
+                        self._pin(key, found[key])
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            self.stats["hits"] += len(keys) - len(missing)
+            self.stats["misses"] += len(missing)
+
+        if missing:
+            # Encode outside the lock; two threads missing the same text both encode it, which is harmless
+            vectors = self.encode(missing)
+            with self._lock:
+                self.stats["encode_calls"] += 1
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    if key in pinned_keys:
+                        self._pin(key, vector)
+                    else:
+                        self._entries[key] = vector
+                        self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return [found[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+    def _pin(self, key: str, vector: Any):
+        """Move key out of the LRU, or leave it there once max_pinned texts are pinned"""
+        if key in self._pinned or len(self._pinned) < self.max_pinned:
+            self._entries.pop(key, None)
+            self._pinned[key] = vector
+        else:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
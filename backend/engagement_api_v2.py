@@ -8,6 +8,7 @@ from crud import (
     increment_streak, reset_streak, create_badge, get_user_badges,
     check_badge_exists
 )
+from write_queue import run_write
 from datetime import datetime
 
 router = APIRouter()
@@ -66,7 +67,7 @@ def update_streak(nickname: str = Query(...), streak: int = Query(..., ge=0), db
         raise HTTPException(status_code=404, detail="User not found.")
     
     streak_update = StreakUpdate(current_streak=streak)
-    updated_streak = update_user_streak(db, user.id, streak_update)
+    updated_streak = run_write(db, update_user_streak, user.id, streak_update)
     
     if not updated_streak:
         raise HTTPException(status_code=404, detail="Streak record not found.")
@@ -80,7 +81,7 @@ def increment_user_streak(nickname: str = Query(...), db: Session = Depends(get_
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    updated_streak = increment_streak(db, user.id)
+    updated_streak = run_write(db, increment_streak, user.id)
     if not updated_streak:
         raise HTTPException(status_code=404, detail="Streak record not found.")
     
@@ -93,7 +94,7 @@ def reset_user_streak(nickname: str = Query(...), db: Session = Depends(get_db))
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    updated_streak = reset_streak(db, user.id)
+    updated_streak = run_write(db, reset_streak, user.id)
     if not updated_streak:
         raise HTTPException(status_code=404, detail="Streak record not found.")
     
@@ -124,7 +125,7 @@ def update_level(nickname: str = Query(...), level: int = Query(..., ge=1, le=10
     # Calculate required streak for level
     required_streak = (level - 1) * 3 + 1
     streak_update = StreakUpdate(current_streak=required_streak)
-    updated_streak = update_user_streak(db, user.id, streak_update)
+    updated_streak = run_write(db, update_user_streak, user.id, streak_update)
     
     if not updated_streak:
         raise HTTPException(status_code=404, detail="Streak record not found.")
@@ -158,7 +159,7 @@ def award_badge(nickname: str, badge_type: str = Query(...), badge_name: str = Q
         badge_description=badge_description
     )
     
-    db_badge = create_badge(db, user.id, badge)
+    db_badge = run_write(db, create_badge, user.id, badge)
     return {"message": "Badge awarded", "badge": {"type": db_badge.badge_type, "name": db_badge.badge_name}}
 
 @router.get('/quotes', response_model=List[str])
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
-from models import ScoreCreate, ScoreResponse, GameSessionCreate, GameSessionUpdate, GameSessionResponse, LeaderboardEntry
+from models import (
+    ScoreCreate, ScoreResponse, GameSessionCreate, GameSessionUpdate, GameSessionResponse,
+    LeaderboardEntry, RankedPlayer, PlayerRankResponse
+)
 from crud import (
     create_score, get_user_scores, get_user_highest_score, get_leaderboard,
+    get_windowed_entry, get_windowed_leaderboard,
     create_game_session, update_game_session, get_game_session,
     get_user_stats, get_user_by_nickname
 )
+from write_queue import run_write
+from leaderboard_index import get_leaderboard_index
+from leaderboard_snapshot import LEADERBOARD_SNAPSHOT, get_leaderboard_snapshot
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_time
 import uuid
 from datetime import datetime
 
@@ -20,17 +28,33 @@ def submit_score(score: ScoreCreate, nickname: str = Query(...), db: Session = D
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    db_score = create_score(db, user.id, score)
+    db_score = run_write(db, create_score, user.id, score)
     return db_score
 
 @router.get("/scores/{nickname}", response_model=List[ScoreResponse])
-def get_user_score_history(nickname: str, limit: int = Query(50, ge=1, le=100), db: Session = Depends(get_db)):
-    """Get user score history"""
+def get_user_score_history(
+    nickname: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get user score history, newest first. Pass the X-Next-Cursor header of a full page as cursor to get the next one."""
+    before = None
+    if cursor:
+        try:
+            payload = decode_cursor(cursor)
+            before = (parse_cursor_time(payload["created_at"]), int(payload["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    
     user = get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    scores = get_user_scores(db, user.id, limit)
+    scores = get_user_scores(db, user.id, limit, before)
+    if len(scores) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"created_at": scores[-1].created_at, "id": scores[-1].id})
     return scores
 
 @router.get("/scores/{nickname}/highest", response_model=ScoreResponse)
@@ -46,12 +70,18 @@ def get_user_best_score(nickname: str, db: Session = Depends(get_db)):
     
     return score
 
+WINDOW_QUERY = Query('all', pattern='^(all|daily|weekly|monthly)$')
+
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
 def get_leaderboard_data(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
     sort_by: str = Query('score', regex='^(score|streak|level)$'),
     sort_dir: str = Query('desc', regex='^(asc|desc)$'),
+    cursor: Optional[str] = Query(None),
+    window: str = WINDOW_QUERY,
+    language: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
     """
@@ -60,10 +90,88 @@ def get_leaderboard_data(
     - offset: number of entries to skip (for pagination)
     - sort_by: field to sort by ('score', 'streak', 'level')
     - sort_dir: sort direction ('asc' or 'desc')
+    - cursor: X-Next-Cursor header of the previous page; replaces offset and
+      stays stable while scores change between requests
+    - window: 'all' (default), or 'daily', 'weekly', 'monthly' to rank by the
+      scores of the last 1, 7 or 30 UTC days
+    - language: only count scores in this language (windowed boards only)
+    
+    Pages within the leaderboard snapshot are served pre-serialized from it.
+    Windowed boards are paged with offset only.
     """
-    leaderboard = get_leaderboard(db, limit=limit, offset=offset, sort_by=sort_by, sort_dir=sort_dir)
+    if window != 'all':
+        if cursor:
+            raise HTTPException(status_code=400, detail="Cursor pagination is only available for window=all.")
+        return get_windowed_leaderboard(db, window, limit=limit, offset=offset, sort_by=sort_by,
+                                        sort_dir=sort_dir, language=language)
+    if language:
+        raise HTTPException(status_code=400, detail="The language filter needs a daily, weekly or monthly window.")
+    
+    after = None
+    if cursor:
+        try:
+            payload = decode_cursor(cursor)
+            after = {"key": [int(value) for value in payload["key"]], "rank": int(payload["rank"])}
+            if payload["sort"] != [sort_by, sort_dir] or len(after["key"]) != 2:
+                raise ValueError("Cursor belongs to a different sort order")
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    
+    if LEADERBOARD_SNAPSHOT and after is None:
+        page = get_leaderboard_snapshot().get(db).page(sort_by, sort_dir, limit, offset)
+        if page is not None:
+            body, position = page
+            headers = {NEXT_CURSOR_HEADER: encode_cursor({"sort": [sort_by, sort_dir], **position})} if position else None
+            return Response(content=body, media_type="application/json", headers=headers)
+    
+    leaderboard = get_leaderboard(db, limit=limit, offset=offset, sort_by=sort_by, sort_dir=sort_dir, after=after)
+    if len(leaderboard) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"sort": [sort_by, sort_dir], **leaderboard[-1]["next"]})
     return leaderboard
 
+# Ranked leaderboard, served from the in-memory leaderboard index (windowed boards from the daily score buckets)
+@router.get("/leaderboard/top", response_model=List[RankedPlayer])
+def get_top_players(limit: int = Query(10, ge=1, le=500), offset: int = Query(0, ge=0),
+                    window: str = WINDOW_QUERY, db: Session = Depends(get_db)):
+    """Top players by total score, then streak, then level"""
+    if window != 'all':
+        return get_windowed_leaderboard(db, window, limit=limit, offset=offset)
+    return get_leaderboard_index().top(limit, offset)
+
+def get_windowed_player(db: Session, window: str, nickname: str):
+    """A player's windowed rank entry with total_players, or None if they did not score in the window"""
+    user = get_user_by_nickname(db, nickname)
+    return get_windowed_entry(db, window, user.id) if user else None
+
+@router.get("/leaderboard/rank/{nickname}", response_model=PlayerRankResponse)
+def get_player_rank(nickname: str, window: str = WINDOW_QUERY, db: Session = Depends(get_db)):
+    """A player's current rank"""
+    if window != 'all':
+        entry = get_windowed_player(db, window, nickname)
+        if not entry:
+            raise HTTPException(status_code=404, detail="Player not ranked.")
+        return entry
+    index = get_leaderboard_index()
+    entry = index.rank(nickname)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Player not ranked.")
+    return {**entry, "total_players": len(index)}
+
+@router.get("/leaderboard/around/{nickname}", response_model=List[RankedPlayer])
+def get_players_around(nickname: str, count: int = Query(5, ge=0, le=50),
+                       window: str = WINDOW_QUERY, db: Session = Depends(get_db)):
+    """A player with the count players ranked directly above and below them"""
+    if window != 'all':
+        entry = get_windowed_player(db, window, nickname)
+        if not entry:
+            raise HTTPException(status_code=404, detail="Player not ranked.")
+        start = max(0, entry["rank"] - 1 - count)
+        return get_windowed_leaderboard(db, window, limit=entry["rank"] - start + count, offset=start)
+    players = get_leaderboard_index().around(nickname, count)
+    if not players:
+        raise HTTPException(status_code=404, detail="Player not ranked.")
+    return players
+
 @router.post("/sessions", response_model=GameSessionResponse)
 def start_game_session(session: GameSessionCreate, nickname: str = Query(...), db: Session = Depends(get_db)):
     """Start a new game session"""
@@ -75,13 +183,13 @@ def start_game_session(session: GameSessionCreate, nickname: str = Query(...), d
     if not session.session_id:
         session.session_id = str(uuid.uuid4())
     
-    db_session = create_game_session(db, user.id, session)
+    db_session = run_write(db, create_game_session, user.id, session)
     return db_session
 
 @router.put("/sessions/{session_id}", response_model=GameSessionResponse)
 def end_game_session(session_id: str, session_update: GameSessionUpdate, db: Session = Depends(get_db)):
     """End a game session"""
-    db_session = update_game_session(db, session_id, session_update)
+    db_session = run_write(db, update_game_session, session_id, session_update)
     if not db_session:
         raise HTTPException(status_code=404, detail="Game session not found.")
     
@@ -0,0 +1,148 @@
+"""
+Dynamic micro-batching for model inference.
+
+Transformer models spend most of a batch-of-one forward pass on fixed
+overhead, so many small concurrent requests are far cheaper run together.
+InferenceBatcher hands requests from any number of threads (or asyncio
+tasks) to one worker thread, which collects them for up to a few
+milliseconds or until the batch is full. It then sorts them into length
+buckets, so short texts are not padded to the longest one, runs one
+batched call per bucket and resolves each caller's future with its own
+result.
+
+Batching is on by default; set INFERENCE_BATCHING=false to run every request
+on its own.
+"""
+
+import asyncio
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "true").lower() in ("1", "true", "yes")
+INFERENCE_BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", 32))
+INFERENCE_BATCH_MAX_DELAY_MS = float(os.getenv("INFERENCE_BATCH_MAX_DELAY_MS", 5))
+
+
+class InferenceRequest:
+    def __init__(self, item: Any, length: int):
+        self.item = item
+        self.length = length
+        self.future: Future = Future()
+
+
+_STOP = object()
+
+
+def length_bucket(length: int) -> int:
+    """Requests whose lengths share a power of two are padded together"""
+    return max(length - 1, 0).bit_length()
+
+
+class InferenceBatcher:
+    """Batches single-item inference requests from many threads into batched calls on one worker thread.
+
+    fn takes a list of items and returns their results in the same order;
+    length gives an item's size for bucketing (for texts, len is a good
+    enough proxy for the token count).
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], length: Callable[[Any], int] = len,
+                 max_batch: int = INFERENCE_BATCH_MAX_SIZE, max_delay_ms: float = INFERENCE_BATCH_MAX_DELAY_MS,
+                 name: str = "inference-batcher"):
+        self.fn = fn
+        self.length = length
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.name = name
+        self.stats = {"requests": 0, "batches": 0, "calls": 0, "failures": 0}
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker after serving every request submitted so far"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the future resolves to its result once its batch has run"""
+        self.start()
+        request = InferenceRequest(item, self.length(item))
+        self._queue.put(request)
+        return request.future
+
+    def infer(self, item: Any) -> Any:
+        """Run one item as part of the next batch and wait for its result"""
+        return self.submit(item).result()
+
+    async def infer_async(self, item: Any) -> Any:
+        """infer for asyncio callers; the event loop keeps running while the batch does"""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is _STOP:
+                break
+            batch = [request]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+            self._process(batch)
+
+    def _process(self, batch: List[InferenceRequest]):
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        buckets: Dict[int, List[InferenceRequest]] = {}
+        for request in sorted(batch, key=lambda request: request.length):
+            buckets.setdefault(length_bucket(request.length), []).append(request)
+        for bucket in buckets.values():
+            if self._apply(bucket) or len(bucket) == 1:
+                continue
+            # The batched call failed: retry each request alone so one bad input fails only its caller
+            for request in bucket:
+                self._apply([request])
+
+    def _apply(self, bucket: List[InferenceRequest]) -> bool:
+        """Run one batched call; resolve futures on success, or fail a lone request"""
+        try:
+            results = self.fn([request.item for request in bucket])
+            if len(results) != len(bucket):
+                raise ValueError(f"{self.name} returned {len(results)} results for {len(bucket)} items")
+        except Exception as e:
+            if len(bucket) == 1:
+                self.stats["failures"] += 1
+                bucket[0].future.set_exception(e)
+            return False
+
+        self.stats["calls"] += 1
+        self.stats["requests"] += len(bucket)
+        for request, result in zip(bucket, results):
+            request.future.set_result(result)
+        return True
@@ -2,6 +2,8 @@ from transformers import MarianMTModel, MarianTokenizer
 from typing import Tuple
 import logging
 from .fallback_translator import FallbackTranslator
+from .quantization import TRANSLATION_QUANTIZE, load_seq2seq_model
+from translation_cache import cached_translation
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -43,7 +45,7 @@ class MarianMTTranslator:
             try:
                 logger.info(f"Loading model: {model_name}")
                 tokenizer = MarianTokenizer.from_pretrained(model_name)
-                model = MarianMTModel.from_pretrained(model_name)
+                model = load_seq2seq_model(MarianMTModel, model_name)
                 cls._cache[key] = (tokenizer, model)
                 logger.info(f"Successfully loaded model: {model_name}")
             except Exception as e:
@@ -59,17 +61,7 @@ class MarianMTTranslator:
         Returns the translated text or a fallback message if translation fails.
         """
         try:
-            tokenizer, model = cls.get_model_and_tokenizer(src_lang, tgt_lang)
-            batch = tokenizer([text], return_tensors="pt", padding=True)
-            input_ids = batch["input_ids"]
-            attention_mask = batch.get("attention_mask", None)
-            
-            if attention_mask is not None:
-                gen = model.generate(input_ids=input_ids, attention_mask=attention_mask)
-            else:
-                gen = model.generate(input_ids=input_ids)
-            
-            translated = tokenizer.decode(gen[0], skip_special_tokens=True)
+            translated = cls._model_translate(text, src_lang, tgt_lang)
             logger.info(f"Successfully translated: {text[:50]}... -> {translated[:50]}...")
             return translated
             
@@ -95,6 +87,22 @@ class MarianMTTranslator:
             else:
                 return f"[Translation failed: {str(e)}]"
 
+    @classmethod
+    @cached_translation("marian", "opus-mt-int8" if TRANSLATION_QUANTIZE else "opus-mt")
+    def _model_translate(cls, text: str, src_lang: str, tgt_lang: str) -> str:
+        """Translation by the pair's MarianMT model; raises if it cannot be loaded"""
+        tokenizer, model = cls.get_model_and_tokenizer(src_lang, tgt_lang)
+        batch = tokenizer([text], return_tensors="pt", padding=True)
+        input_ids = batch["input_ids"]
+        attention_mask = batch.get("attention_mask", None)
+        
+        if attention_mask is not None:
+            gen = model.generate(input_ids=input_ids, attention_mask=attention_mask)
+        else:
+            gen = model.generate(input_ids=input_ids)
+        
+        return tokenizer.decode(gen[0], skip_special_tokens=True)
+
     @classmethod
     def is_supported(cls, src_lang: str, tgt_lang: str) -> bool:
         """Check if translation is supported for the given language pair."""
@@ -0,0 +1,72 @@
+"""
+Int8 dynamic quantization for the seq2seq translation models.
+
+The MarianMT and NLLB models are loaded in fp32, which for NLLB-600M is about
+2.4 GB of weights. With TRANSLATION_QUANTIZE=true, load_seq2seq_model
+quantizes every torch.nn.Linear layer to int8 (weights stored as int8,
+activations quantized on the fly). Most of a transformer's weights are in
+those layers, so this roughly quarters their memory and speeds up CPU
+inference, usually at a small cost in translation quality. Use
+benchmarks/translation_quantization.py to measure both for a model.
+
+The conversion needs the fp32 model in memory, so the quantized model is
+saved under QUANTIZED_MODEL_DIR and later starts load it directly. The cache
+is a pickled module: only point QUANTIZED_MODEL_DIR at a trusted directory.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import torch
+import transformers
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_QUANTIZE = os.getenv("TRANSLATION_QUANTIZE", "").lower() in ("1", "true", "yes")
+QUANTIZED_MODEL_DIR = os.getenv("QUANTIZED_MODEL_DIR", "./model_cache/quantized")
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """Dynamic int8 quantization of model's Linear layers, for CPU inference"""
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantized_cache_path(model_name: str, cache_dir: str = QUANTIZED_MODEL_DIR) -> str:
+    """Cache file for a quantized model, tied to the torch and transformers versions that can unpickle it"""
+    return os.path.join(
+        cache_dir, f"{model_name.replace('/', '--')}-int8-torch{torch.__version__}-transformers{transformers.__version__}.pt"
+    )
+
+
+def load_seq2seq_model(model_class, model_name: str, quantize: bool = TRANSLATION_QUANTIZE,
+                       cache_dir: Optional[str] = QUANTIZED_MODEL_DIR):
+    """model_class.from_pretrained(model_name), int8-quantized when quantize is set.
+
+    Quantized models are read from and written to cache_dir (None disables
+    the cache).
+    """
+    if not quantize:
+        return model_class.from_pretrained(model_name)
+
+    path = quantized_cache_path(model_name, cache_dir) if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            model = torch.load(path, weights_only=False)
+            logger.info(f"Loaded quantized model from {path}")
+            return model
+        except Exception as e:
+            logger.warning(f"Could not load quantized model {path}, quantizing again: {e}")
+
+    logger.info(f"Quantizing {model_name} to int8")
+    model = quantize_int8(model_class.from_pretrained(model_name, low_cpu_mem_usage=True))
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write then rename, so a crash never leaves a truncated cache file behind
+            torch.save(model, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not cache quantized model at {path}: {e}")
+    return model
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from database import get_db, User, UserScore, UserActivity, UserStreak
+from database import get_async_db
+from async_crud import (
+    get_user_by_nickname, get_user_streak, get_user_language_xp,
+    get_language_club_totals, get_language_club_members, get_language_club_rank
+)
 
 router = APIRouter()
 
@@ -15,10 +18,12 @@ class ClubMember(BaseModel):
     current_streak: int
     longest_streak: int
     level: int
+    rank: Optional[int] = None  # Position in the club by XP; None if the user has no XP in it
 
 class ClubData(BaseModel):
     name: str
-    members: List[ClubMember]
+    members: List[ClubMember]  # One page of members, highest XP first
+    member_count: int
     group_goal: int
     group_progress: int
     challenge: str
@@ -55,97 +60,66 @@ def calculate_group_goal(member_count: int) -> int:
     return base_goal + (member_count * per_member_goal)
 
 @router.get("/clubs/{language_code}", response_model=ClubData)
-async def get_language_club(language_code: str, db: Session = Depends(get_db)):
-    """Get language club data for a specific language"""
-    # Get all users who have activity in this language
-    active_users = (
-        db.query(User)
-        .join(UserScore)
-        .filter(UserScore.language == language_code)
-        .distinct()
-        .all()
-    )
-
-    members = []
-    total_xp = 0
-
-    for user in active_users:
-        # Calculate user's total XP for this language
-        user_xp = (
-            db.query(func.sum(UserScore.score))
-            .filter(
-                UserScore.user_id == user.id,
-                UserScore.language == language_code
-            )
-            .scalar() or 0
-        )
-
-        # Get user's streak info
-        streak = (
-            db.query(UserStreak)
-            .filter(UserStreak.user_id == user.id)
-            .first()
-        )
-
-        if user_xp > 0:  # Only include users with XP
-            members.append(ClubMember(
-                nickname=user.nickname,
-                xp=user_xp,
-                avatar=user.avatar,
-                current_streak=streak.current_streak if streak else 0,
-                longest_streak=streak.longest_streak if streak else 0,
-                level=calculate_level(user_xp)
-            ))
-            total_xp += user_xp
-
-    if not members:
+async def get_language_club(
+    language_code: str,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get language club data for a specific language.
+
+    Members are paginated (highest XP first); member_count and group_progress
+    cover the whole club.
+    """
+    member_count, total_xp = await get_language_club_totals(db, language_code)
+
+    if not member_count:
         return ClubData(
             name=f"{language_code.upper()} Language Club",
             members=[],
+            member_count=0,
             group_goal=1000,  # default group goal
             group_progress=0,
             challenge="No challenge yet!",
             last_updated=datetime.utcnow()
         )
 
-    # Sort members by XP
-    members.sort(key=lambda x: (-x.xp, x.nickname))
-
-    # Calculate group goal
-    group_goal = calculate_group_goal(len(members))
+    rows = await get_language_club_members(db, language_code, limit=limit, offset=offset)
+    members = [
+        ClubMember(
+            nickname=row.nickname,
+            xp=row.xp,
+            avatar=row.avatar,
+            current_streak=row.current_streak,
+            longest_streak=row.longest_streak,
+            level=calculate_level(row.xp),
+            rank=offset + idx + 1
+        )
+        for idx, row in enumerate(rows)
+    ]
 
     return ClubData(
         name=f"{language_code.upper()} Language Club",
         members=members,
-        group_goal=group_goal,
+        member_count=member_count,
+        group_goal=calculate_group_goal(member_count),
         group_progress=total_xp,
         challenge=get_active_challenge(),
         last_updated=datetime.utcnow()
     )
 
 @router.get("/clubs/{language_code}/members/{nickname}", response_model=ClubMember)
-async def get_club_member(language_code: str, nickname: str, db: Session = Depends(get_db)):
-    """Get specific member's club data"""
-    user = db.query(User).filter(User.nickname == nickname).first()
+async def get_club_member(language_code: str, nickname: str, db: AsyncSession = Depends(get_async_db)):
+    """Get specific member's club data, including their rank in the club"""
+    user = await get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Get user's XP for this language
-    user_xp = (
-        db.query(func.sum(UserScore.score))
-        .filter(
-            UserScore.user_id == user.id,
-            UserScore.language == language_code
-        )
-        .scalar() or 0
-    )
+    user_xp = await get_user_language_xp(db, user.id, language_code)
 
     # Get user's streak
-    streak = (
-        db.query(UserStreak)
-        .filter(UserStreak.user_id == user.id)
-        .first()
-    )
+    streak = await get_user_streak(db, user.id)
 
     return ClubMember(
         nickname=user.nickname,
@@ -153,5 +127,6 @@ async def get_club_member(language_code: str, nickname: str, db: Session = Depen
         avatar=user.avatar,
         current_streak=streak.current_streak if streak else 0,
         longest_streak=streak.longest_streak if streak else 0,
-        level=calculate_level(user_xp)
+        level=calculate_level(user_xp),
+        rank=await get_language_club_rank(db, language_code, user, user_xp)
     )
@@ -0,0 +1,318 @@
+"""
+In-process ranked leaderboard index for LinguaQuest.
+
+Players are kept in an indexable skip list ordered by (total_score, streak,
+level), highest first. Rank lookups, "around me" windows and top-K pages are
+O(log n) (plus the size of the page) instead of re-sorting the user_scores
+aggregate on every request.
+
+The index is loaded from the database on first use (or at startup) and kept
+current by the CRUD layer: score, streak and profile writes queue an update
+on their session, which is applied once the session commits and dropped if it
+rolls back. Score updates carry the rollup's scores_count, so a hook from an
+earlier commit that runs late cannot overwrite a newer total.
+"""
+
+import random
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, User, UserStatsRollup, UserStreak
+
+MAX_LEVELS = 16
+LEVEL_PROBABILITY = 0.25  # 4^16 players before the top level fills up
+
+
+def calculate_level(current_streak: int) -> int:
+    """Level derived from the streak, as on the database leaderboard"""
+    return min(10, max(1, current_streak // 3 + 1))
+
+
+class SkipListNode:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, levels: int):
+        self.value = value
+        self.next: List[Optional["SkipListNode"]] = [None] * levels
+        # Number of bottom-level steps to next[level]; a missing next counts as the position after the last element
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """Sorted sequence of unique, comparable values with O(log n) insert, remove, rank and positional access"""
+
+    def __init__(self, values=(), seed: Optional[int] = None):
+        self._random = random.Random(seed)
+        self.head = SkipListNode(None, MAX_LEVELS)
+        self.size = 0
+        if values:
+            self._build(values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _random_levels(self) -> int:
+        levels = 1
+        while levels < MAX_LEVELS and self._random.random() < LEVEL_PROBABILITY:
+            levels += 1
+        return levels
+
+    def _build(self, values):
+        """Link already sorted values in O(n)"""
+        last = [self.head] * MAX_LEVELS
+        last_position = [0] * MAX_LEVELS
+        position = 0
+        for position, value in enumerate(values, 1):
+            node = SkipListNode(value, self._random_levels())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        self.size = position
+        for level in range(MAX_LEVELS):
+            last[level].width[level] = self.size + 1 - last_position[level]
+
+    def _find(self, value) -> Tuple[List[SkipListNode], List[int]]:
+        """Rightmost node before value on every level, and its position"""
+        chain = [self.head] * MAX_LEVELS
+        positions = [0] * MAX_LEVELS
+        node, position = self.head, 0
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].value < value:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, value):
+        chain, positions = self._find(value)
+        position = positions[0]
+        node = SkipListNode(value, self._random_levels())
+        for level in range(len(node.next)):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - (position - positions[level])
+            previous.width[level] = position + 1 - positions[level]
+        for level in range(len(node.next), MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        chain, _ = self._find(value)
+        node = chain[0].next[0]
+        if node is None or node.value != value:
+            raise ValueError(f"{value!r} not in skip list")
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, value) -> int:
+        """Number of values smaller than value"""
+        _, positions = self._find(value)
+        return positions[0]
+
+    def _node_at(self, index: int) -> SkipListNode:
+        remaining = index + 1
+        node = self.head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self.size:
+            raise IndexError("skip list index out of range")
+        return self._node_at(index).value
+
+    def slice(self, start: int, count: int) -> Iterator[Any]:
+        """Up to count values from position start, in order"""
+        if count <= 0 or start >= self.size:
+            return
+        node = self._node_at(max(start, 0))
+        for _ in range(min(count, self.size - max(start, 0))):
+            yield node.value
+            node = node.next[0]
+
+
+class RankedPlayerState:
+    __slots__ = ("nickname", "avatar", "total_score", "current_streak", "scores_count")
+
+    def __init__(self, nickname: str, avatar: Optional[str], total_score: int, current_streak: int,
+                 scores_count: int = 0):
+        self.nickname = nickname
+        self.avatar = avatar
+        self.total_score = total_score
+        self.current_streak = current_streak
+        self.scores_count = scores_count  # Version of total_score: the rollup's count of scores behind it
+
+
+class LeaderboardIndex:
+    """Players ranked by total score, then streak, then level (highest first; ties by user id)"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self._seed = seed
+        self._ranking = IndexableSkipList(seed=seed)
+        self._players: Dict[int, RankedPlayerState] = {}
+        self._user_ids: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    @staticmethod
+    def _key(user_id: int, player: RankedPlayerState) -> tuple:
+        return (-player.total_score, -player.current_streak, -calculate_level(player.current_streak), user_id)
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._players
+
+    def load(self, db: Session):
+        """Replace the index contents with every player who has scored"""
+        rows = db.execute(
+            select(
+                User.id, User.nickname, User.avatar, UserStatsRollup.total_score, UserStreak.current_streak,
+                UserStatsRollup.scores_count
+            ).join(UserStatsRollup, UserStatsRollup.user_id == User.id).outerjoin(
+                UserStreak, UserStreak.user_id == User.id
+            ).where(UserStatsRollup.scores_count > 0)
+        ).all()
+        self.load_players(
+            (user_id, nickname, avatar, total_score, current_streak or 0, scores_count)
+            for user_id, nickname, avatar, total_score, current_streak, scores_count in rows
+        )
+
+    def load_players(self, players):
+        """Bulk load (user_id, nickname, avatar, total_score, current_streak, scores_count) tuples"""
+        loaded = {}
+        for user_id, nickname, avatar, total_score, current_streak, scores_count in players:
+            loaded[user_id] = RankedPlayerState(nickname, avatar, total_score, current_streak, scores_count)
+        keys = sorted(self._key(user_id, player) for user_id, player in loaded.items())
+        with self._lock:
+            self._players = loaded
+            self._user_ids = {player.nickname: user_id for user_id, player in loaded.items()}
+            self._ranking = IndexableSkipList(keys, seed=self._seed)
+            self.loaded = True
+
+    def update(self, user_id: int, **changes):
+        """Insert or re-rank a player; changes are nickname, avatar, total_score, current_streak and scores_count.
+
+        New players need nickname, total_score and current_streak. A total_score
+        given with a scores_count no newer than the stored one is stale and ignored.
+        """
+        with self._lock:
+            player = self._players.get(user_id)
+            if player is not None and changes.get("scores_count", player.scores_count + 1) <= player.scores_count:
+                changes = {field: value for field, value in changes.items() if field not in ("total_score", "scores_count")}
+                if not changes:
+                    return
+            if player is None:
+                if not {"nickname", "total_score", "current_streak"} <= changes.keys():
+                    return
+                player = RankedPlayerState(None, None, 0, 0)
+            else:
+                self._ranking.remove(self._key(user_id, player))
+            for field, value in changes.items():
+                setattr(player, field, value)
+            self._players[user_id] = player
+            self._user_ids[player.nickname] = user_id
+            self._ranking.insert(self._key(user_id, player))
+
+    def _entry(self, rank: int, key: tuple) -> Dict[str, Any]:
+        player = self._players[key[-1]]
+        return {
+            "rank": rank,
+            "nickname": player.nickname,
+            "avatar": player.avatar,
+            "total_score": player.total_score,
+            "current_streak": player.current_streak,
+            "level": calculate_level(player.current_streak),
+        }
+
+    def rank(self, nickname: str) -> Optional[Dict[str, Any]]:
+        """A player's entry with their 1-based rank, or None if they have not scored"""
+        with self._lock:
+            user_id = self._user_ids.get(nickname)
+            if user_id is None:
+                return None
+            key = self._key(user_id, self._players[user_id])
+            return self._entry(self._ranking.rank(key) + 1, key)
+
+    def around(self, nickname: str, count: int = 5) -> List[Dict[str, Any]]:
+        """The player plus up to count players directly above and below them"""
+        with self._lock:
+            user_id = self._user_ids.get(nickname)
+            if user_id is None:
+                return []
+            position = self._ranking.rank(self._key(user_id, self._players[user_id]))
+            start = max(0, position - count)
+            return [self._entry(start + i + 1, key) for i, key in enumerate(self._ranking.slice(start, position - start + count + 1))]
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._entry(offset + i + 1, key) for i, key in enumerate(self._ranking.slice(offset, limit))]
+
+
+_leaderboard_index = LeaderboardIndex()
+_load_lock = threading.Lock()
+
+
+def get_leaderboard_index() -> LeaderboardIndex:
+    """Process-wide leaderboard index, loaded from the database on first use"""
+    if not _leaderboard_index.loaded:
+        with _load_lock:
+            if not _leaderboard_index.loaded:
+                db = SessionLocal()
+                try:
+                    _leaderboard_index.load(db)
+                finally:
+                    db.close()
+    return _leaderboard_index
+
+
+# Write hooks: updates ride on the session and are applied after it commits
+def queue_leaderboard_update(db: Session, user_id: int, **changes):
+    """Apply changes to the player's index entry once db commits (caller commits)"""
+    db.info.setdefault("leaderboard_updates", {}).setdefault(user_id, {}).update(changes)
+
+
+def queue_score_update(db: Session, user_id: int, total_score: int, scores_count: int):
+    """Re-rank a player after a score write; first-time scorers are looked up for the rest of their entry.
+
+    scores_count is the rollup's count after the write, which orders score updates committed by different sessions.
+    """
+    if not _leaderboard_index.loaded:
+        return
+    if user_id in _leaderboard_index:
+        queue_leaderboard_update(db, user_id, total_score=total_score, scores_count=scores_count)
+        return
+    user = db.get(User, user_id)
+    streak = db.execute(select(UserStreak.current_streak).where(UserStreak.user_id == user_id)).scalar()
+    queue_leaderboard_update(
+        db, user_id, nickname=user.nickname, avatar=user.avatar, total_score=total_score, current_streak=streak or 0,
+        scores_count=scores_count
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def apply_leaderboard_updates(session):
+    updates = session.info.pop("leaderboard_updates", None)
+    if updates and _leaderboard_index.loaded:
+        for user_id, changes in updates.items():
+            _leaderboard_index.update(user_id, **changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_leaderboard_updates(session):
+    session.info.pop("leaderboard_updates", None)
@@ -0,0 +1,196 @@
+"""
+Periodically rebuilt leaderboard snapshot for LinguaQuest.
+
+GET /leaderboard is read far more often than scores are written. The snapshot
+service keeps the top LEADERBOARD_SNAPSHOT_SIZE rows of every sort order in an
+immutable snapshot. Each entry is serialized to JSON once per rebuild, and the
+default first page is stored as a complete response body. Offset reads
+within the snapshot are served from it; deeper pages and cursor reads still
+hit the database.
+
+A rebuild runs in the background when any of these happens:
+- LEADERBOARD_SNAPSHOT_INTERVAL seconds pass (see start)
+- LEADERBOARD_SNAPSHOT_WRITES score writes commit
+- a read decides to refresh early
+
+Early refresh is probabilistic (XFetch): a read refreshes ahead of the TTL with
+a probability that grows as expiry approaches and with the time the last
+rebuild took. Only one rebuild runs at a time, and readers keep getting the
+previous snapshot while it runs. So an expiring snapshot never triggers a
+burst of aggregate queries.
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import LeaderboardEntry
+
+LEADERBOARD_SNAPSHOT = os.getenv("LEADERBOARD_SNAPSHOT", "true").lower() in ("1", "true", "yes")
+LEADERBOARD_SNAPSHOT_SIZE = int(os.getenv("LEADERBOARD_SNAPSHOT_SIZE", 1000))
+LEADERBOARD_SNAPSHOT_TTL = float(os.getenv("LEADERBOARD_SNAPSHOT_TTL", 30))
+LEADERBOARD_SNAPSHOT_INTERVAL = float(os.getenv("LEADERBOARD_SNAPSHOT_INTERVAL", 15))
+LEADERBOARD_SNAPSHOT_WRITES = int(os.getenv("LEADERBOARD_SNAPSHOT_WRITES", 500))
+LEADERBOARD_SNAPSHOT_BETA = float(os.getenv("LEADERBOARD_SNAPSHOT_BETA", 1.0))  # >1 refreshes earlier
+
+DEFAULT_PAGE = (0, 100)  # (offset, limit) of GET /leaderboard without parameters
+# Level is derived from the streak, so both sort by the same columns and share rows
+ORDERINGS = {("score", "desc"), ("score", "asc"), ("streak", "desc"), ("streak", "asc")}
+
+
+class LeaderboardSnapshot:
+    """Immutable, pre-serialized leaderboard rows for every sort order"""
+
+    def __init__(self, bind, rows: Dict[Tuple[str, str], List[Dict[str, Any]]], size: int, build_seconds: float):
+        self.bind = bind
+        self.size = size
+        self.built_at = time.monotonic()
+        self.build_seconds = build_seconds
+        self._entries = {}
+        self._cursors = {}
+        self._default_pages = {}
+        for ordering, entries in rows.items():
+            self._entries[ordering] = [LeaderboardEntry.model_validate(entry).model_dump_json().encode() for entry in entries]
+            self._cursors[ordering] = [entry["next"] for entry in entries]
+            offset, limit = DEFAULT_PAGE
+            self._default_pages[ordering] = self._join(self._entries[ordering][offset:offset + limit])
+
+    @staticmethod
+    def _join(entries: List[bytes]) -> bytes:
+        return b"[" + b",".join(entries) + b"]"
+
+    def page(self, sort_by: str, sort_dir: str, limit: int, offset: int) -> Optional[Tuple[bytes, Optional[Dict[str, Any]]]]:
+        """JSON body of a page and the keyset position after it (None if the page is not full), or None if the page reaches past the snapshot"""
+        ordering = ("streak" if sort_by == "level" else sort_by, sort_dir)
+        entries = self._entries[ordering]
+        if offset + limit > len(entries) and len(entries) >= self.size:
+            return None
+        if (offset, limit) == DEFAULT_PAGE:
+            body = self._default_pages[ordering]
+        else:
+            body = self._join(entries[offset:offset + limit])
+        full = offset + limit <= len(entries)
+        return body, self._cursors[ordering][offset + limit - 1] if full else None
+
+
+class LeaderboardSnapshotService:
+    """Holds the current snapshot and rebuilds it, one rebuild at a time"""
+
+    def __init__(self, size: int = LEADERBOARD_SNAPSHOT_SIZE, ttl: float = LEADERBOARD_SNAPSHOT_TTL,
+                 rebuild_writes: int = LEADERBOARD_SNAPSHOT_WRITES, beta: float = LEADERBOARD_SNAPSHOT_BETA):
+        self.size = size
+        self.ttl = ttl
+        self.rebuild_writes = rebuild_writes
+        self.beta = beta
+        self.snapshot: Optional[LeaderboardSnapshot] = None
+        self.rebuilds = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # Held for the duration of a rebuild (single flight)
+        self._background: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def get(self, db: Session) -> LeaderboardSnapshot:
+        """Current snapshot for db's database; only the very first read waits for a rebuild"""
+        bind = db.get_bind()
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.bind is not bind:
+            return self._rebuild(bind, only_if_older_than=snapshot)
+        if self._should_refresh(snapshot):
+            self.refresh_in_background(bind)
+        return snapshot
+
+    def _should_refresh(self, snapshot: LeaderboardSnapshot) -> bool:
+        # XFetch: -log(U) is exponentially distributed, so early refreshes get likelier as expiry nears
+        jitter = -snapshot.build_seconds * self.beta * math.log(1.0 - random.random())
+        return time.monotonic() + jitter >= snapshot.built_at + self.ttl
+
+    def _rebuild(self, bind, only_if_older_than: Optional[LeaderboardSnapshot] = None) -> LeaderboardSnapshot:
+        with self._build_lock:
+            current = self.snapshot
+            # Whoever waited on the lock behind another rebuild takes that result instead of rebuilding again
+            if current is not None and current is not only_if_older_than and current.bind is bind:
+                return current
+            # crud imports this module for its write hook
+            from crud import get_leaderboard
+            start = time.perf_counter()
+            with Session(bind=bind) as db:
+                rows = {
+                    (sort_by, sort_dir): get_leaderboard(db, limit=self.size, sort_by=sort_by, sort_dir=sort_dir)
+                    for sort_by, sort_dir in ORDERINGS
+                }
+            self.snapshot = LeaderboardSnapshot(bind, rows, self.size, time.perf_counter() - start)
+            self.rebuilds += 1
+            return self.snapshot
+
+    def refresh_in_background(self, bind):
+        """Start a rebuild unless one is already running"""
+        with self._lock:
+            if self._background is not None and self._background.is_alive():
+                return
+            snapshot = self.snapshot
+            self._background = threading.Thread(target=self._rebuild, args=(bind, snapshot), daemon=True)
+            self._background.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until a running background rebuild finishes"""
+        background = self._background
+        if background is not None:
+            background.join(timeout)
+
+    def note_writes(self, bind, count: int):
+        """Count committed score writes; every rebuild_writes of them trigger a rebuild"""
+        with self._lock:
+            self._writes += count
+            if self._writes < self.rebuild_writes:
+                return
+            self._writes = 0
+        if self.snapshot is not None and self.snapshot.bind is bind:
+            self.refresh_in_background(bind)
+
+    def start(self, bind, interval: float = LEADERBOARD_SNAPSHOT_INTERVAL):
+        """Build the snapshot now and rebuild it every interval seconds on a daemon thread"""
+        self._rebuild(bind, only_if_older_than=self.snapshot)
+
+        def refresh_periodically():
+            while not self._stopped.wait(interval):
+                try:
+                    self._rebuild(bind, only_if_older_than=self.snapshot)
+                except Exception as e:
+                    print(f"Leaderboard snapshot rebuild failed: {e}")
+
+        threading.Thread(target=refresh_periodically, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_leaderboard_snapshot = LeaderboardSnapshotService()
+
+
+def get_leaderboard_snapshot() -> LeaderboardSnapshotService:
+    return _leaderboard_snapshot
+
+
+# Write hook: committed score writes count towards the next rebuild
+def queue_snapshot_write(db: Session, count: int = 1):
+    """Count leaderboard writes on db towards a snapshot rebuild once db commits (caller commits)"""
+    db.info["leaderboard_snapshot_writes"] = db.info.get("leaderboard_snapshot_writes", 0) + count
+
+
+@event.listens_for(Session, "after_commit")
+def apply_snapshot_writes(session):
+    writes = session.info.pop("leaderboard_snapshot_writes", 0)
+    if writes:
+        _leaderboard_snapshot.note_writes(session.get_bind(), writes)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_snapshot_writes(session):
+    session.info.pop("leaderboard_snapshot_writes", None)
@@ -39,13 +39,19 @@ from simple_nlp_services import (
 )
 
 # Import database components
-from database import init_db
+from database import init_db, engine
 from user_api import router as user_router
 from game_api import router as game_router
+from batch_api import router as batch_router
 from engagement_api_v2 import router as engagement_v2_router
 from progression_api import router as progression_router
 from progression_tracking import router as progression_tracking_router
 from language_club import router as language_club_router
+from leaderboard_index import get_leaderboard_index
+from leaderboard_snapshot import LEADERBOARD_SNAPSHOT, get_leaderboard_snapshot
+from streak_reconciler import STREAK_RECONCILE, get_streak_reconciler
+from integrations.translation.quantization import TRANSLATION_QUANTIZE, load_seq2seq_model
+from translation_cache import cached_translation, get_translation_cache
 
 # Utility function for safe printing
 def safe_print(message: str):
@@ -64,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Cursor for the next page of paginated lists
 )
 
 # Initialize database on startup
@@ -72,10 +79,16 @@ async def startup_event():
     """Initialize database on application startup"""
     init_db()
     print("Database initialized successfully!")
+    get_leaderboard_index()  # Load the ranked leaderboard before the first request
+    if LEADERBOARD_SNAPSHOT:
+        get_leaderboard_snapshot().start(engine)  # Build the leaderboard snapshot and keep refreshing it
+    if STREAK_RECONCILE:
+        get_streak_reconciler().start(engine)  # Reset expired streaks now and every night
 
 # Include new database routers
 app.include_router(user_router, prefix="/api/v1", tags=["users"])
 app.include_router(game_router, prefix="/api/v1", tags=["game"])
+app.include_router(batch_router, prefix="/api/v1", tags=["batch"])
 app.include_router(engagement_v2_router, prefix="/api/v1", tags=["engagement"])
 app.include_router(progression_router, prefix="/api/v1", tags=["progression"])
 app.include_router(progression_tracking_router, prefix="/api/v1", tags=["progression-tracking"])
@@ -261,8 +274,10 @@ class TranslationRequest(BaseModel):
 
 class TranslationResponse(BaseModel):
     translated_text: str
+    cached: bool = False
 
 # --- LibreTranslate Real-Time Translation ---
+@cached_translation("libre")
 def libre_translate(text, source, target):
     # Map internal language codes to external service codes
     external_source = EXTERNAL_LANG_MAP.get(source, source)
@@ -321,11 +336,12 @@ def libre_translate(text, source, target):
 # NLLB setup
 # Use a smaller NLLB model that's more accessible
 NLLB_MODEL_NAME = "facebook/nllb-200-distilled-600M"  # Smaller, faster model
+NLLB_MODEL_VERSION = f"{NLLB_MODEL_NAME}{'-int8' if TRANSLATION_QUANTIZE else ''}"  # Part of the translation cache key
 
 # Initialize model with better error handling
 try:
     nllb_tokenizer = AutoTokenizer.from_pretrained(NLLB_MODEL_NAME)
-    nllb_model = AutoModelForSeq2SeqLM.from_pretrained(NLLB_MODEL_NAME)
+    nllb_model = load_seq2seq_model(AutoModelForSeq2SeqLM, NLLB_MODEL_NAME)  # int8 with TRANSLATION_QUANTIZE=true
     print(f"Successfully loaded NLLB model: {NLLB_MODEL_NAME}")
 except Exception as e:
     print(f"Failed to load NLLB model: {e}")
@@ -366,6 +382,7 @@ EXTERNAL_LANG_MAP = {
     'gaa': 'gaa', # Ga (likely not supported)
 }
 
+@cached_translation("nllb", NLLB_MODEL_VERSION)
 def nllb_translate(text, src_lang, tgt_lang):
     if nllb_model is None or nllb_tokenizer is None:
         raise Exception("NLLB model not available")
@@ -408,19 +425,24 @@ def nllb_translate(text, src_lang, tgt_lang):
 @app.post("/translate", response_model=TranslationResponse)
 def translate_text(req: TranslationRequest):
     try:
-        translated = nllb_translate(req.text, req.src_lang, req.tgt_lang)
-        return TranslationResponse(translated_text=translated)
+        translated, cached = nllb_translate.with_status(req.text, req.src_lang, req.tgt_lang)
+        return TranslationResponse(translated_text=translated, cached=cached)
     except Exception as e:
         print(f"NLLB translation failed: {e}")
         # Fallback to LibreTranslate/MyMemory if NLLB fails
         try:
-            translated = libre_translate(req.text, req.src_lang, req.tgt_lang)
-            return TranslationResponse(translated_text=translated)
+            translated, cached = libre_translate.with_status(req.text, req.src_lang, req.tgt_lang)
+            return TranslationResponse(translated_text=translated, cached=cached)
         except Exception as e2:
             error_msg = f"Translation error: {str(e2)}"
             print(f"Translation failed: {error_msg}")
             return TranslationResponse(translated_text=error_msg)
 
+@app.get("/translate/cache")
+def translation_cache_stats():
+    """Hit ratio, entries and milliseconds of translation saved by the translation cache"""
+    return get_translation_cache().summary()
+
 # --- gTTS Text-to-Speech Endpoint ---
 
 @app.get("/tts")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Maintain the append-only activity log for LinguaQuest (ACTIVITY_STORE=log)
+
+Usage:
+    python manage_activity_log.py import            # copy user_activities rows from the database into the log
+    python manage_activity_log.py rotate            # seal the active segment now
+    python manage_activity_log.py compact           # merge small sealed segments
+    python manage_activity_log.py archive --days 90 # archive sealed segments older than 90 days
+    python manage_activity_log.py stats             # list sealed segments
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal, UserActivity
+from activity_store import LogActivityStore, ACTIVITY_LOG_DIR, ACTIVITY_LOG_RETENTION_DAYS
+
+def import_activities(store: LogActivityStore) -> int:
+    """Append every user_activities row to the log in timestamp order"""
+    db = SessionLocal()
+    try:
+        imported = 0
+        query = db.query(UserActivity).order_by(UserActivity.timestamp, UserActivity.id)
+        for activity in query.yield_per(1000):
+            store.append(None, activity.user_id, activity.activity_type, activity.details, activity.timestamp)
+            imported += 1
+        return imported
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the activity log")
+    parser.add_argument("command", choices=["import", "rotate", "compact", "archive", "stats"])
+    parser.add_argument("--dir", default=ACTIVITY_LOG_DIR, help="activity log directory")
+    parser.add_argument("--days", type=int, default=ACTIVITY_LOG_RETENTION_DAYS,
+                        help="retention window for archive")
+    args = parser.parse_args()
+
+    store = LogActivityStore(args.dir)
+    try:
+        if args.command == "import":
+            print(f"Imported {import_activities(store)} activities into {args.dir}")
+        elif args.command == "rotate":
+            store.rotate()
+            print("Active segment sealed")
+        elif args.command == "compact":
+            print(f"Compaction merged away {store.compact()} segment(s)")
+        elif args.command == "archive":
+            archived = store.archive(datetime.utcnow() - timedelta(days=args.days))
+            print(f"Archived {len(archived)} segment(s): {', '.join(archived) or '-'}")
+        else:
+            for name, size, max_timestamp in store.sealed_segments():
+                print(f"{name}: {size} bytes, newest record {max_timestamp}")
+    finally:
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
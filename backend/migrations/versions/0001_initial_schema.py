@@ -0,0 +1,165 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Tables that already exist (databases created with init_db before
+    migrations were introduced) are left untouched.
+    """
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('nickname', sa.String(), nullable=False),
+            sa.Column('avatar', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('last_login', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('preferences', sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_nickname', 'users', ['nickname'], unique=True)
+
+    if 'user_activities' not in existing:
+        op.create_table(
+            'user_activities',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('activity_type', sa.String(), nullable=False),
+            sa.Column('details', sa.JSON(), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_user_activities_id', 'user_activities', ['id'])
+
+    if 'user_scores' not in existing:
+        op.create_table(
+            'user_scores',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('score', sa.Integer(), nullable=False),
+            sa.Column('language', sa.String(), nullable=False),
+            sa.Column('category', sa.String(), nullable=True),
+            sa.Column('difficulty', sa.String(), nullable=True),
+            sa.Column('game_session_id', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_user_scores_id', 'user_scores', ['id'])
+
+    if 'user_streaks' not in existing:
+        op.create_table(
+            'user_streaks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('current_streak', sa.Integer(), nullable=True),
+            sa.Column('longest_streak', sa.Integer(), nullable=True),
+            sa.Column('last_activity_date', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_user_streaks_id', 'user_streaks', ['id'])
+
+    if 'user_badges' not in existing:
+        op.create_table(
+            'user_badges',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('badge_type', sa.String(), nullable=False),
+            sa.Column('badge_name', sa.String(), nullable=False),
+            sa.Column('badge_description', sa.Text(), nullable=True),
+            sa.Column('earned_at', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_user_badges_id', 'user_badges', ['id'])
+
+    if 'user_progression_stages' not in existing:
+        op.create_table(
+            'user_progression_stages',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('stage_id', sa.String(), nullable=False),
+            sa.Column('stage_type', sa.String(), nullable=False),
+            sa.Column('label', sa.String(), nullable=False),
+            sa.Column('unlocked', sa.Boolean(), nullable=True),
+            sa.Column('parent_stage_id', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_user_progression_stages_id', 'user_progression_stages', ['id'])
+
+    if 'game_sessions' not in existing:
+        op.create_table(
+            'game_sessions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('session_id', sa.String(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.DateTime(), nullable=True),
+            sa.Column('end_time', sa.DateTime(), nullable=True),
+            sa.Column('total_score', sa.Integer(), nullable=True),
+            sa.Column('rounds_played', sa.Integer(), nullable=True),
+            sa.Column('rounds_won', sa.Integer(), nullable=True),
+            sa.Column('language', sa.String(), nullable=False),
+            sa.Column('category', sa.String(), nullable=True),
+            sa.Column('difficulty', sa.String(), nullable=True),
+            sa.Column('session_data', sa.JSON(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_game_sessions_id', 'game_sessions', ['id'])
+        op.create_index('ix_game_sessions_session_id', 'game_sessions', ['session_id'], unique=True)
+
+    if 'user_stats' not in existing:
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('total_score', sa.Integer(), nullable=False),
+            sa.Column('highest_score', sa.Integer(), nullable=False),
+            sa.Column('scores_count', sa.Integer(), nullable=False),
+            sa.Column('games_played', sa.Integer(), nullable=False),
+            sa.Column('total_rounds_won', sa.Integer(), nullable=False),
+            sa.Column('total_rounds_played', sa.Integer(), nullable=False),
+            sa.Column('badges_count', sa.Integer(), nullable=False),
+            sa.Column('language_counts', sa.JSON(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+        'user_stats', 'game_sessions', 'user_progression_stages', 'user_badges',
+        'user_streaks', 'user_scores', 'user_activities', 'users',
+    ):
+        op.drop_table(table)
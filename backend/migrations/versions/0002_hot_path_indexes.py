@@ -0,0 +1,42 @@
+"""composite indexes for hot query paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_user_scores_user_id_created_at', 'user_scores', ['user_id', 'created_at']),
+    ('ix_user_scores_user_id_score', 'user_scores', ['user_id', 'score']),
+    ('ix_user_scores_language_user_id', 'user_scores', ['language', 'user_id']),
+    ('ix_user_activities_user_id_timestamp', 'user_activities', ['user_id', 'timestamp']),
+    ('ix_user_badges_user_id_is_active_earned_at', 'user_badges', ['user_id', 'is_active', 'earned_at']),
+    ('ix_user_streaks_user_id', 'user_streaks', ['user_id']),
+    ('ix_user_progression_stages_user_id_stage_id', 'user_progression_stages', ['user_id', 'stage_id']),
+    ('ix_game_sessions_user_id', 'game_sessions', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by init_db after these indexes were added to the models already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
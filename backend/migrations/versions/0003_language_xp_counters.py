@@ -0,0 +1,71 @@
+"""per-language xp counters
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Creates the counter tables (unless init_db already did) and backfills them
+    from user_scores when they are empty.
+    """
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user_language_xp' not in existing:
+        op.create_table(
+            'user_language_xp',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('language', sa.String(), nullable=False),
+            sa.Column('xp', sa.Integer(), nullable=False),
+            sa.Column('scores_count', sa.Integer(), nullable=False),
+            sa.Column('last_scored_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id', 'language'),
+        )
+        op.create_index('ix_user_language_xp_language_xp', 'user_language_xp', ['language', 'xp'])
+
+    if 'language_totals' not in existing:
+        op.create_table(
+            'language_totals',
+            sa.Column('language', sa.String(), nullable=False),
+            sa.Column('total_xp', sa.Integer(), nullable=False),
+            sa.Column('member_count', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('language'),
+        )
+
+    bind = op.get_bind()
+    if bind.execute(sa.text('SELECT COUNT(*) FROM user_language_xp')).scalar() == 0:
+        op.execute(
+            'INSERT INTO user_language_xp (user_id, language, xp, scores_count, last_scored_at) '
+            'SELECT user_id, language, SUM(score), COUNT(id), MAX(created_at) '
+            'FROM user_scores GROUP BY user_id, language'
+        )
+    if bind.execute(sa.text('SELECT COUNT(*) FROM language_totals')).scalar() == 0:
+        op.execute(
+            'INSERT INTO language_totals (language, total_xp, member_count, updated_at) '
+            'SELECT language, SUM(CASE WHEN xp > 0 THEN xp ELSE 0 END), SUM(CASE WHEN xp > 0 THEN 1 ELSE 0 END), '
+            'CURRENT_TIMESTAMP FROM user_language_xp GROUP BY language'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('language_totals')
+    op.drop_index('ix_user_language_xp_language_xp', table_name='user_language_xp')
+    op.drop_table('user_language_xp')
@@ -0,0 +1,55 @@
+"""daily score buckets for windowed leaderboards
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RETENTION_DAYS = 30  # crud.DAILY_SCORE_RETENTION_DAYS when this revision was written
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Creates the bucket table (unless init_db already did) and backfills the
+    retained days from user_scores when it is empty.
+    """
+    if 'user_daily_scores' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'user_daily_scores',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('language', sa.String(), nullable=False),
+            sa.Column('score', sa.Integer(), nullable=False),
+            sa.Column('highest_score', sa.Integer(), nullable=False),
+            sa.Column('scores_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('day', 'user_id', 'language'),
+        )
+
+    bind = op.get_bind()
+    if bind.execute(sa.text('SELECT COUNT(*) FROM user_daily_scores')).scalar() == 0:
+        cutoff = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=RETENTION_DAYS - 1)
+        bind.execute(sa.text(
+            'INSERT INTO user_daily_scores (day, user_id, language, score, highest_score, scores_count) '
+            'SELECT DATE(created_at), user_id, language, SUM(score), MAX(score), COUNT(id) '
+            'FROM user_scores WHERE created_at >= :cutoff GROUP BY user_id, language, DATE(created_at)'
+        ), {'cutoff': cutoff})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_daily_scores')
@@ -0,0 +1,101 @@
+"""progression stages as one bitmask per user
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# progression_catalog version 1: (stage_id, stage_type, label, parent_stage_id, bit)
+CATALOG = [
+    ('basics', 'main', 'Language Basics', None, 0),
+    ('basics_1', 'sub', 'Introduction', 'basics', 1),
+    ('basics_2', 'sub', 'Simple Phrases', 'basics', 2),
+    ('basics_3', 'sub', 'Basic Grammar', 'basics', 3),
+    ('intermediate', 'main', 'Intermediate Skills', None, 4),
+    ('intermediate_1', 'sub', 'Advanced Phrases', 'intermediate', 5),
+    ('intermediate_2', 'sub', 'Complex Grammar', 'intermediate', 6),
+    ('advanced', 'main', 'Advanced Topics', None, 7),
+    ('advanced_1', 'sub', 'Idiomatic Expressions', 'advanced', 8),
+    ('advanced_2', 'sub', 'Cultural Context', 'advanced', 9),
+    ('mastery', 'main', 'Language Mastery', None, 10),
+    ('mastery_1', 'sub', 'Native-like Fluency', 'mastery', 11),
+    ('mastery_2', 'sub', 'Professional Usage', 'mastery', 12),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Folds each user's unlocked user_progression_stages rows into one bitmask
+    row and drops the per-stage table. Stages missing from the catalog are
+    dropped.
+    """
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user_progression' not in existing:
+        op.create_table(
+            'user_progression',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('unlocked_stages', sa.Integer(), nullable=False),
+            sa.Column('catalog_version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+
+    if 'user_progression_stages' in existing:
+        bits = ' '.join(f"WHEN '{stage_id}' THEN {1 << bit}" for stage_id, _, _, _, bit in CATALOG)
+        # Bits are distinct powers of two, so summing each unlocked stage once is a bitwise OR
+        op.execute(
+            'INSERT INTO user_progression (user_id, unlocked_stages, catalog_version, updated_at) '
+            f'SELECT user_id, SUM(CASE WHEN unlocked = 1 THEN CASE stage_id {bits} ELSE 0 END ELSE 0 END), 1, MAX(updated_at) '
+            'FROM (SELECT user_id, stage_id, MAX(CASE WHEN unlocked THEN 1 ELSE 0 END) AS unlocked, MAX(updated_at) AS updated_at '
+            '      FROM user_progression_stages GROUP BY user_id, stage_id) AS stages '
+            'WHERE user_id NOT IN (SELECT user_id FROM user_progression) '
+            'GROUP BY user_id'
+        )
+        op.drop_index('ix_user_progression_stages_user_id_stage_id', table_name='user_progression_stages', if_exists=True)
+        op.drop_index('ix_user_progression_stages_id', table_name='user_progression_stages', if_exists=True)
+        op.drop_table('user_progression_stages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        'user_progression_stages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('stage_id', sa.String(), nullable=False),
+        sa.Column('stage_type', sa.String(), nullable=False),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('unlocked', sa.Boolean(), nullable=True),
+        sa.Column('parent_stage_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_user_progression_stages_id', 'user_progression_stages', ['id'])
+    op.create_index('ix_user_progression_stages_user_id_stage_id', 'user_progression_stages', ['user_id', 'stage_id'])
+
+    bind = op.get_bind()
+    for stage_id, stage_type, label, parent_stage_id, bit in CATALOG:
+        bind.execute(sa.text(
+            'INSERT INTO user_progression_stages '
+            '(user_id, stage_id, stage_type, label, unlocked, parent_stage_id, created_at, updated_at) '
+            'SELECT user_id, :stage_id, :stage_type, :label, (unlocked_stages & :bit) != 0, :parent_stage_id, updated_at, updated_at '
+            'FROM user_progression'
+        ), {'stage_id': stage_id, 'stage_type': stage_type, 'label': label, 'parent_stage_id': parent_stage_id, 'bit': 1 << bit})
+    op.drop_table('user_progression')
@@ -0,0 +1,73 @@
+"""backfill user_stats rollups
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Scores per language, least recently played first (crud.compute_user_stats_rollups)
+LANGUAGE_COUNTS = {
+    'sqlite': (
+        'SELECT user_id, json_group_object(language, scores_count) AS language_counts FROM ('
+        'SELECT user_id, language, COUNT(id) AS scores_count, MAX(created_at) AS last_scored_at '
+        'FROM user_scores GROUP BY user_id, language ORDER BY user_id, last_scored_at, language'
+        ') GROUP BY user_id'
+    ),
+    'postgresql': (
+        'SELECT user_id, json_object_agg(language, scores_count ORDER BY last_scored_at, language) AS language_counts '
+        'FROM (SELECT user_id, language, COUNT(id) AS scores_count, MAX(created_at) AS last_scored_at '
+        'FROM user_scores GROUP BY user_id, language) AS languages GROUP BY user_id'
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Rollups used to be created lazily by the stats endpoint, but the
+    leaderboard, its snapshot and the ranked index only list players with a
+    rollup. Every user without one gets it computed from user_scores,
+    game_sessions and user_badges; existing rollups are left untouched.
+    """
+    bind = op.get_bind()
+    language_counts = LANGUAGE_COUNTS.get(bind.dialect.name)
+    bind.execute(sa.text(
+        'INSERT INTO user_stats (user_id, total_score, highest_score, scores_count, games_played, '
+        'total_rounds_won, total_rounds_played, badges_count, language_counts, updated_at) '
+        'SELECT users.id, COALESCE(scores.total_score, 0), COALESCE(scores.highest_score, 0), '
+        'COALESCE(scores.scores_count, 0), COALESCE(sessions.games_played, 0), '
+        'COALESCE(sessions.total_rounds_won, 0), COALESCE(sessions.total_rounds_played, 0), '
+        'COALESCE(badges.badges_count, 0), '
+        + ('COALESCE(languages.language_counts, \'{}\')' if language_counts else '\'{}\'') +
+        ', CURRENT_TIMESTAMP FROM users '
+        'LEFT JOIN (SELECT user_id, SUM(score) AS total_score, MAX(score) AS highest_score, COUNT(id) AS scores_count '
+        'FROM user_scores GROUP BY user_id) AS scores ON scores.user_id = users.id '
+        'LEFT JOIN (SELECT user_id, COUNT(id) AS games_played, SUM(rounds_won) AS total_rounds_won, '
+        'SUM(rounds_played) AS total_rounds_played FROM game_sessions GROUP BY user_id) AS sessions '
+        'ON sessions.user_id = users.id '
+        'LEFT JOIN (SELECT user_id, COUNT(id) AS badges_count FROM user_badges WHERE is_active GROUP BY user_id) '
+        'AS badges ON badges.user_id = users.id '
+        + (f'LEFT JOIN ({language_counts}) AS languages ON languages.user_id = users.id ' if language_counts else '') +
+        'WHERE NOT EXISTS (SELECT 1 FROM user_stats WHERE user_stats.user_id = users.id)'
+    ))
+    if not language_counts:
+        print(f"language_counts not backfilled on {bind.dialect.name}; run crud.rebuild_user_stats to fill them")
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    The backfilled rollups are indistinguishable from lazily created ones, so they are kept.
+    """
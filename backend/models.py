@@ -144,6 +144,18 @@ class LeaderboardEntry(BaseModel):
     favorite_language: str
     level: int
 
+class RankedPlayer(BaseModel):
+    """Leaderboard index entry: a player's rank and ranking fields."""
+    rank: int
+    nickname: str
+    avatar: Optional[str] = None
+    total_score: int
+    current_streak: int
+    level: int
+
+class PlayerRankResponse(RankedPlayer):
+    total_players: int
+
 # User Stats Models
 class UserStats(BaseModel):
     total_score: int
@@ -155,4 +167,26 @@ class UserStats(BaseModel):
     favorite_language: str
     total_rounds_won: int
     total_rounds_played: int
-    win_rate: float 
\ No newline at end of file
+    win_rate: float
+
+# Batch Ingestion Models
+class BatchScoreCreate(ScoreCreate):
+    nickname: str
+
+class BatchActivityCreate(ActivityCreate):
+    nickname: str
+
+class BatchSessionUpdate(GameSessionUpdate):
+    session_id: str
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item of a batch, by its position in the request."""
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[BatchItemResult]
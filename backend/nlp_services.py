@@ -10,13 +10,16 @@ from transformers import (
 )
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from scipy.spatial.distance import cosine
 import soundfile as sf
 import librosa
+import asyncio
 import tempfile
 import os
 from typing import Dict, List, Tuple, Optional
 import json
+from inference_batcher import INFERENCE_BATCHING, InferenceBatcher
+from onnx_backend import EMBEDDING_MODEL_NAME, NLP_BACKEND, load_onnx_model
+from embedding_cache import EmbeddingCache
 
 class EnhancedSentimentAnalyzer:
     """Enhanced sentiment and tone analysis using RoBERTa-based models"""
@@ -24,27 +27,51 @@ class EnhancedSentimentAnalyzer:
     def __init__(self):
         # Load sentiment model
         self.sentiment_model_name = "cardiffnlp/twitter-roberta-base-sentiment"
-        self.sentiment_tokenizer = AutoTokenizer.from_pretrained(self.sentiment_model_name)
-        self.sentiment_model = AutoModelForSequenceClassification.from_pretrained(self.sentiment_model_name)
+        self.sentiment_onnx = load_onnx_model(self.sentiment_model_name) if NLP_BACKEND == "onnx" else None
+        if self.sentiment_onnx is None:
+            self.sentiment_tokenizer = AutoTokenizer.from_pretrained(self.sentiment_model_name)
+            self.sentiment_model = AutoModelForSequenceClassification.from_pretrained(self.sentiment_model_name)
+        # Concurrent requests share forward passes
+        self.sentiment_batcher = InferenceBatcher(self._model_sentiment, name="sentiment-batcher") if INFERENCE_BATCHING else None
         
         # Tone classification labels
         self.tone_labels = ["polite", "passionate", "formal", "casual", "confrontational"]
         
     def analyze_sentiment(self, text: str) -> Dict[str, float]:
         """Analyze sentiment with confidence scores"""
-        inputs = self.sentiment_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = self.sentiment_model(**inputs)
-            probabilities = torch.softmax(outputs.logits, dim=1)
+        if self.sentiment_batcher:
+            return self.sentiment_batcher.infer(text)
+        return self._model_sentiment([text])[0]
+    
+    async def analyze_sentiment_async(self, text: str) -> Dict[str, float]:
+        """analyze_sentiment for async callers, without blocking the event loop"""
+        if self.sentiment_batcher:
+            return await self.sentiment_batcher.infer_async(text)
+        return await asyncio.to_thread(self.analyze_sentiment, text)
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Analyze many texts with one forward pass"""
+        return self._model_sentiment(texts) if texts else []
+    
+    def _model_sentiment(self, texts: List[str]) -> List[Dict[str, float]]:
+        """One padded forward pass of the sentiment model over texts"""
+        if self.sentiment_onnx is not None:
+            probabilities = self.sentiment_onnx.predict_proba(texts)
+        else:
+            inputs = self.sentiment_tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
+            with torch.no_grad():
+                outputs = self.sentiment_model(**inputs)
+                probabilities = torch.softmax(outputs.logits, dim=1).numpy()
         
         labels = ["negative", "neutral", "positive"]
-        scores = probabilities[0].numpy()
-        
-        return {
-            "sentiment": labels[np.argmax(scores)],
-            "confidence": float(np.max(scores)),
-            "scores": {label: float(score) for label, score in zip(labels, scores)}
-        }
+        results = []
+        for scores in probabilities:
+            results.append({
+                "sentiment": labels[np.argmax(scores)],
+                "confidence": float(np.max(scores)),
+                "scores": {label: float(score) for label, score in zip(labels, scores)}
+            })
+        return results
     
     def analyze_tone(self, text: str) -> Dict[str, any]:
         """Analyze tone characteristics"""
@@ -101,8 +128,12 @@ class ArgumentEvaluator:
     """Enhanced argument evaluation using semantic similarity"""
     
     def __init__(self):
-        # Load sentence transformer model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Load sentence transformer model; the ONNX encoder has the same encode()
+        self.model = load_onnx_model(EMBEDDING_MODEL_NAME) if NLP_BACKEND == "onnx" else None
+        if self.model is None:
+            self.model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        # Topics repeat for every player in a game, so they are embedded once and pinned
+        self.embeddings = EmbeddingCache(self._encode)
         
         # Pre-defined strong argument patterns
         self.strong_patterns = [
@@ -119,6 +150,24 @@ class ArgumentEvaluator:
     
     def evaluate_argument(self, argument: str, topic: str = None, tone: str = None) -> Dict[str, any]:
         """Evaluate argument strength and relevance"""
+        relevance_score = self._calculate_semantic_similarity(argument, topic) if topic else None
+        return self._score_argument(argument, relevance_score, tone)
+    
+    def evaluate_arguments_batch(self, arguments: List[str], topic: str = None,
+                                 tones: Optional[List[str]] = None) -> List[Dict[str, any]]:
+        """evaluate_argument for many arguments against one topic, with a single encoder pass over the uncached texts"""
+        tones = tones or [None] * len(arguments)
+        if topic and arguments:
+            relevance_scores = self._calculate_semantic_similarities(arguments, topic)
+        else:
+            relevance_scores = [None] * len(arguments)
+        return [
+            self._score_argument(argument, relevance_score, tone)
+            for argument, relevance_score, tone in zip(arguments, relevance_scores, tones)
+        ]
+    
+    def _score_argument(self, argument: str, relevance_score: Optional[float], tone: str = None) -> Dict[str, any]:
+        """Score an argument given its relevance to the topic (None without a topic)"""
         
         # Base score calculation
         base_score = 50
@@ -128,8 +177,7 @@ class ArgumentEvaluator:
         base_score += length_factor
         
         # Semantic relevance to topic (if provided)
-        if topic:
-            relevance_score = self._calculate_semantic_similarity(argument, topic)
+        if relevance_score is not None:
             base_score += relevance_score * 30
         
         # Tone impact
@@ -154,22 +202,28 @@ class ArgumentEvaluator:
             "score": int(final_score),
             "persuaded": persuaded,
             "feedback": feedback,
-            "relevance_score": relevance_score if topic else None,
+            "relevance_score": relevance_score,
             "tone_impact": tone_impact if tone else None
         }
     
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Unit-length embeddings of texts from one encoder call"""
+        vectors = np.asarray(self.model.encode(texts), dtype=np.float32)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    
     def _calculate_semantic_similarity(self, text1: str, text2: str) -> float:
-        """Calculate semantic similarity between two texts"""
+        """Calculate semantic similarity between two texts (text2 is the topic)"""
+        return self._calculate_semantic_similarities([text1], text2)[0]
+    
+    def _calculate_semantic_similarities(self, texts: List[str], topic: str) -> List[float]:
+        """Cosine similarity of each text to topic, as dot products of cached unit embeddings"""
         try:
-            embeddings1 = self.model.encode([text1])
-            embeddings2 = self.model.encode([text2])
-            
-            # Calculate cosine similarity
-            similarity = 1 - cosine(embeddings1[0], embeddings2[0])
-            return max(0, similarity)  # Ensure non-negative
+            vectors = self.embeddings.embed(list(texts) + [topic], pinned=[topic])
+            similarities = np.stack(vectors[:-1]) @ vectors[-1]
+            return [max(0.0, float(similarity)) for similarity in similarities]  # Ensure non-negative
         except Exception as e:
             print(f"Error calculating semantic similarity: {e}")
-            return 0.5  # Default neutral score
+            return [0.5] * len(texts)  # Default neutral score
     
     def _calculate_tone_impact(self, tone: str) -> float:
         """Calculate impact of tone on argument strength"""
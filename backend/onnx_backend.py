@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime backend for the encoder-only NLP models.
+
+The RoBERTa sentiment classifier and the MiniLM sentence encoder run a
+single encoder forward pass per batch, which eager PyTorch does slowly on
+CPU. This module exports them once to ONNX graphs (optionally with int8
+weights) and runs them with onnxruntime's CPU provider, which fuses the
+attention and layer-norm kernels and does not need torch at all.
+
+Set NLP_BACKEND=onnx to use the exported graphs (ONNX_INT8=true for the
+quantized ones). A model that has not been exported, or a missing
+onnxruntime, falls back to torch with a warning.
+
+Usage:
+    python onnx_backend.py export sentiment embeddings          # fp32 graphs
+    python onnx_backend.py export sentiment embeddings --int8   # also write int8 graphs
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NLP_BACKEND = os.getenv("NLP_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./model_cache/onnx")
+ONNX_INT8 = os.getenv("ONNX_INT8", "").lower() in ("1", "true", "yes")
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", 0))  # 0 lets onnxruntime use every core
+
+SENTIMENT_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+OPSET_VERSION = 17
+
+METADATA_FILE = "onnx_export.json"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model-int8.onnx"
+
+
+def onnx_model_path(model_name: str, model_dir: str = ONNX_MODEL_DIR) -> str:
+    """Directory holding a model's exported graphs, tokenizer and metadata"""
+    return os.path.join(model_dir, model_name.replace("/", "--"))
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+class OnnxModel:
+    """An exported encoder: its tokenizer and an onnxruntime CPU session"""
+
+    def __init__(self, path: str, int8: bool = ONNX_INT8):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+        self.max_length = self.metadata["max_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_NUM_THREADS:
+            options.intra_op_num_threads = ONNX_NUM_THREADS
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(path, INT8_FILE if int8 else FP32_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+
+    def _forward(self, texts: List[str]):
+        """(first graph output, attention mask) for one padded batch"""
+        encoded = self.tokenizer(texts, return_tensors="np", padding=True, truncation=True, max_length=self.max_length)
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feeds)[0], encoded["attention_mask"]
+
+
+class OnnxSequenceClassifier(OnnxModel):
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Class probabilities, one row per text"""
+        logits, _ = self._forward(texts)
+        return softmax(logits)
+
+
+class OnnxSentenceEncoder(OnnxModel):
+    """Drop-in for SentenceTransformer.encode: mean pooling over the token embeddings, then L2 normalization"""
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size)[0]
+        embeddings = []
+        for start in range(0, len(sentences), batch_size):
+            hidden, mask = self._forward(sentences[start:start + batch_size])
+            mask = mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.metadata.get("normalize"):
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings.append(pooled)
+        return np.concatenate(embeddings) if embeddings else np.zeros((0, self.metadata["dimension"]), dtype=np.float32)
+
+
+RUNTIMES = {"sequence-classification": OnnxSequenceClassifier, "sentence-embedding": OnnxSentenceEncoder}
+
+
+def load_onnx_model(model_name: str, model_dir: str = ONNX_MODEL_DIR, int8: bool = ONNX_INT8) -> Optional[OnnxModel]:
+    """The exported model for model_name, or None (logged) when it cannot be used so callers fall back to torch"""
+    path = onnx_model_path(model_name, model_dir)
+    try:
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            task = json.load(f)["task"]
+        model = RUNTIMES[task](path, int8=int8)
+        logger.info(f"Loaded ONNX {'int8' if int8 else 'fp32'} model for {model_name} from {path}")
+        return model
+    except Exception as e:
+        logger.warning(f"ONNX backend unavailable for {model_name}, falling back to torch: {e}")
+        return None
+
+
+def _export_graph(module, encoded: Dict, output_name: str, output_axes: Dict[int, str], path: str):
+    """torch.onnx.export of module(*encoded.values()) with dynamic batch and sequence axes"""
+    import torch
+
+    input_names = list(encoded)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = output_axes
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            tuple(encoded[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+            do_constant_folding=True,
+        )
+
+
+def _finish_export(tokenizer, output_dir: str, metadata: Dict, int8: bool):
+    tokenizer.save_pretrained(output_dir)
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(os.path.join(output_dir, FP32_FILE), os.path.join(output_dir, INT8_FILE), weight_type=QuantType.QInt8)
+    with open(os.path.join(output_dir, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def export_sequence_classifier(model, tokenizer, output_dir: str, int8: bool = False, max_length: int = 512):
+    """Export a transformers sequence classification model (logits output) to output_dir"""
+    import torch
+
+    class Logits(torch.nn.Module):
+        def __init__(self, model, input_names):
+            super().__init__()
+            self.model = model
+            self.input_names = input_names
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(self.input_names, inputs))).logits
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.eval()
+    encoded = dict(tokenizer(["An example sentence to trace the graph."], return_tensors="pt"))
+    _export_graph(Logits(model, list(encoded)), encoded, "logits", {0: "batch"}, os.path.join(output_dir, FP32_FILE))
+    _finish_export(tokenizer, output_dir, {
+        "task": "sequence-classification",
+        "max_length": max_length,
+        "labels": model.config.num_labels,
+        "opset": OPSET_VERSION,
+    }, int8)
+
+
+def export_sentence_encoder(sentence_model, output_dir: str, int8: bool = False):
+    """Export a mean-pooling SentenceTransformer's encoder (token embeddings output) to output_dir"""
+    import torch
+    from sentence_transformers import models
+
+    pooling = next(module for module in sentence_model if isinstance(module, models.Pooling))
+    if pooling.get_pooling_mode_str() != "mean":
+        raise ValueError(f"Only mean pooling is supported, not {pooling.get_pooling_mode_str()}")
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model, input_names):
+            super().__init__()
+            self.model = model
+            self.input_names = input_names
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(self.input_names, inputs))).last_hidden_state
+
+    os.makedirs(output_dir, exist_ok=True)
+    sentence_model.eval()
+    tokenizer = sentence_model.tokenizer
+    encoded = dict(tokenizer(["An example sentence to trace the graph."], return_tensors="pt"))
+    encoder = sentence_model[0].auto_model
+    _export_graph(TokenEmbeddings(encoder, list(encoded)), encoded, "last_hidden_state", {0: "batch", 1: "sequence"},
+                  os.path.join(output_dir, FP32_FILE))
+    _finish_export(tokenizer, output_dir, {
+        "task": "sentence-embedding",
+        "max_length": sentence_model.max_seq_length,
+        "dimension": sentence_model.get_sentence_embedding_dimension(),
+        "normalize": any(isinstance(module, models.Normalize) for module in sentence_model),
+        "opset": OPSET_VERSION,
+    }, int8)
+
+
+def export_model(which: str, model_dir: str = ONNX_MODEL_DIR, int8: bool = False) -> str:
+    """Download one of the app's encoder models and export it under model_dir; returns its directory"""
+    if which == "sentiment":
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        output_dir = onnx_model_path(SENTIMENT_MODEL_NAME, model_dir)
+        export_sequence_classifier(
+            AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME),
+            AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME),
+            output_dir, int8=int8,
+        )
+    else:
+        from sentence_transformers import SentenceTransformer
+        output_dir = onnx_model_path(EMBEDDING_MODEL_NAME, model_dir)
+        export_sentence_encoder(SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu"), output_dir, int8=int8)
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the encoder models to ONNX")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="export models to ONNX_MODEL_DIR")
+    export_parser.add_argument("models", nargs="+", choices=["sentiment", "embeddings"])
+    export_parser.add_argument("--int8", action="store_true", help="also write int8 dynamically quantized graphs")
+    export_parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+
+    for which in args.models:
+        output_dir = export_model(which, args.model_dir, int8=args.int8)
+        print(f"Exported {which} to {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,9 +11,9 @@ import os
 from datetime import datetime
 import random
 import json
-import threading
 import tempfile
 import re
+import time
 from typing import Dict, Optional, Any, AsyncGenerator
 
 # Set default encoding to UTF-8 for Windows compatibility
@@ -38,9 +38,11 @@ from services.ai_service import AIService
 
 # Database imports
 from sqlalchemy.orm import Session
-from database import get_db, engine, Base
+from database import get_db, commit_unit, engine, Base
 from crud import get_user_by_nickname, create_user, update_user_last_login
 from models import UserCreate, UserResponse
+from score_log import get_score_log
+from translation_cache import cached_translation, get_translation_cache, is_cacheable
 
 # Global variables for lazy-loaded models
 _nllb_model = None
@@ -275,6 +277,7 @@ class TranslationRequest(BaseModel):
 class TranslationResponse(BaseModel):
     translated_text: str
     details: Optional[Dict[str, Any]] = None
+    cached: bool = False
 
 class EvaluateRequest(BaseModel):
     argument: str
@@ -318,6 +321,11 @@ EXTERNAL_LANG_MAP = {
     'twi': 'ak', 'ak': 'ak', 'ewe': 'ee', 'gaa': 'gaa'
 }
 
+def libre_translated(translation):
+    """False for the apology messages libre_translate returns instead of a translation"""
+    return is_cacheable(translation) and not translation.startswith("Sorry, translation")
+
+@cached_translation("mymemory", is_valid=libre_translated)
 def libre_translate(text, source, target):
     """Lightweight translation using external APIs"""
     external_source = EXTERNAL_LANG_MAP.get(source, source)
@@ -394,6 +402,7 @@ def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     # Create user
     try:
         db_user = create_user(db, user)
+        commit_unit(db)
         return db_user
     except Exception as e:
         print(f"User creation error: {e}")
@@ -423,8 +432,7 @@ def update_user(nickname: str, user_data: dict = Body(...), db: Session = Depend
         if 'avatar_url' in user_data:
             user.avatar_url = user_data['avatar_url']
         
-        db.commit()
-        db.refresh(user)
+        commit_unit(db)
         return user
     except Exception as e:
         db.rollback()
@@ -440,6 +448,7 @@ def user_login(nickname: str, db: Session = Depends(get_db)):
     
     try:
         update_user_last_login(db, user.id)
+        commit_unit(db)
         return {"status": "success", "message": "Login recorded"}
     except Exception as e:
         print(f"Login update error: {e}")
@@ -554,19 +563,27 @@ async def translate_text(req: TranslationRequest):
     """Translate text using lightweight methods with AIService fallback"""
     try:
         # First try the primary translation method
-        translated = libre_translate(req.text, req.src_lang, req.tgt_lang)
+        translated, cached = libre_translate.with_status(req.text, req.src_lang, req.tgt_lang)
         
         # If the translation failed or returned an error message, try AIService
         if translated.startswith("[") and "error" in translated.lower():
             raise Exception("Primary translation service returned an error")
             
-        return TranslationResponse(translated_text=translated)
+        return TranslationResponse(translated_text=translated, cached=cached)
         
     except Exception as e:
         print(f"Primary translation failed, trying AIService fallback: {e}")
         try:
             # Try AIService as fallback
             ai_service = AIService()
+            translation_cache = get_translation_cache()
+            cached = translation_cache.get(req.text, req.src_lang, req.tgt_lang, "llm", ai_service.model)
+            if cached is not None:
+                return TranslationResponse(
+                    translated_text=cached,
+                    details={"source": "ai_service_fallback"},
+                    cached=True
+                )
             
             # Format the prompt for translation
             messages = [
@@ -582,6 +599,7 @@ async def translate_text(req: TranslationRequest):
             ]
             
             # Get translation from AI service
+            start = time.perf_counter()
             result = await ai_service.generate_response(
                 messages=messages,
                 temperature=0.3,  # Lower temperature for more consistent translations
@@ -592,6 +610,8 @@ async def translate_text(req: TranslationRequest):
                 translated = result['response'].strip()
                 # Remove any potential quotes or brackets from the response
                 translated = translated.strip('"\'[]')
+                translation_cache.put(req.text, req.src_lang, req.tgt_lang, "llm", ai_service.model, translated,
+                                      (time.perf_counter() - start) * 1000)
                 return TranslationResponse(
                     translated_text=translated,
                     details={"source": "ai_service_fallback"}
@@ -610,6 +630,11 @@ async def translate_text(req: TranslationRequest):
                 }
             )
 
+@app.get("/api/v1/translate/cache")
+def translation_cache_stats():
+    """Hit ratio, entries and milliseconds of translation saved by the translation cache"""
+    return get_translation_cache().summary()
+
 
 @app.post("/api/v1/evaluate", response_model=EvaluateResponse)
 async def evaluate_argument(req: EvaluateRequest):
@@ -951,9 +976,7 @@ def tts(text: str = Query(...), lang: str = Query("en")):
     except Exception as e:
         return {"error": str(e)}
 
-# Leaderboard functionality (lightweight)
-LEADERBOARD_FILE = 'leaderboard.json'
-LEADERBOARD_LOCK = threading.Lock()
+# Leaderboard functionality (lightweight): append-only score log with the top entries kept in memory
 
 class LeaderboardResponse(BaseModel):
     leaderboard: list
@@ -1007,15 +1030,7 @@ PROGRESSION_DATA = [
 @app.post('/api/v1/score')
 def submit_score(entry: ScoreEntry):
     """Submit score to leaderboard"""
-    with LEADERBOARD_LOCK:
-        if os.path.exists(LEADERBOARD_FILE):
-            with open(LEADERBOARD_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        else:
-            data = []
-        data.append(entry.dict())
-        with open(LEADERBOARD_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    get_score_log().append(entry.dict())
     return {'status': 'ok'}
 
 # Basic leaderboard endpoint - commented out to avoid conflicts with enhanced version
@@ -1038,30 +1053,28 @@ def get_leaderboard_enhanced(limit: int = 10, offset: int = 0, sort_by: str = 't
     # Mock leaderboard data for production
     mock_leaderboard = []
     
-    # Try to load existing leaderboard data
-    with LEADERBOARD_LOCK:
-        if os.path.exists(LEADERBOARD_FILE):
-            try:
-                with open(LEADERBOARD_FILE, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-                    # Convert old format to new format
-                    for i, entry in enumerate(existing_data[:limit]):
-                        mock_leaderboard.append({
-                            "rank": i + 1,
-                            "nickname": entry.get("name", f"Player{i+1}"),
-                            "avatar": f"https://api.dicebear.com/7.x/avataaars/svg?seed={entry.get('name', f'player{i+1}')}",
-                            "total_score": entry.get("score", 0),
-                            "highest_score": entry.get("score", 0),
-                            "games_played": max(1, entry.get("score", 0) // 100),
-                            "current_streak": max(1, entry.get("score", 0) // 50),
-                            "longest_streak": max(1, entry.get("score", 0) // 30),
-                            "badges_count": min(5, entry.get("score", 0) // 200),
-                            "last_activity": entry.get("date", datetime.now().isoformat()),
-                            "favorite_language": "twi",
-                            "level": max(1, entry.get("score", 0) // 100)
-                        })
-            except Exception as e:
-                print(f"Error reading leaderboard: {e}")
+    # Top entries come from memory, highest score first. Every sort field grows with the score,
+    # so that order serves all of them.
+    top_entries = get_score_log().top()
+    if sort_dir == 'asc':
+        top_entries = top_entries[::-1]
+    for i, entry in enumerate(top_entries[offset:offset + limit]):
+        mock_leaderboard.append({
+            "rank": offset + i + 1,
+            "nickname": entry.get("name", f"Player{offset+i+1}"),
+            "avatar": f"https://api.dicebear.com/7.x/avataaars/svg?seed={entry.get('name', f'player{offset+i+1}')}",
+            "total_score": entry.get("score", 0),
+            "highest_score": entry.get("score", 0),
+            "games_played": max(1, entry.get("score", 0) // 100),
+            "current_streak": max(1, entry.get("score", 0) // 50),
+            "longest_streak": max(1, entry.get("score", 0) // 30),
+            "badges_count": min(5, entry.get("score", 0) // 200),
+            "last_activity": entry.get("date", datetime.now().isoformat()),
+            "favorite_language": "twi",
+            "level": max(1, entry.get("score", 0) // 100)
+        })
+    if top_entries:
+        return mock_leaderboard
     
     # If no data exists, create some sample data
     if not mock_leaderboard:
@@ -1318,6 +1331,10 @@ async def startup_event():
         except Exception as e:
             print(f"⚠️ Database initialization warning: {e}")
             print("🔄 Continuing without database (will affect user validation)")
+
+        # Replay the score log so the first leaderboard request is served from memory
+        score_log = get_score_log()
+        print(f"🏆 Leaderboard loaded: {score_log.count} scores")
     except Exception as e:
         print(f"❌ Startup error: {e}")
         # Don't crash on startup errors
@@ -0,0 +1,41 @@
+"""
+Opaque cursor tokens for keyset pagination.
+
+A cursor carries the sort key of the last row a client has seen (plus
+whatever the endpoint needs to continue, such as the running rank). The next
+page is read with a range condition on that key, so its cost does not depend
+on how deep the client has paged. Endpoints return the token for the next
+page in the X-Next-Cursor response header.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """URL-safe token for a JSON-serializable payload (datetimes become ISO strings)"""
+    data = json.dumps(payload, separators=(",", ":"), default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Payload of a token from encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(data)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+def parse_cursor_time(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,106 @@
+"""
+Static progression stage catalog for LinguaQuest.
+
+The stage tree is defined once here instead of being copied into rows for
+every user. A user's progress is a single integer bitmask
+(user_progression.unlocked_stages) with one bit per stage. A stage keeps its
+bit forever: later catalog versions only add stages with new bits, so stored
+masks stay valid. Bump CATALOG_VERSION whenever the tree changes.
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy import Integer, case, literal
+
+CATALOG_VERSION = 1
+
+# Main stages in unlock order, each with its sub-stages; "unlocked" is the state of a new user
+STAGES = [
+    {
+        "id": "basics", "label": "Language Basics", "bit": 0, "unlocked": True,
+        "children": [
+            {"id": "basics_1", "label": "Introduction", "bit": 1, "unlocked": True},
+            {"id": "basics_2", "label": "Simple Phrases", "bit": 2, "unlocked": False},
+            {"id": "basics_3", "label": "Basic Grammar", "bit": 3, "unlocked": False},
+        ],
+    },
+    {
+        "id": "intermediate", "label": "Intermediate Skills", "bit": 4, "unlocked": False,
+        "children": [
+            {"id": "intermediate_1", "label": "Advanced Phrases", "bit": 5, "unlocked": False},
+            {"id": "intermediate_2", "label": "Complex Grammar", "bit": 6, "unlocked": False},
+        ],
+    },
+    {
+        "id": "advanced", "label": "Advanced Topics", "bit": 7, "unlocked": False,
+        "children": [
+            {"id": "advanced_1", "label": "Idiomatic Expressions", "bit": 8, "unlocked": False},
+            {"id": "advanced_2", "label": "Cultural Context", "bit": 9, "unlocked": False},
+        ],
+    },
+    {
+        "id": "mastery", "label": "Language Mastery", "bit": 10, "unlocked": False,
+        "children": [
+            {"id": "mastery_1", "label": "Native-like Fluency", "bit": 11, "unlocked": False},
+            {"id": "mastery_2", "label": "Professional Usage", "bit": 12, "unlocked": False},
+        ],
+    },
+]
+
+STAGE_BITS: Dict[str, int] = {}
+PARENTS: Dict[str, str] = {}
+CHILDREN: Dict[str, List[str]] = {}
+MAIN_STAGES: List[str] = []
+for _stage in STAGES:
+    MAIN_STAGES.append(_stage["id"])
+    STAGE_BITS[_stage["id"]] = 1 << _stage["bit"]
+    CHILDREN[_stage["id"]] = [child["id"] for child in _stage["children"]]
+    for _child in _stage["children"]:
+        STAGE_BITS[_child["id"]] = 1 << _child["bit"]
+        PARENTS[_child["id"]] = _stage["id"]
+SUB_STAGES = list(PARENTS)
+
+
+def stage_mask(stage_ids: Iterable[str]) -> int:
+    mask = 0
+    for stage_id in stage_ids:
+        mask |= STAGE_BITS[stage_id]
+    return mask
+
+
+DEFAULT_UNLOCKED = stage_mask(
+    stage["id"] for main in STAGES for stage in [main] + main["children"] if stage["unlocked"]
+)
+
+
+def is_unlocked(mask: int, stage_id: str) -> bool:
+    return bool(mask & STAGE_BITS[stage_id])
+
+
+def _opens(stage_id: str) -> int:
+    """A stage's own bit, plus its first sub-stage for a main stage"""
+    children = CHILDREN.get(stage_id)
+    return STAGE_BITS[stage_id] | (STAGE_BITS[children[0]] if children else 0)
+
+
+def unlock_expression(mask, stage_id: str):
+    """SQL expression for mask after unlocking stage_id and the stages that opens.
+
+    Unlocking a main stage also unlocks its first sub-stage. Once every
+    sub-stage of a main stage is unlocked, the first locked main stage is
+    unlocked too, with its first sub-stage. Being a single expression over
+    the stored mask, the whole cascade is one atomic UPDATE.
+    """
+    unlocked = mask.bitwise_or(literal(_opens(stage_id), Integer))
+    parent = PARENTS.get(stage_id)
+    if parent is None:
+        return unlocked
+    siblings = stage_mask(CHILDREN[parent])
+    next_main = case(
+        *[(unlocked.bitwise_and(STAGE_BITS[main]) == 0, _opens(main)) for main in MAIN_STAGES],
+        else_=0
+    )
+    return case(
+        (unlocked.bitwise_and(siblings) == siblings, unlocked.bitwise_or(next_main)),
+        else_=unlocked
+    )
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from database import get_db, User, UserStreak, UserScore, UserActivity
+from database import get_async_db, User, UserStreak, UserScore
+from activity_store import commit_with_activities, get_activity_store
+from leaderboard_index import queue_leaderboard_update
+from async_crud import get_user_by_nickname, get_user_streak as get_streak_record, get_user_total_xp as get_total_xp, record_score_stats, record_language_xp, record_daily_score
 import json
 
 router = APIRouter()
@@ -22,9 +24,6 @@ class StreakInfo(BaseModel):
     xp_multiplier: float
 
 # Helper functions
-def get_user_by_nickname(db: Session, nickname: str) -> Optional[User]:
-    return db.query(User).filter(User.nickname == nickname).first()
-
 def calculate_streak_multiplier(streak: int) -> float:
     """Calculate XP multiplier based on streak length"""
     if streak >= 30:
@@ -35,9 +34,9 @@ def calculate_streak_multiplier(streak: int) -> float:
         return 1.25  # 1.25x multiplier for 7+ day streak
     return 1.0
 
-def get_or_create_user_streak(db: Session, user_id: int) -> UserStreak:
+async def get_or_create_user_streak(db: AsyncSession, user_id: int) -> UserStreak:
     """Get or create a streak record for a user"""
-    streak = db.query(UserStreak).filter(UserStreak.user_id == user_id).first()
+    streak = await get_streak_record(db, user_id)
     if not streak:
         streak = UserStreak(
             user_id=user_id,
@@ -46,19 +45,20 @@ def get_or_create_user_streak(db: Session, user_id: int) -> UserStreak:
             last_activity_date=datetime.utcnow() - timedelta(days=1)  # Set to yesterday to allow first streak today
         )
         db.add(streak)
-        db.commit()
-        db.refresh(streak)
+        await db.commit()
+        await db.refresh(streak)
     return streak
 
-def update_streak(db: Session, user_id: int, force_reset: bool = False) -> UserStreak:
+async def update_streak(db: AsyncSession, user_id: int, force_reset: bool = False) -> UserStreak:
     """Update user's streak based on activity"""
-    streak = get_or_create_user_streak(db, user_id)
+    streak = await get_or_create_user_streak(db, user_id)
     now = datetime.utcnow()
     
     if force_reset:
         streak.current_streak = 1
         streak.last_activity_date = now
-        db.commit()
+        queue_leaderboard_update(db, user_id, current_streak=streak.current_streak)
+        await db.commit()
         return streak
     
     # Calculate days since last activity
@@ -78,14 +78,15 @@ def update_streak(db: Session, user_id: int, force_reset: bool = False) -> UserS
         streak.current_streak = 1
     
     streak.last_activity_date = now
-    db.commit()
-    db.refresh(streak)
+    queue_leaderboard_update(db, user_id, current_streak=streak.current_streak)
+    await db.commit()
+    await db.refresh(streak)
     return streak
 
-def add_xp(db: Session, user_id: int, xp_amount: int, activity_type: str, details: dict = None) -> UserScore:
+async def add_xp(db: AsyncSession, user_id: int, xp_amount: int, activity_type: str, details: dict = None) -> UserScore:
     """Add XP to user's score with streak multiplier"""
     # Get current streak
-    streak = get_or_create_user_streak(db, user_id)
+    streak = await get_or_create_user_streak(db, user_id)
     multiplier = calculate_streak_multiplier(streak.current_streak)
     
     # Calculate XP with streak multiplier
@@ -98,33 +99,31 @@ def add_xp(db: Session, user_id: int, xp_amount: int, activity_type: str, detail
         language="system",  # Use 'system' for XP entries
         category=activity_type
     )
+    await record_score_stats(db, user_id, final_xp, score.language)
+    await record_language_xp(db, user_id, score.language, final_xp)
+    await record_daily_score(db, user_id, score.language, final_xp)
     db.add(score)
     
     # Create activity record
-    activity = UserActivity(
-        user_id=user_id,
-        activity_type=activity_type,
-        details={
-            "xp_base": xp_amount,
-            "xp_multiplier": multiplier,
-            "xp_final": final_xp,
-            **(details or {})
-        }
-    )
-    db.add(activity)
-    
-    db.commit()
-    db.refresh(score)
+    get_activity_store().append(db, user_id, activity_type, {
+        "xp_base": xp_amount,
+        "xp_multiplier": multiplier,
+        "xp_final": final_xp,
+        **(details or {})
+    })
+    
+    await commit_with_activities(db)
+    await db.refresh(score)
     return score
 
 @router.get("/streak/{nickname}", response_model=StreakInfo)
-async def get_user_streak(nickname: str, db: Session = Depends(get_db)):
+async def get_user_streak(nickname: str, db: AsyncSession = Depends(get_async_db)):
     """Get user's current streak information"""
-    user = get_user_by_nickname(db, nickname)
+    user = await get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    streak = get_or_create_user_streak(db, user.id)
+    streak = await get_or_create_user_streak(db, user.id)
     next_activity = streak.last_activity_date + timedelta(days=1)
     
     return StreakInfo(
@@ -136,13 +135,13 @@ async def get_user_streak(nickname: str, db: Session = Depends(get_db)):
     )
 
 @router.post("/streak/{nickname}/update")
-async def update_user_streak(nickname: str, db: Session = Depends(get_db)):
+async def update_user_streak(nickname: str, db: AsyncSession = Depends(get_async_db)):
     """Update user's streak"""
-    user = get_user_by_nickname(db, nickname)
+    user = await get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    streak = update_streak(db, user.id)
+    streak = await update_streak(db, user.id)
     return {
         "current_streak": streak.current_streak,
         "longest_streak": streak.longest_streak,
@@ -150,17 +149,17 @@ async def update_user_streak(nickname: str, db: Session = Depends(get_db)):
     }
 
 @router.post("/xp/{nickname}/add")
-async def add_user_xp(nickname: str, xp_update: XPUpdate, db: Session = Depends(get_db)):
+async def add_user_xp(nickname: str, xp_update: XPUpdate, db: AsyncSession = Depends(get_async_db)):
     """Add XP to user's total and update streak"""
-    user = get_user_by_nickname(db, nickname)
+    user = await get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update streak first
-    streak = update_streak(db, user.id)
+    streak = await update_streak(db, user.id)
     
     # Add XP with current streak multiplier
-    score = add_xp(
+    score = await add_xp(
         db,
         user.id,
         xp_update.xp_amount,
@@ -175,15 +174,13 @@ async def add_user_xp(nickname: str, xp_update: XPUpdate, db: Session = Depends(
     }
 
 @router.get("/xp/{nickname}/total")
-async def get_user_total_xp(nickname: str, db: Session = Depends(get_db)):
+async def get_user_total_xp(nickname: str, db: AsyncSession = Depends(get_async_db)):
     """Get user's total XP"""
-    user = get_user_by_nickname(db, nickname)
+    user = await get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    total_xp = db.query(func.sum(UserScore.score)).filter(
-        UserScore.user_id == user.id
-    ).scalar() or 0
+    total_xp = await get_total_xp(db, user.id)
     
     return {
         "total_xp": total_xp,
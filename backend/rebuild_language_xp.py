@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-language XP counters for LinguaQuest
+Recomputes user_language_xp and language_totals from user_scores in bulk.
+Use after importing scores outside of the CRUD layer.
+
+Usage:
+    python rebuild_language_xp.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import init_db, SessionLocal
+from crud import rebuild_language_xp
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        counts = rebuild_language_xp(db)
+    finally:
+        db.close()
+
+    print(f"Language XP rebuilt: {counts['counters']} user/language counter(s) across {counts['languages']} language(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_stats rollup table for LinguaQuest
+Recomputes every user's stats from the raw score, session and badge tables and reports drift.
+
+Usage:
+    python rebuild_user_stats.py          # rewrite the rollup, reporting any drift it corrected
+    python rebuild_user_stats.py --check  # only report drift; exits with status 1 if any is found
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import init_db, SessionLocal
+from crud import rebuild_user_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the user_stats rollup table")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        drift = rebuild_user_stats(db, check_only=args.check)
+    finally:
+        db.close()
+
+    for entry in drift:
+        print(f"user {entry['user_id']}: {entry['field']} stored={entry['stored']} expected={entry['expected']}")
+    drifted_users = len({entry["user_id"] for entry in drift})
+    if args.check:
+        print(f"Drift check completed: {drifted_users} user(s) out of sync")
+        return 1 if drift else 0
+    print(f"User stats rebuilt: {drifted_users} user(s) corrected")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Reconcile the stored streaks for LinguaQuest
+Recomputes every user's current and longest streak from the days they were active
+(set-based SQL) and resets expired streaks. The API server runs the same job nightly;
+use this script to run it from cron instead, or to check for drift.
+
+Usage:
+    python reconcile_streaks.py          # update the streaks, reporting the drift it corrected
+    python reconcile_streaks.py --check  # only report drift; exits with status 1 if any is found
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import init_db, SessionLocal
+from crud import reconcile_streaks
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the stored streaks")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        drift = reconcile_streaks(db, check_only=args.check)
+    finally:
+        db.close()
+
+    for entry in drift:
+        print(f"user {entry['user_id']}: {entry['field']} stored={entry['stored']} expected={entry['expected']}")
+    drifted_users = len({entry["user_id"] for entry in drift})
+    if args.check:
+        print(f"Streak check completed: {drifted_users} user(s) out of sync")
+        return 1 if drift else 0
+    print(f"Streaks reconciled: {drifted_users} user(s) corrected")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,7 @@ class TranslationResponse(BaseModel):
     target_language: str
     detected_language: Optional[str] = None
     confidence: Optional[float] = None
+    cached: bool = False
     error: Optional[str] = None
 
 class EvaluationRequest(BaseModel):
@@ -84,7 +85,8 @@ async def translate_text(request: TranslationRequest):
             'source_language': request.source_language,
             'target_language': request.target_language,
             'detected_language': result.get('detected_language'),
-            'confidence': result.get('confidence')
+            'confidence': result.get('confidence'),
+            'cached': result.get('cached', False)
         }
         
     except Exception as e:
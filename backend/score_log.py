@@ -0,0 +1,169 @@
+"""
+Append-only score log with an in-memory top-K leaderboard.
+
+Every submitted score is appended as one NDJSON line to LEADERBOARD_LOG_FILE.
+A bounded min-heap of the LEADERBOARD_TOP_K best entries is kept current
+on every append, so leaderboard reads never touch the disk.
+
+Compaction folds the log into a snapshot: the current top-K plus the log
+offset it covers. The snapshot is written to a temporary file and renamed
+into place. On startup the snapshot is loaded and only the log tail after
+it is replayed. The log itself is never rewritten. A torn last line from a
+crash mid-write is cut off on startup, and everything before it is kept.
+"""
+
+import heapq
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+LEADERBOARD_LOG_FILE = os.getenv("LEADERBOARD_LOG_FILE", "leaderboard.ndjson")
+LEADERBOARD_LEGACY_FILE = os.getenv("LEADERBOARD_FILE", "leaderboard.json")
+LEADERBOARD_TOP_K = int(os.getenv("LEADERBOARD_TOP_K", 1000))
+LEADERBOARD_COMPACT_EVERY = int(os.getenv("LEADERBOARD_COMPACT_EVERY", 10000))
+LEADERBOARD_LOG_FSYNC = os.getenv("LEADERBOARD_LOG_FSYNC", "").lower() in ("1", "true", "yes")
+
+
+class ScoreLog:
+    """NDJSON score history plus the best top_k entries, highest score first (ties go to the earlier entry)"""
+
+    def __init__(self, path: str = LEADERBOARD_LOG_FILE, top_k: int = LEADERBOARD_TOP_K,
+                 compact_every: int = LEADERBOARD_COMPACT_EVERY, fsync: bool = LEADERBOARD_LOG_FSYNC,
+                 legacy_path: Optional[str] = LEADERBOARD_LEGACY_FILE):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.top_k = top_k
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        # Min-heap of (score, -sequence, entry): the root is the entry to evict next
+        self._heap: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._top: Optional[List[Dict[str, Any]]] = None
+        self.count = 0
+        self._since_compaction = 0
+
+        if legacy_path and not os.path.exists(path) and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self._load()
+        self._log = open(path, "ab")
+
+    # Startup
+    def _import_legacy(self, legacy_path: str):
+        """Convert the old JSON array leaderboard into a log (the JSON file is left as is)"""
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            for entry in entries:
+                f.write(self._encode(entry))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def _load(self):
+        start = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            # A snapshot past the end of the log belongs to a different log; replay from scratch
+            if os.path.exists(self.path) and snapshot["offset"] <= os.path.getsize(self.path):
+                start = snapshot["offset"]
+                self.count = snapshot["count"]
+                self._heap = [(entry["score"], -sequence, entry) for sequence, entry in snapshot["top"]]
+                heapq.heapify(self._heap)
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            good_end = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                good_end += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    print(f"Skipping unreadable leaderboard log line ending at byte {good_end}")
+                    continue
+                self._push(entry)
+        if good_end < os.path.getsize(self.path):
+            # Torn write from a crash: drop the partial tail so the next append starts on a clean line
+            print(f"Truncating torn leaderboard log tail at byte {good_end}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+
+    # Writes
+    @staticmethod
+    def _encode(entry: Dict[str, Any]) -> bytes:
+        return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def _push(self, entry: Dict[str, Any]):
+        self.count += 1
+        item = (entry["score"], -self.count, entry)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+        else:
+            return
+        self._top = None
+
+    def append(self, entry: Dict[str, Any]):
+        """Durably append one score entry ({"name", "score", "date"}) and update the top entries"""
+        line = self._encode(entry)
+        with self._lock:
+            self._log.write(line)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._push(entry)
+            self._since_compaction += 1
+            if self.compact_every and self._since_compaction >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Snapshot the top entries and the log offset they cover"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        snapshot = {
+            "offset": self._log.tell(),
+            "count": self.count,
+            "top": [[-negated_sequence, entry] for _, negated_sequence, entry in self._heap],
+        }
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        self._since_compaction = 0
+
+    # Reads
+    def top(self) -> List[Dict[str, Any]]:
+        """The best entries, highest score first"""
+        with self._lock:
+            if self._top is None:
+                self._top = [entry for _, _, entry in sorted(self._heap, reverse=True)]
+            return self._top
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+
+
+_score_log: Optional[ScoreLog] = None
+_score_log_lock = threading.Lock()
+
+
+def get_score_log() -> ScoreLog:
+    """Process-wide score log, loaded on first use"""
+    global _score_log
+    if _score_log is None:
+        with _score_log_lock:
+            if _score_log is None:
+                _score_log = ScoreLog()
+    return _score_log
@@ -1,9 +1,12 @@
 import os
+import time
 import requests
 from typing import Optional, Dict, Any
 import logging
 from dotenv import load_dotenv
 
+from translation_cache import get_translation_cache
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -90,7 +93,8 @@ class TranslationService:
             api_url: Optional custom API URL (for private instances)
             
         Returns:
-            Dictionary containing the translation result or error information
+            Dictionary containing the translation result or error information,
+            with 'cached' telling whether it came from the translation cache
         """
         # Map internal language codes to LibreTranslate codes
         source_lang = self.LANGUAGE_MAPPING.get(source_lang.lower(), source_lang)
@@ -126,18 +130,39 @@ class TranslationService:
         # Use custom API URL if provided, otherwise use the default
         url = api_url or self.TRANSLATE_ENDPOINT
         
+        # Auto-detected sources need the detection result, which is not cached
+        cache = get_translation_cache() if source_lang != 'auto' else None
+        engine = f"libretranslate-{format}"
+        if cache:
+            cached = cache.get(text, source_lang, target_lang, engine, url)
+            if cached is not None:
+                return {
+                    'success': True,
+                    'translated_text': cached,
+                    'source_language': source_lang,
+                    'target_language': target_lang,
+                    'detected_language': source_lang,
+                    'confidence': 1.0,
+                    'cached': True
+                }
+        
         try:
+            start = time.perf_counter()
             response = requests.post(url, json=payload)
             response.raise_for_status()
             result = response.json()
+            translated_text = result.get('translatedText', '')
+            if cache:
+                cache.put(text, source_lang, target_lang, engine, url, translated_text, (time.perf_counter() - start) * 1000)
             
             return {
                 'success': True,
-                'translated_text': result.get('translatedText', ''),
+                'translated_text': translated_text,
                 'source_language': source_lang,
                 'target_language': target_lang,
                 'detected_language': result.get('detectedLanguage', {}).get('language', source_lang),
-                'confidence': result.get('detectedLanguage', {}).get('confidence', 1.0)
+                'confidence': result.get('detectedLanguage', {}).get('confidence', 1.0),
+                'cached': False
             }
             
         except requests.exceptions.RequestException as e:
@@ -1,15 +1,12 @@
-import torch
-from transformers import (
-    AutoTokenizer, 
-    AutoModelForSequenceClassification,
-    AutoModelForSeq2SeqLM
-)
+import asyncio
 import numpy as np
 import json
 import tempfile
 import os
 from typing import Dict, List, Tuple, Optional
 import re
+from inference_batcher import INFERENCE_BATCHING, InferenceBatcher
+from onnx_backend import NLP_BACKEND, load_onnx_model
 
 class SimpleSentimentAnalyzer:
     """Simplified sentiment and tone analysis using basic NLP techniques"""
@@ -18,12 +15,21 @@ class SimpleSentimentAnalyzer:
         # Use a simpler sentiment model that's more likely to be available
         try:
             self.sentiment_model_name = "cardiffnlp/twitter-roberta-base-sentiment"
-            self.sentiment_tokenizer = AutoTokenizer.from_pretrained(self.sentiment_model_name)
-            self.sentiment_model = AutoModelForSequenceClassification.from_pretrained(self.sentiment_model_name)
+            # With NLP_BACKEND=onnx torch is never imported unless the exported model is missing
+            self.sentiment_onnx = load_onnx_model(self.sentiment_model_name) if NLP_BACKEND == "onnx" else None
+            if self.sentiment_onnx is None:
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                self.sentiment_tokenizer = AutoTokenizer.from_pretrained(self.sentiment_model_name)
+                self.sentiment_model = AutoModelForSequenceClassification.from_pretrained(self.sentiment_model_name)
             self.use_model = True
         except Exception as e:
             print(f"Could not load sentiment model: {e}")
             self.use_model = False
+        # Concurrent requests share forward passes
+        self.sentiment_batcher = (
+            InferenceBatcher(self._model_sentiment, name="sentiment-batcher")
+            if self.use_model and INFERENCE_BATCHING else None
+        )
         
         # Tone classification patterns
         self.tone_patterns = {
@@ -38,25 +44,57 @@ class SimpleSentimentAnalyzer:
         """Analyze sentiment with confidence scores"""
         if self.use_model:
             try:
-                inputs = self.sentiment_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-                with torch.no_grad():
-                    outputs = self.sentiment_model(**inputs)
-                    probabilities = torch.softmax(outputs.logits, dim=1)
-                
-                labels = ["negative", "neutral", "positive"]
-                scores = probabilities[0].numpy()
-                
-                return {
-                    "sentiment": labels[np.argmax(scores)],
-                    "confidence": float(np.max(scores)),
-                    "scores": {label: float(score) for label, score in zip(labels, scores)}
-                }
+                if self.sentiment_batcher:
+                    return self.sentiment_batcher.infer(text)
+                return self._model_sentiment([text])[0]
             except Exception as e:
                 print(f"Model sentiment analysis failed: {e}")
         
         # Fallback to rule-based sentiment analysis
         return self._rule_based_sentiment(text)
     
+    async def analyze_sentiment_async(self, text: str) -> Dict[str, any]:
+        """analyze_sentiment for async callers, without blocking the event loop"""
+        if self.sentiment_batcher:
+            try:
+                return await self.sentiment_batcher.infer_async(text)
+            except Exception as e:
+                print(f"Model sentiment analysis failed: {e}")
+            return self._rule_based_sentiment(text)
+        if self.use_model:
+            return await asyncio.to_thread(self.analyze_sentiment, text)
+        return self.analyze_sentiment(text)
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        """Analyze many texts with one forward pass"""
+        if self.use_model and texts:
+            try:
+                return self._model_sentiment(texts)
+            except Exception as e:
+                print(f"Model sentiment analysis failed: {e}")
+        return [self._rule_based_sentiment(text) for text in texts]
+    
+    def _model_sentiment(self, texts: List[str]) -> List[Dict[str, any]]:
+        """One padded forward pass of the sentiment model over texts"""
+        if self.sentiment_onnx is not None:
+            probabilities = self.sentiment_onnx.predict_proba(texts)
+        else:
+            import torch
+            inputs = self.sentiment_tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
+            with torch.no_grad():
+                outputs = self.sentiment_model(**inputs)
+                probabilities = torch.softmax(outputs.logits, dim=1).numpy()
+        
+        labels = ["negative", "neutral", "positive"]
+        results = []
+        for scores in probabilities:
+            results.append({
+                "sentiment": labels[np.argmax(scores)],
+                "confidence": float(np.max(scores)),
+                "scores": {label: float(score) for label, score in zip(labels, scores)}
+            })
+        return results
+    
     def _rule_based_sentiment(self, text: str) -> Dict[str, any]:
         """Rule-based sentiment analysis as fallback"""
         text_lower = text.lower()
@@ -191,6 +229,12 @@ class SimpleArgumentEvaluator:
             "tone_impact": tone_impact if tone else None
         }
     
+    def evaluate_arguments_batch(self, arguments: List[str], topic: str = None,
+                                 tones: Optional[List[str]] = None) -> List[Dict[str, any]]:
+        """evaluate_argument for many arguments against one topic"""
+        tones = tones or [None] * len(arguments)
+        return [self.evaluate_argument(argument, topic, tone) for argument, tone in zip(arguments, tones)]
+    
     def _calculate_topic_relevance(self, argument: str, topic: str) -> float:
         """Calculate topic relevance using keyword matching"""
         argument_lower = argument.lower()
@@ -0,0 +1,72 @@
+"""
+Nightly streak reconciliation for LinguaQuest.
+
+Streaks only change when a user calls a streak endpoint, so someone who stops
+playing keeps their streak on the leaderboards until they come back. The
+reconciler runs crud.reconcile_streaks once at startup and then every day at
+STREAK_RECONCILE_HOUR (UTC), so expired streaks are reset in bulk and reads
+can serve the stored values. The job is idempotent, so several workers
+running it is harmless; it can also be run from cron with reconcile_streaks.py.
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+STREAK_RECONCILE = os.getenv("STREAK_RECONCILE", "true").lower() in ("1", "true", "yes")
+STREAK_RECONCILE_HOUR = int(os.getenv("STREAK_RECONCILE_HOUR", 0))
+
+
+def seconds_until_next_run(now: datetime, hour: int) -> float:
+    """Seconds from now (UTC) until the next time the clock reaches hour:00"""
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+class StreakReconciler:
+    """Runs the streak reconciliation job on a daily schedule"""
+
+    def __init__(self, hour: int = STREAK_RECONCILE_HOUR):
+        self.hour = hour
+        self.runs = 0
+        self.last_drift: Optional[List[Dict[str, Any]]] = None
+        self._stopped = threading.Event()
+
+    def run(self, bind) -> List[Dict[str, Any]]:
+        """Reconcile every streak now; returns the drift that was corrected"""
+        # crud imports the leaderboard modules that import the database engine
+        from crud import reconcile_streaks
+        with Session(bind=bind) as db:
+            drift = reconcile_streaks(db)
+        self.runs += 1
+        self.last_drift = drift
+        return drift
+
+    def start(self, bind):
+        """Reconcile now and then daily at hour:00 UTC on a daemon thread"""
+        def reconcile_daily():
+            delay = 0
+            while not self._stopped.wait(delay):
+                try:
+                    drift = self.run(bind)
+                    print(f"Streak reconciliation: {len({entry['user_id'] for entry in drift})} user(s) corrected")
+                except Exception as e:
+                    print(f"Streak reconciliation failed: {e}")
+                delay = seconds_until_next_run(datetime.utcnow(), self.hour)
+
+        threading.Thread(target=reconcile_daily, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_streak_reconciler = StreakReconciler()
+
+
+def get_streak_reconciler() -> StreakReconciler:
+    return _streak_reconciler
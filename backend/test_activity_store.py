@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only activity log store
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import activity_store
+from activity_store import LogActivityStore, SEALED_SUFFIX, ACTIVE_SUFFIX
+from crud import create_user, create_activity, create_activities, get_user_activities
+from models import UserCreate, ActivityCreate
+from write_queue import WriteQueue
+
+
+def fill(store, users=3, per_user=100, start=None):
+    start = start or datetime(2024, 1, 1)
+    for i in range(per_user):
+        for user_id in range(1, users + 1):
+            store.append(None, user_id, "game_end", {"round": i}, start + timedelta(minutes=i))
+
+
+def segment_files(store):
+    return sorted(os.listdir(store.segments_dir))
+
+
+def test_latest_activities_across_rotated_segments(tmp_path):
+    store = LogActivityStore(str(tmp_path), segment_bytes=2048)
+    fill(store)
+
+    assert any(name.endswith(SEALED_SUFFIX) for name in segment_files(store))
+    latest = store.get_user_activities(None, 2, limit=150)
+    assert [activity.details["round"] for activity in latest] == list(range(99, -1, -1))
+    assert {activity.user_id for activity in latest} == {2}
+    assert latest[0].timestamp == datetime(2024, 1, 1) + timedelta(minutes=99)
+
+    older = store.get_user_activities(None, 2, limit=3, before=(latest[9].timestamp, latest[9].id))
+    assert [activity.details["round"] for activity in older] == [89, 88, 87]
+
+
+def test_recovers_torn_write_and_lost_index(tmp_path):
+    store = LogActivityStore(str(tmp_path), segment_bytes=2048)
+    fill(store, per_user=40)
+    active = os.path.join(store.segments_dir, store._active_name + ACTIVE_SUFFIX)
+    store.close()
+
+    with open(active, "ab") as f:
+        f.write(b'{"id": 99999, "user_id": 1, "activ')
+    os.remove(os.path.join(str(tmp_path), "index.db"))
+
+    store = LogActivityStore(str(tmp_path), segment_bytes=2048)
+    assert len(store.get_user_activities(None, 1, limit=100)) == 40
+    appended = store.append(None, 1, "login", {})
+    assert appended.id == 121
+    assert store.get_user_activities(None, 1, limit=1)[0].activity_type == "login"
+
+
+def test_compact_and_archive(tmp_path):
+    store = LogActivityStore(str(tmp_path), segment_bytes=1024)
+    fill(store, per_user=60, start=datetime.utcnow() - timedelta(days=200))
+    store.rotate()
+    sealed_before = len(store.sealed_segments())
+
+    assert store.compact(target_bytes=64 * 1024) == sealed_before - 1
+    assert len(store.sealed_segments()) == 1
+    assert len(store.get_user_activities(None, 3, limit=100)) == 60
+
+    fill(store, per_user=5, start=datetime.utcnow())
+    archived = store.archive(datetime.utcnow() - timedelta(days=90))
+    assert len(archived) == 1
+    assert os.listdir(store.archive_dir) == [archived[0] + SEALED_SUFFIX]
+    assert [activity.details["round"] for activity in store.get_user_activities(None, 3)] == [4, 3, 2, 1, 0]
+
+
+def test_crud_uses_configured_store(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(activity_store, "_activity_store", LogActivityStore(str(tmp_path / "log")))
+    user = create_user(db, UserCreate(nickname="ama"))
+
+    create_activity(db, user.id, ActivityCreate(activity_type="login", details={"device": "web"}))
+
+    activities = get_user_activities(db, user.id)
+    assert [(activity.activity_type, activity.details) for activity in activities] == [("login", {"device": "web"})]
+    assert db.execute(activity_store.UserActivity.__table__.select()).first() is None
+
+
+def test_append_many_writes_one_batch(tmp_path):
+    store = LogActivityStore(str(tmp_path), segment_bytes=2048)
+    store.append(None, 1, "login", {})
+
+    ids = store.append_many(None, [(1, "lesson", {"unit": 1}), (2, "lesson", None), (1, "quiz", {})])
+
+    assert ids == [2, 3, 4]
+    assert [activity.activity_type for activity in store.get_user_activities(None, 1)] == ["quiz", "lesson", "login"]
+    store.close()
+    # The batch is recovered from the segment like single appends
+    os.remove(os.path.join(str(tmp_path), "index.db"))
+    store = LogActivityStore(str(tmp_path), segment_bytes=2048)
+    assert store.get_user_activities(None, 2)[0].id == 3
+    assert store.append(None, 2, "login", {}).id == 5
+
+
+def test_log_records_wait_for_commit(db, tmp_path, monkeypatch):
+    store = LogActivityStore(str(tmp_path / "log"))
+    monkeypatch.setattr(activity_store, "_activity_store", store)
+    user = create_user(db, UserCreate(nickname="kofi"))
+
+    store.append(db, user.id, "login", {"attempt": 1})
+    assert store.get_user_activities(db, user.id) == []
+    db.rollback()
+    db.commit()
+    assert store.get_user_activities(db, user.id) == []
+
+    # A write queue batch that fails is retried one intent at a time; the activity is logged once
+    def fail(session):
+        raise RuntimeError("constraint violated")
+
+    queue = WriteQueue(bind=db.get_bind(), max_delay_ms=200)
+    try:
+        logged = queue.submit(create_activity, user.id, ActivityCreate(activity_type="login", details={"attempt": 2}))
+        failed = queue.submit(fail)
+        logged.result()
+        with pytest.raises(RuntimeError):
+            failed.result()
+    finally:
+        queue.stop()
+    assert queue.stats["batches"] == 1
+    assert [activity.details for activity in store.get_user_activities(db, user.id)] == [{"attempt": 2}]
+
+
+
+def test_batched_log_records_wait_for_commit(db, tmp_path, monkeypatch):
+    store = LogActivityStore(str(tmp_path / "log"))
+    monkeypatch.setattr(activity_store, "_activity_store", store)
+    user = create_user(db, UserCreate(nickname="ama"))
+
+    store.append_many(db, [(user.id, "lesson", {"unit": 1}), (user.id, "quiz", {})])
+    db.rollback()
+    ids = create_activities(db, [(user.id, ActivityCreate(activity_type="lesson", details={"unit": 2}))] * 2)
+
+    assert ids == [3, 4]
+    assert [activity.id for activity in store.get_user_activities(db, user.id)] == [4, 3]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Concurrency tests for the async database session layer
+A slow query on an async session must not stall unrelated requests on the event loop.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from crud import rebuild_language_xp
+from database import get_async_db, User, UserScore, UserStreak
+from language_club import router as language_club_router
+from progression_tracking import router as progression_tracking_router
+
+CLUB_MEMBERS = 600
+# Counts to a few million in SQLite: long enough to overlap several other requests
+SLOW_QUERY = text(
+    "WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter WHERE n < 3000000) "
+    "SELECT COUNT(*) FROM counter"
+)
+
+
+def seed_club(engine):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "nickname": f"member_{i}", "preferences": {}} for i in range(1, CLUB_MEMBERS + 1)
+        ])
+        conn.execute(insert(UserStreak), [
+            {"user_id": i, "current_streak": 3, "longest_streak": 5, "last_activity_date": now, "updated_at": now}
+            for i in range(1, CLUB_MEMBERS + 1)
+        ])
+        conn.execute(insert(UserScore), [
+            {"user_id": i, "score": 100 + i, "language": "twi", "created_at": now} for i in range(1, CLUB_MEMBERS + 1)
+        ])
+    with Session(engine) as db:
+        rebuild_language_xp(db)
+
+
+def build_app(session_factory):
+    app = FastAPI()
+    app.include_router(language_club_router, prefix="/api/v1")
+    app.include_router(progression_tracking_router, prefix="/api/v1")
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    @app.get("/slow")
+    async def slow_query(db: AsyncSession = Depends(get_async_db)):
+        return {"count": (await db.execute(SLOW_QUERY)).scalar()}
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app
+
+
+async def timed_get(client, url):
+    start = time.perf_counter()
+    response = await client.get(url)
+    return response, time.perf_counter() - start
+
+
+def test_slow_query_does_not_stall_other_requests(engine, async_session_factory):
+    seed_club(engine)
+    app = build_app(async_session_factory)
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            slow_task = asyncio.create_task(timed_get(client, "/slow"))
+            await asyncio.sleep(0.05)  # Let the slow query get going
+            streak_results = []
+            while not slow_task.done():
+                streak_results.append(await timed_get(client, "/api/v1/streak/member_1"))
+            return await slow_task, streak_results
+
+    (slow_response, slow_seconds), streak_results = asyncio.run(scenario())
+
+    assert slow_response.status_code == 200
+    # Unrelated requests were served while the slow query was still running
+    assert len(streak_results) >= 3
+    assert all(response.status_code == 200 for response, _ in streak_results)
+    assert max(seconds for _, seconds in streak_results) < slow_seconds / 3
+
+
+def test_xp_endpoints_round_trip(engine, async_session_factory):
+    seed_club(engine)
+    app = build_app(async_session_factory)
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            added = await client.post("/api/v1/xp/member_2/add", json={"xp_amount": 40, "activity_type": "lesson"})
+            total = await client.get("/api/v1/xp/member_2/total")
+            missing = await client.get("/api/v1/xp/nobody/total")
+            return added, total, missing
+
+    added, total, missing = asyncio.run(scenario())
+
+    assert added.status_code == 200
+    assert total.json()["total_xp"] == 102 + added.json()["xp_added"]
+    assert missing.status_code == 404
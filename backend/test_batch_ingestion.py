@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk ingestion endpoints
+"""
+
+import pytest
+from datetime import datetime
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from crud import create_game_session, create_score, create_user, get_user_stats, rebuild_daily_scores, rebuild_language_xp
+from database import get_db, GameSession, UserActivity, UserDailyScore, UserLanguageXP, UserScore, UserStatsRollup
+from batch_api import router as batch_router
+from models import GameSessionCreate, ScoreCreate, UserCreate
+
+
+@pytest.fixture
+def batch_client(db):
+    app = FastAPI()
+    app.include_router(batch_router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def counters(db):
+    db.expire_all()
+    return (
+        {(row.user_id, row.language): (row.xp, row.scores_count) for row in db.query(UserLanguageXP)},
+        {(row.user_id, row.language): (row.score, row.highest_score, row.scores_count) for row in db.query(UserDailyScore)},
+    )
+
+
+def test_batch_scores_match_single_writes(db, engine, batch_client):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    kojo = create_user(db, UserCreate(nickname="kojo")).id
+    create_score(db, ama, ScoreCreate(score=5, language="ewe"))
+    items = [
+        {"nickname": "ama", "score": 30, "language": "twi"},
+        {"nickname": "nobody", "score": 10, "language": "twi"},
+        {"nickname": "kojo", "score": 20, "language": "gaa", "category": "food"},
+        {"nickname": "ama", "score": 50, "language": "twi"},
+    ]
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    response = batch_client.post("/api/v1/batch/scores", json=items)
+
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (3, 1)
+    assert [result["ok"] for result in body["results"]] == [True, False, True, True]
+    assert body["results"][1]["error"] == "User not found."
+    assert db.get(UserScore, body["results"][2]["id"]).category == "food"
+    # One insert for all scores instead of one transaction per score
+    assert sum(statement.startswith("INSERT INTO user_scores") for statement in statements) == 1
+
+    stats = get_user_stats(db, ama)
+    assert (stats["total_score"], stats["highest_score"], stats["favorite_language"]) == (85, 50, "twi")
+    assert get_user_stats(db, kojo)["total_score"] == 20
+    maintained = counters(db)
+    assert maintained[0][(ama, "twi")] == (80, 2)
+    assert maintained[1][(ama, "twi")] == (80, 50, 2)
+    rebuild_language_xp(db)
+    rebuild_daily_scores(db)
+    assert counters(db) == maintained
+
+
+def test_batch_activities(db, batch_client):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    response = batch_client.post("/api/v1/batch/activities", json=[
+        {"nickname": "ama", "activity_type": "lesson", "details": {"unit": 1}},
+        {"nickname": "ghost", "activity_type": "lesson"},
+        {"nickname": "ama", "activity_type": "quiz"},
+    ])
+
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [True, False, True]
+    assert db.get(UserActivity, results[0]["id"]).details == {"unit": 1}
+    assert db.get(UserActivity, results[2]["id"]).activity_type == "quiz"
+    assert db.query(UserActivity).filter(UserActivity.user_id == ama, UserActivity.activity_type != "user_created").count() == 2
+
+
+def test_batch_session_updates_apply_in_order(db, batch_client):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    create_game_session(db, ama, GameSessionCreate(session_id="s1", language="twi"))
+    create_game_session(db, ama, GameSessionCreate(session_id="s2", language="gaa"))
+
+    response = batch_client.post("/api/v1/batch/sessions", json=[
+        {"session_id": "s1", "rounds_played": 3, "rounds_won": 1},
+        {"session_id": "s1", "rounds_played": 5, "rounds_won": 4, "end_time": datetime(2024, 6, 1).isoformat()},
+        {"session_id": "missing", "rounds_played": 1},
+        {"session_id": "s2", "total_score": 70, "rounds_played": 2, "rounds_won": 2},
+    ])
+
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (3, 1)
+    assert body["results"][2]["error"] == "Game session not found."
+    db.expire_all()
+    s1 = db.query(GameSession).filter(GameSession.session_id == "s1").one()
+    assert (s1.rounds_played, s1.rounds_won, s1.end_time) == (5, 4, datetime(2024, 6, 1))
+    stats = get_user_stats(db, ama)
+    assert (stats["total_rounds_played"], stats["total_rounds_won"]) == (7, 6)
+
+
+def test_batch_limits(db, batch_client, monkeypatch):
+    import batch_api
+    monkeypatch.setattr(batch_api, "BATCH_MAX_ITEMS", 2)
+    item = {"nickname": "ama", "score": 1, "language": "twi"}
+    assert batch_client.post("/api/v1/batch/scores", json=[item] * 3).status_code == 413
+    # The size is checked before any item is parsed
+    assert batch_client.post("/api/v1/batch/scores", json=[item, item, "not an item"]).status_code == 413
+    assert batch_client.post("/api/v1/batch/scores", json=[]).json() == {"accepted": 0, "rejected": 0, "results": []}
+
+
+def test_invalid_items_are_rejected_individually(db, batch_client):
+    create_user(db, UserCreate(nickname="ama"))
+    response = batch_client.post("/api/v1/batch/scores", json=[
+        {"nickname": "ama", "score": 40, "language": "twi"},
+        {"nickname": "ama", "score": -1, "language": "twi"},
+        "not an item",
+        {"nickname": "ama", "score": 60, "language": "twi"},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 2)
+    assert [result["ok"] for result in body["results"]] == [True, False, False, True]
+    assert body["results"][1]["error"].startswith("score:")
+    assert body["results"][2]["error"].startswith("item:")
+
+    response = batch_client.post("/api/v1/batch/sessions", json=[{"rounds_played": 1}, {"session_id": "missing"}])
+    assert [result["error"] for result in response.json()["results"]] == [
+        "session_id: Field required", "Game session not found."
+    ]
+
+
+
+def test_batch_scores_for_a_user_without_a_rollup(db, batch_client):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    db.query(UserStatsRollup).filter(UserStatsRollup.user_id == ama).delete()
+    db.add(UserScore(user_id=ama, score=100, language="twi"))
+    db.commit()
+
+    response = batch_client.post("/api/v1/batch/scores", json=[{"nickname": "ama", "score": 50, "language": "twi"}])
+
+    assert response.json()["accepted"] == 1
+    db.expire_all()
+    stats = db.get(UserStatsRollup, ama)
+    assert (stats.total_score, stats.scores_count) == (150, 2)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the LRU embedding cache (embedding_cache.py)
+"""
+
+from embedding_cache import EmbeddingCache, normalize_text
+
+
+class FakeEncoder:
+    """Records each call; a text's embedding is its length"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [len(text) for text in texts]
+
+
+def test_uncached_texts_are_encoded_in_one_call():
+    encode = FakeEncoder()
+    cache = EmbeddingCache(encode)
+
+    assert cache.embed(["Is  it fair?", "no", "is it FAIR?", "yes"]) == [11, 2, 11, 3]
+    assert encode.calls == [["is it fair?", "no", "yes"]]
+    assert cache.embed(["yes", "maybe", "no"]) == [3, 5, 2]
+    assert encode.calls[1:] == [["maybe"]]
+    assert cache.stats == {"hits": 3, "misses": 4, "encode_calls": 2}
+
+
+def test_least_recently_used_texts_are_evicted():
+    encode = FakeEncoder()
+    cache = EmbeddingCache(encode, max_size=2)
+
+    cache.embed(["a", "b"])
+    cache.embed(["a"])
+    cache.embed(["c"])  # Evicts b, not the recently used a
+    cache.embed(["a", "b"])
+    assert encode.calls == [["a", "b"], ["c"], ["b"]]
+
+
+def test_pinned_topics_survive_eviction():
+    encode = FakeEncoder()
+    cache = EmbeddingCache(encode, max_size=2, max_pinned=1)
+
+    cache.embed(["argument one", "The Topic"], pinned=["The Topic"])
+    cache.embed([f"argument {i}" for i in range(10)])
+    cache.embed(["the topic"])
+    assert ["the topic"] not in encode.calls
+    assert len(cache) == 3
+
+    # Past max_pinned, pinning falls back to the LRU
+    cache.embed(["another topic"], pinned=["another topic"])
+    cache.embed(["x", "y"])
+    cache.embed(["another topic", "the topic"])
+    assert encode.calls[-1] == ["another topic"]
+
+
+def test_normalize_text():
+    assert normalize_text("  Learning\tlocal \n languages ") == "learning local languages"
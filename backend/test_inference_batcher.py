@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the micro-batching inference queue (inference_batcher.py)
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from inference_batcher import InferenceBatcher, length_bucket
+
+CALLERS = 64
+
+
+@pytest.fixture
+def batcher_for():
+    batchers = []
+
+    def factory(fn, **kwargs):
+        batcher = InferenceBatcher(fn, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield factory
+    for batcher in batchers:
+        batcher.stop()
+
+
+def test_concurrent_callers_share_calls(batcher_for):
+    calls = []
+
+    def shout(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    batcher = batcher_for(shout, max_batch=16, max_delay_ms=20)
+    texts = [("word " * (i % 7 + 1)).strip() for i in range(CALLERS)]
+    results = [None] * CALLERS
+    start = threading.Barrier(CALLERS)
+
+    def caller(index):
+        start.wait()
+        results[index] = batcher.infer(texts[index])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [text.upper() for text in texts]
+    assert batcher.stats["requests"] == CALLERS
+    assert batcher.stats["calls"] == len(calls) < CALLERS / 2
+    assert max(len(call) for call in calls) <= 16
+    # Each call only pads texts of similar length together
+    assert all(len({length_bucket(len(text)) for text in call}) == 1 for call in calls)
+
+
+def test_async_callers(batcher_for):
+    batcher = batcher_for(lambda items: [item * 2 for item in items], length=lambda item: 1, max_delay_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.infer_async(i) for i in range(20)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(20)]
+    assert batcher.stats["calls"] < 20
+
+
+def test_a_failing_item_only_fails_its_caller(batcher_for):
+    def invert(items):
+        return [1 / item for item in items]
+
+    batcher = batcher_for(invert, length=lambda item: 1, max_delay_ms=50)
+    futures = [batcher.submit(item) for item in (1, 0, 4)]
+
+    assert futures[0].result() == 1
+    with pytest.raises(ZeroDivisionError):
+        futures[1].result()
+    assert futures[2].result() == 0.25
+    assert batcher.stats["failures"] == 1
+
+
+def test_length_buckets():
+    assert [length_bucket(length) for length in (0, 1, 2, 3, 4, 5, 8, 9, 512)] == [0, 0, 1, 2, 2, 3, 3, 4, 9]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the set-based language club endpoints
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from conftest import QueryCounter
+from crud import rebuild_language_xp
+from database import get_async_db, User, UserScore, UserStreak
+from language_club import router as language_club_router, calculate_group_goal
+
+
+def seed(engine, members):
+    """members users with twi XP 10*i (split over two scores), plus one ewe-only user"""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "nickname": f"learner_{i:04d}", "preferences": {}} for i in range(1, members + 2)
+        ])
+        conn.execute(insert(UserStreak), [
+            {"user_id": i, "current_streak": i % 7, "longest_streak": 7, "last_activity_date": now, "updated_at": now}
+            for i in range(1, members + 1)
+        ])
+        scores = []
+        for i in range(1, members + 1):
+            scores.append({"user_id": i, "score": 4 * i, "language": "twi", "created_at": now})
+            scores.append({"user_id": i, "score": 6 * i, "language": "twi", "created_at": now})
+        scores.append({"user_id": members + 1, "score": 50, "language": "ewe", "created_at": now})
+        conn.execute(insert(UserScore), scores)
+    with Session(engine) as db:
+        rebuild_language_xp(db)
+
+
+def get(async_session_factory, *urls):
+    app = FastAPI()
+    app.include_router(language_club_router, prefix="/api/v1")
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return [await client.get(url) for url in urls]
+
+    return asyncio.run(scenario())
+
+
+def test_club_totals_cover_all_members_and_page_is_top_n(engine, async_session_factory):
+    seed(engine, 120)
+
+    (club,) = get(async_session_factory, "/api/v1/clubs/twi?limit=10&offset=5")
+
+    data = club.json()
+    assert data["member_count"] == 120
+    assert data["group_progress"] == sum(10 * i for i in range(1, 121))
+    assert data["group_goal"] == calculate_group_goal(120)
+    assert [member["nickname"] for member in data["members"]] == [f"learner_{i:04d}" for i in range(115, 105, -1)]
+    assert [member["rank"] for member in data["members"]] == list(range(6, 16))
+    assert data["members"][0]["xp"] == 1150
+    assert data["members"][0]["current_streak"] == 115 % 7
+
+
+@pytest.mark.parametrize("members", [20, 400])
+def test_club_query_count_does_not_grow_with_members(engine, async_engine, async_session_factory, members):
+    seed(engine, members)
+    counter = QueryCounter(async_engine.sync_engine)
+
+    (club,) = get(async_session_factory, "/api/v1/clubs/twi")
+
+    assert club.json()["member_count"] == members
+    assert counter.count == 2
+
+
+def test_club_member_rank(engine, async_session_factory):
+    seed(engine, 30)
+
+    top, middle, outsider, empty = get(
+        async_session_factory,
+        "/api/v1/clubs/twi/members/learner_0030",
+        "/api/v1/clubs/twi/members/learner_0012",
+        "/api/v1/clubs/twi/members/learner_0031",
+        "/api/v1/clubs/gaa",
+    )
+
+    assert top.json()["rank"] == 1
+    assert middle.json()["rank"] == 19
+    assert middle.json()["xp"] == 120
+    assert outsider.json()["rank"] is None
+    assert empty.json()["member_count"] == 0
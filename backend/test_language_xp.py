@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-language XP counters maintained on score writes
+"""
+
+import asyncio
+
+from crud import create_user, create_score, record_language_xp, rebuild_language_xp
+from database import UserLanguageXP, LanguageTotal
+from models import UserCreate, ScoreCreate
+from progression_tracking import add_xp
+
+
+def snapshot(db):
+    db.expire_all()
+    counters = {(row.user_id, row.language): (row.xp, row.scores_count) for row in db.query(UserLanguageXP)}
+    totals = {row.language: (row.total_xp, row.member_count) for row in db.query(LanguageTotal)}
+    return counters, totals
+
+
+def test_counters_follow_score_writes_and_match_rebuild(db):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    kojo = create_user(db, UserCreate(nickname="kojo")).id
+    create_score(db, ama, ScoreCreate(score=30, language="twi"))
+    create_score(db, ama, ScoreCreate(score=20, language="twi"))
+    create_score(db, kojo, ScoreCreate(score=15, language="twi"))
+    create_score(db, kojo, ScoreCreate(score=5, language="ewe"))
+
+    counters, totals = snapshot(db)
+    assert counters[(ama, "twi")] == (50, 2)
+    assert counters[(kojo, "ewe")] == (5, 1)
+    assert totals == {"twi": (65, 2), "ewe": (5, 1)}
+
+    maintained = snapshot(db)
+    rebuild_language_xp(db)
+    assert snapshot(db) == maintained
+
+
+def test_club_membership_follows_xp_crossing_zero(db):
+    kojo = create_user(db, UserCreate(nickname="kojo")).id
+    create_score(db, kojo, ScoreCreate(score=5, language="ewe"))
+
+    # A correction takes the user out of the ewe club, and a new score brings them back
+    record_language_xp(db, kojo, "ewe", -5)
+    db.commit()
+    assert snapshot(db)[1]["ewe"] == (0, 0)
+
+    create_score(db, kojo, ScoreCreate(score=8, language="ewe"))
+    assert snapshot(db)[1]["ewe"] == (8, 1)
+
+
+def test_async_xp_grants_update_counters(db, async_session_factory):
+    user_id = create_user(db, UserCreate(nickname="esi")).id
+
+    async def grant():
+        async with async_session_factory() as session:
+            return await add_xp(session, user_id, 40, "lesson")
+
+    score = asyncio.run(grant())
+
+    counters, totals = snapshot(db)
+    assert counters[(user_id, "system")] == (score.score, 1)
+    assert totals["system"] == (score.score, 1)
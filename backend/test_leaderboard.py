@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the database-backed leaderboard (crud.get_leaderboard)
+"""
+
+from datetime import datetime, timedelta
+
+from database import User, UserScore, UserStreak, UserBadge
+from crud import get_leaderboard, rebuild_user_stats
+
+
+def seed_players(db, count):
+    now = datetime.utcnow()
+    for i in range(count):
+        user = User(nickname=f"player_{i}", avatar=f"avatar_{i}.jpg", preferences={})
+        db.add(user)
+        db.flush()
+        db.add(UserStreak(user_id=user.id, current_streak=i % 12 + 1, longest_streak=12))
+        # Two 'ewe' scores and one 'twi' score: ewe is the favorite language
+        db.add(UserScore(user_id=user.id, score=10 * i, language="ewe", created_at=now - timedelta(days=2)))
+        db.add(UserScore(user_id=user.id, score=5, language="ewe", created_at=now - timedelta(days=1)))
+        db.add(UserScore(user_id=user.id, score=7, language="twi", created_at=now))
+        for b in range(i % 3):
+            db.add(UserBadge(user_id=user.id, badge_type=f"type_{b}", badge_name=f"Badge {b}"))
+        if i % 3:
+            db.add(UserBadge(user_id=user.id, badge_type="revoked", badge_name="Revoked", is_active=False))
+    db.commit()
+    rebuild_user_stats(db)
+
+
+def test_leaderboard_payload(db):
+    seed_players(db, 6)
+
+    leaderboard = get_leaderboard(db, limit=3, offset=0)
+
+    assert [entry["nickname"] for entry in leaderboard] == ["player_5", "player_4", "player_3"]
+    top = leaderboard[0]
+    assert top["rank"] == 1
+    assert top["total_score"] == 50 + 5 + 7
+    assert top["highest_score"] == 50
+    assert top["games_played"] == 3
+    assert top["badges_count"] == 2
+    assert top["favorite_language"] == "ewe"
+    assert top["level"] == min(10, max(1, 6 // 3 + 1))
+    assert get_leaderboard(db, limit=3, offset=3)[0]["rank"] == 4
+
+
+def test_favorite_language_tie_prefers_most_recent(db):
+    now = datetime.utcnow()
+    user = User(nickname="tied", preferences={})
+    db.add(user)
+    db.flush()
+    db.add(UserStreak(user_id=user.id))
+    db.add(UserScore(user_id=user.id, score=1, language="gaa", created_at=now - timedelta(days=3)))
+    db.add(UserScore(user_id=user.id, score=1, language="ewe", created_at=now))
+    db.commit()
+    rebuild_user_stats(db)
+
+    assert get_leaderboard(db)[0]["favorite_language"] == "ewe"
+
+
+def test_leaderboard_query_count_is_constant(db, query_counter):
+    seed_players(db, 60)
+
+    query_counts = []
+    for limit in (1, 10, 60):
+        query_counter.reset()
+        entries = get_leaderboard(db, limit=limit)
+        assert len(entries) == limit
+        query_counts.append(query_counter.count)
+
+    assert query_counts[0] == query_counts[1] == query_counts[2]
+    assert query_counts[0] <= 2
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory ranked leaderboard index
+"""
+
+import bisect
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import leaderboard_index
+from crud import create_user, create_score, get_user_by_nickname, record_score_stats, update_user_streak
+from database import UserScore
+from game_api import router as game_router
+from leaderboard_index import IndexableSkipList, LeaderboardIndex
+from models import UserCreate, ScoreCreate, StreakUpdate
+
+
+def test_skip_list_matches_sorted_list():
+    rng = random.Random(7)
+    initial = sorted(rng.sample(range(100000), 500))
+    skip_list = IndexableSkipList(initial, seed=1)
+    expected = list(initial)
+
+    for _ in range(3000):
+        if expected and rng.random() < 0.4:
+            value = expected.pop(rng.randrange(len(expected)))
+            skip_list.remove(value)
+        else:
+            value = rng.randrange(100000)
+            if value in expected:
+                continue
+            bisect.insort(expected, value)
+            skip_list.insert(value)
+        probe = rng.randrange(100000)
+        assert skip_list.rank(probe) == bisect.bisect_left(expected, probe)
+
+    assert len(skip_list) == len(expected)
+    assert [skip_list[i] for i in range(len(expected))] == expected
+    assert list(skip_list.slice(100, 25)) == expected[100:125]
+    assert list(skip_list.slice(len(expected) - 3, 10)) == expected[-3:]
+    with pytest.raises(ValueError):
+        skip_list.remove(-1)
+
+
+@pytest.fixture
+def index(db, monkeypatch):
+    """Players pl0..pl9 with 10*i points and streak 1, loaded into a fresh process index"""
+    for i in range(10):
+        user = create_user(db, UserCreate(nickname=f"pl{i}"))
+        create_score(db, user.id, ScoreCreate(score=10 * i, language="twi"))
+    create_user(db, UserCreate(nickname="newcomer"))
+    fresh = LeaderboardIndex(seed=3)
+    fresh.load(db)
+    monkeypatch.setattr(leaderboard_index, "_leaderboard_index", fresh)
+    return fresh
+
+
+def test_rank_around_and_top(index):
+    assert len(index) == 10
+    assert index.rank("pl9")["rank"] == 1
+    assert index.rank("pl0")["rank"] == 10
+    assert index.rank("newcomer") is None
+    assert [entry["nickname"] for entry in index.around("pl5", 2)] == ["pl7", "pl6", "pl5", "pl4", "pl3"]
+    assert [entry["rank"] for entry in index.around("pl8", 3)] == [1, 2, 3, 4, 5]
+    assert [entry["nickname"] for entry in index.top(3, offset=1)] == ["pl8", "pl7", "pl6"]
+
+
+def test_committed_writes_rerank_and_rolled_back_writes_do_not(db, index):
+    pl2 = get_user_by_nickname(db, "pl2")
+    create_score(db, pl2.id, ScoreCreate(score=100, language="twi"))
+    assert index.rank("pl2")["rank"] == 1
+    assert index.rank("pl2")["total_score"] == 120
+
+    # Streak breaks the tie on total score
+    pl9 = get_user_by_nickname(db, "pl9")
+    create_score(db, pl9.id, ScoreCreate(score=30, language="twi"))
+    assert index.rank("pl2")["rank"] == 1
+    update_user_streak(db, pl9.id, StreakUpdate(current_streak=6))
+    assert index.rank("pl9")["rank"] == 1
+    assert index.rank("pl9")["level"] == 3
+
+    newcomer = get_user_by_nickname(db, "newcomer")
+    create_score(db, newcomer.id, ScoreCreate(score=1, language="twi"))
+    assert index.rank("newcomer")["rank"] == 10
+    assert len(index) == 11
+
+    db.add(UserScore(user_id=pl2.id, score=0, language="twi"))
+    record_score_stats(db, pl2.id, 500, "twi")
+    db.rollback()
+    assert index.rank("pl2")["total_score"] == 120
+
+
+def test_late_score_updates_do_not_overwrite_newer_totals(db, index):
+    pl2 = get_user_by_nickname(db, "pl2")
+    committed = []
+    for score in (100, 50):
+        record_score_stats(db, pl2.id, score, "twi")
+        committed.append(db.info.pop("leaderboard_updates"))
+        db.commit()
+
+    # The after_commit hooks of two sessions can run in the opposite order to their commits
+    for updates in reversed(committed):
+        db.info["leaderboard_updates"] = updates
+        leaderboard_index.apply_leaderboard_updates(db)
+    assert index.rank("pl2")["total_score"] == 170
+    assert index.rank("pl2")["rank"] == 1
+
+
+def test_ranked_leaderboard_endpoints(index):
+    app = FastAPI()
+    app.include_router(game_router, prefix="/api/v1")
+    client = TestClient(app)
+
+    top = client.get("/api/v1/leaderboard/top", params={"limit": 2}).json()
+    rank = client.get("/api/v1/leaderboard/rank/pl4").json()
+    around = client.get("/api/v1/leaderboard/around/pl0", params={"count": 1}).json()
+
+    assert [entry["nickname"] for entry in top] == ["pl9", "pl8"]
+    assert rank["rank"] == 6 and rank["total_players"] == 10
+    assert [(entry["rank"], entry["nickname"]) for entry in around] == [(9, "pl1"), (10, "pl0")]
+    assert client.get("/api/v1/leaderboard/rank/newcomer").status_code == 404
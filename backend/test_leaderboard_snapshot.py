@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-serialized leaderboard snapshot service
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+import leaderboard_snapshot
+from crud import create_score, get_leaderboard, get_user_by_nickname
+from database import get_db
+from game_api import router as game_router
+from leaderboard_snapshot import LeaderboardSnapshotService
+from models import LeaderboardEntry, ScoreCreate
+from pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+def service(monkeypatch):
+    fresh = LeaderboardSnapshotService(size=10, ttl=60, rebuild_writes=3)
+    monkeypatch.setattr(leaderboard_snapshot, "_leaderboard_snapshot", fresh)
+    yield fresh
+    fresh.wait()
+
+
+def live_page(db, **params):
+    return [jsonable_encoder(LeaderboardEntry.model_validate(entry)) for entry in get_leaderboard(db, **params)]
+
+
+def test_snapshot_pages_match_live_queries(db, service, seed_players):
+    seed_players(15)
+
+    snapshot = service.get(db)
+
+    for sort_by in ("score", "streak", "level"):
+        for sort_dir in ("asc", "desc"):
+            body, position = snapshot.page(sort_by, sort_dir, limit=4, offset=2)
+            assert json.loads(body) == live_page(db, limit=4, offset=2, sort_by=sort_by, sort_dir=sort_dir)
+            assert position == get_leaderboard(db, limit=4, offset=2, sort_by=sort_by, sort_dir=sort_dir)[-1]["next"]
+    # Only the top 10 rows are kept; pages reaching past them go to the database
+    assert snapshot.page("score", "desc", limit=5, offset=8) is None
+
+
+def test_concurrent_readers_share_one_rebuild(db, engine, service, monkeypatch, seed_players):
+    seed_players(5)
+    rebuild = service._rebuild
+
+    def slow_rebuild(*args, **kwargs):
+        time.sleep(0.2)
+        return rebuild(*args, **kwargs)
+
+    monkeypatch.setattr(service, "_rebuild", slow_rebuild)
+    snapshots = []
+    readers = [threading.Thread(target=lambda: snapshots.append(service.get(db))) for _ in range(20)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+
+    assert service.rebuilds == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+    # An expired snapshot is still served while a single background rebuild replaces it
+    service.ttl = 0
+    stale = snapshots[0]
+    assert all(service.get(db) is stale for _ in range(20))
+    service.wait()
+    assert service.rebuilds == 2
+    assert service.snapshot is not stale
+
+
+def test_score_writes_trigger_rebuild(db, service, seed_players):
+    seed_players(5)
+    service.get(db)
+    player = get_user_by_nickname(db, "player_000")
+
+    for _ in range(2):
+        create_score(db, player.id, ScoreCreate(score=500, language="twi"))
+    assert service.rebuilds == 1
+    create_score(db, player.id, ScoreCreate(score=500, language="twi"))
+    service.wait()
+
+    assert service.rebuilds == 2
+    body, _ = service.snapshot.page("score", "desc", limit=1, offset=0)
+    assert json.loads(body)[0]["nickname"] == "player_000"
+
+
+def test_endpoint_serves_snapshot_with_cursor(db, service, seed_players):
+    seed_players(12)
+    app = FastAPI()
+    app.include_router(game_router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    first = client.get("/api/v1/leaderboard", params={"limit": 8})
+    rest = client.get("/api/v1/leaderboard", params={"limit": 8, "cursor": first.headers[NEXT_CURSOR_HEADER]})
+    default = client.get("/api/v1/leaderboard")
+
+    assert service.rebuilds == 1
+    assert first.json() + rest.json() == live_page(db, limit=100)
+    assert default.json() == live_page(db, limit=100)
+    assert NEXT_CURSOR_HEADER not in rest.headers
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Checks that the Alembic migrations produce the schema declared in database.py
+"""
+
+import os
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from crud import get_leaderboard, rebuild_user_stats
+from database import Base
+from leaderboard_index import LeaderboardIndex
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def alembic_config(url):
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_migrated_schema_matches_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    command.upgrade(alembic_config(url), "head")
+
+    with create_engine(url).connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+
+def test_upgrade_adds_indexes_to_pre_migration_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    # Databases created by init_db before the composite indexes existed
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_user_scores_user_id_created_at")
+
+    command.upgrade(alembic_config(url), "head")
+
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+
+def legacy_database(tmp_path):
+    """(url, engine) of a database at revision 0006 whose players never got a stats rollup"""
+    url = f"sqlite:///{tmp_path / 'legacy_stats.db'}"
+    command.upgrade(alembic_config(url), "0006")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, nickname) VALUES (1, 'ama'), (2, 'kojo'), (3, 'esi')"))
+        conn.execute(text("INSERT INTO user_streaks (user_id, current_streak, longest_streak) VALUES (1, 2, 4), (2, 1, 1), (3, 0, 0)"))
+        conn.execute(text(
+            "INSERT INTO user_scores (user_id, score, language, created_at) VALUES "
+            "(1, 40, 'twi', '2024-06-01 10:00:00'), (1, 25, 'ewe', '2024-06-02 10:00:00'), "
+            "(1, 10, 'twi', '2024-06-03 10:00:00'), (2, 90, 'gaa', '2024-06-01 12:00:00')"
+        ))
+        conn.execute(text(
+            "INSERT INTO game_sessions (session_id, user_id, language, rounds_played, rounds_won) VALUES "
+            "('s1', 1, 'twi', 5, 3), ('s2', 1, 'ewe', 2, NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO user_badges (user_id, badge_type, badge_name, is_active) VALUES "
+            "(2, 'streak', 'Streak', 1), (2, 'revoked', 'Revoked', 0)"
+        ))
+    return url, engine
+
+
+def test_upgrade_backfills_stats_rollups(tmp_path):
+    url, engine = legacy_database(tmp_path)
+    command.upgrade(alembic_config(url), "head")
+
+    with Session(bind=engine) as db:
+        assert [(entry["nickname"], entry["total_score"]) for entry in get_leaderboard(db, limit=100)] == [
+            ("kojo", 90), ("ama", 75)
+        ]
+        assert rebuild_user_stats(db, check_only=True) == []
+    engine.dispose()
+
+
+def test_upgraded_players_are_in_the_leaderboard_index(tmp_path):
+    url, engine = legacy_database(tmp_path)
+    command.upgrade(alembic_config(url), "head")
+
+    index = LeaderboardIndex(seed=1)
+    with Session(bind=engine) as db:
+        index.load(db)
+    assert [entry["nickname"] for entry in index.top(10)] == ["kojo", "ama"]
+    assert index.rank("ama")["rank"] == 2
+    assert index.rank("esi") is None  # No scores yet
+    engine.dispose()
+
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the ONNX Runtime backend (onnx_backend.py)
+Exports tiny randomly initialized BERT models, so no download is needed,
+and checks the onnxruntime outputs against the torch ones.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("onnxruntime")
+
+from onnx_backend import (
+    OnnxSentenceEncoder,
+    OnnxSequenceClassifier,
+    export_sentence_encoder,
+    export_sequence_classifier,
+    load_onnx_model,
+    onnx_model_path,
+)
+
+WORDS = ["i", "love", "learning", "a", "new", "language", "school", "is", "hard", "no", "this", "great", "."]
+TEXTS = ["i love learning a new language .", "no .", "school is hard", "this is great great great ."]
+
+
+@pytest.fixture
+def tiny_bert(tmp_path):
+    """(tokenizer, config) of a two-layer BERT over a toy vocabulary"""
+    pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    config = transformers.BertConfig(
+        vocab_size=5 + len(WORDS), hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+        intermediate_size=64, max_position_embeddings=64, num_labels=3,
+    )
+    return transformers.BertTokenizer(str(vocab)), config
+
+
+def test_sequence_classifier_matches_torch(tiny_bert, tmp_path):
+    import torch
+    from transformers import BertForSequenceClassification
+
+    tokenizer, config = tiny_bert
+    torch.manual_seed(0)
+    model = BertForSequenceClassification(config).eval()
+    export_sequence_classifier(model, tokenizer, onnx_model_path("tiny/classifier", str(tmp_path)), int8=True, max_length=64)
+    with torch.no_grad():
+        expected = torch.softmax(model(**tokenizer(TEXTS, return_tensors="pt", padding=True)).logits, dim=1).numpy()
+
+    onnx_model = load_onnx_model("tiny/classifier", str(tmp_path), int8=False)
+    assert isinstance(onnx_model, OnnxSequenceClassifier)
+    np.testing.assert_allclose(onnx_model.predict_proba(TEXTS), expected, atol=1e-5)
+    # int8 weights drift a little, but stay close
+    int8_model = load_onnx_model("tiny/classifier", str(tmp_path), int8=True)
+    np.testing.assert_allclose(int8_model.predict_proba(TEXTS), expected, atol=0.05)
+
+
+def test_sentence_encoder_matches_sentence_transformers(tiny_bert, tmp_path):
+    import torch
+    from transformers import BertModel
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    from sentence_transformers import models
+
+    tokenizer, config = tiny_bert
+    torch.manual_seed(0)
+    BertModel(config).save_pretrained(tmp_path / "bert")
+    tokenizer.save_pretrained(tmp_path / "bert")
+    transformer = models.Transformer(str(tmp_path / "bert"), max_seq_length=64)
+    sentence_model = sentence_transformers.SentenceTransformer(modules=[
+        transformer, models.Pooling(transformer.get_word_embedding_dimension(), "mean"), models.Normalize(),
+    ], device="cpu")
+    export_sentence_encoder(sentence_model, str(tmp_path / "encoder"))
+
+    encoder = OnnxSentenceEncoder(str(tmp_path / "encoder"), int8=False)
+    np.testing.assert_allclose(encoder.encode(TEXTS, batch_size=3), sentence_model.encode(TEXTS), atol=1e-5)
+    assert encoder.encode(TEXTS[0]).shape == (32,)
+    assert encoder.encode([]).shape == (0, 32)
+
+
+def test_missing_export_falls_back(tmp_path):
+    assert load_onnx_model("not/exported", str(tmp_path)) is None
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset (cursor) pagination of the leaderboard, score and activity history endpoints
+"""
+
+from datetime import datetime
+
+import pytest
+
+from crud import create_score
+from database import User, UserActivity, UserScore
+from models import ScoreCreate
+from pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+
+def walk(client, url, **params):
+    """Every page of a cursor-paginated endpoint"""
+    pages = []
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+        params["cursor"] = cursor
+
+
+@pytest.mark.parametrize("sort_by, sort_dir", [("score", "desc"), ("score", "asc"), ("streak", "desc"), ("level", "asc")])
+def test_leaderboard_cursor_walk_matches_offset_walk(db, client, sort_by, sort_dir, seed_players):
+    seed_players(23)
+    params = {"sort_by": sort_by, "sort_dir": sort_dir}
+
+    pages = walk(client, "/api/v1/leaderboard", limit=5, **params)
+    by_offset = client.get("/api/v1/leaderboard", params={"limit": 100, **params}).json()
+
+    entries = [entry for page in pages for entry in page]
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert entries == by_offset
+    assert [entry["rank"] for entry in entries] == list(range(1, 24))
+
+
+def test_leaderboard_cursor_has_no_duplicates_when_scores_change(db, client, seed_players):
+    seed_players(20)
+
+    first = client.get("/api/v1/leaderboard", params={"limit": 5})
+    # A player further down jumps to the top between page requests
+    last = db.query(User).filter(User.nickname == "player_000").one()
+    create_score(db, last.id, ScoreCreate(score=1000, language="twi"))
+    rest = walk(client, "/api/v1/leaderboard", limit=5, cursor=first.headers[NEXT_CURSOR_HEADER])
+
+    nicknames = [entry["nickname"] for page in [first.json()] + rest for entry in page]
+    assert len(nicknames) == len(set(nicknames)) == 19
+    assert "player_000" not in nicknames
+
+
+def test_invalid_cursors_are_rejected(db, client, seed_players):
+    seed_players(3)
+    streak_cursor = encode_cursor({"sort": ["streak", "desc"], "key": [1, 1], "rank": 1})
+
+    assert client.get("/api/v1/leaderboard", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/v1/leaderboard", params={"cursor": streak_cursor}).status_code == 400
+    assert client.get("/api/v1/scores/player_001", params={"cursor": encode_cursor({"id": 1})}).status_code == 400
+    assert client.get("/api/v1/users/player_001/activities", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_score_and_activity_history_pages_through_equal_timestamps(db, client):
+    now = datetime.utcnow()
+    user = User(nickname="historian", preferences={})
+    db.add(user)
+    db.flush()
+    db.add_all(UserScore(user_id=user.id, score=i, language="twi", created_at=now) for i in range(12))
+    db.add_all(UserActivity(user_id=user.id, activity_type="login", details={"n": i}, timestamp=now) for i in range(12))
+    db.commit()
+
+    scores = walk(client, "/api/v1/scores/historian", limit=5)
+    activities = walk(client, "/api/v1/users/historian/activities", limit=4)
+
+    assert [score["score"] for page in scores for score in page] == list(range(11, -1, -1))
+    assert [activity["details"]["n"] for page in activities for activity in page] == list(range(11, -1, -1))
+    assert len(activities) == 4  # Three full pages, then an empty one
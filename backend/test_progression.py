@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the bitmask progression stages and their migration from per-stage rows
+"""
+
+import asyncio
+
+import httpx
+from alembic import command
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from conftest import QueryCounter
+from crud import create_user
+from database import get_async_db, UserProgression
+from models import UserCreate
+from progression_api import router as progression_router
+from progression_catalog import DEFAULT_UNLOCKED, STAGE_BITS, stage_mask
+from test_migrations import alembic_config
+
+
+def unlocked(tree):
+    return {stage["id"] for main in tree for stage in [main] + main["children"] if stage["unlocked"]}
+
+
+def request(session_factory, calls):
+    """Run (method, url) calls against the progression router; returns the JSON bodies"""
+    app = FastAPI()
+    app.include_router(progression_router, prefix="/api/v1")
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    async def run():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            responses = [await client.request(method, url) for method, url in calls]
+        return [(response.status_code, response.json()) for response in responses]
+
+    return asyncio.run(run())
+
+
+def test_unlocks_cascade_like_the_stage_tree(db, async_session_factory):
+    create_user(db, UserCreate(nickname="ama"))
+
+    (_, tree), = request(async_session_factory, [("GET", "/api/v1/progression/ama")])
+    assert [stage["id"] for stage in tree] == ["basics", "intermediate", "advanced", "mastery"]
+    assert unlocked(tree) == {"basics", "basics_1"}
+
+    responses = request(async_session_factory, [
+        ("POST", "/api/v1/progression/ama/unlock/basics_2"),
+        ("POST", "/api/v1/progression/ama/unlock/basics_3"),  # Last sub-stage opens the next main stage
+        ("POST", "/api/v1/progression/ama/unlock/advanced"),  # A main stage opens its first sub-stage
+        ("GET", "/api/v1/progression/ama"),
+    ])
+    assert unlocked(responses[-1][1]) == {
+        "basics", "basics_1", "basics_2", "basics_3", "intermediate", "intermediate_1", "advanced", "advanced_1"
+    }
+
+    responses = request(async_session_factory, [
+        ("POST", "/api/v1/progression/ama/unlock/nope"),
+        ("POST", "/api/v1/progression/ama/reset"),
+        ("GET", "/api/v1/progression/ama"),
+    ])
+    assert responses[0][0] == 404
+    assert unlocked(responses[-1][1]) == {"basics", "basics_1"}
+
+
+def test_unlock_is_one_update(db, async_engine, async_session_factory):
+    user_id = create_user(db, UserCreate(nickname="kojo")).id
+    # Unlocking before the first read initializes the progression
+    request(async_session_factory, [("POST", "/api/v1/progression/kojo/unlock/basics_2")])
+    counter = QueryCounter(async_engine.sync_engine)
+
+    request(async_session_factory, [("POST", "/api/v1/progression/kojo/unlock/basics_3")])
+
+    assert counter.count == 2  # User lookup and the unlock
+    db.expire_all()
+    assert db.get(UserProgression, user_id).unlocked_stages == DEFAULT_UNLOCKED | stage_mask(
+        ["basics_2", "basics_3", "intermediate", "intermediate_1"]
+    )
+
+
+def test_migration_folds_stage_rows_into_masks(tmp_path):
+    url = f"sqlite:///{tmp_path / 'progression.db'}"
+    config = alembic_config(url)
+    command.upgrade(config, "0005")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, nickname) VALUES (1, 'ama'), (2, 'kojo')"))
+        for user_id, stage_id, is_unlocked in [
+            (1, "basics", True), (1, "basics_1", True), (1, "basics_2", True), (1, "intermediate", False),
+            (2, "basics", True), (2, "basics_1", False), (2, "basics_1", True), (2, "retired_stage", True),
+        ]:
+            conn.execute(text(
+                "INSERT INTO user_progression_stages (user_id, stage_id, stage_type, label, unlocked) "
+                "VALUES (:user_id, :stage_id, 'main', 'label', :unlocked)"
+            ), {"user_id": user_id, "stage_id": stage_id, "unlocked": is_unlocked})
+
+    command.upgrade(config, "0006")
+    with engine.connect() as conn:
+        masks = dict(conn.execute(text("SELECT user_id, unlocked_stages FROM user_progression")).all())
+    assert masks == {1: stage_mask(["basics", "basics_1", "basics_2"]), 2: stage_mask(["basics", "basics_1"])}
+
+    command.downgrade(config, "0005")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT stage_id FROM user_progression_stages WHERE user_id = 1 AND unlocked")).scalars().all()
+    assert set(rows) == {"basics", "basics_1", "basics_2"}
+    assert len(STAGE_BITS) == 13
+    engine.dispose()
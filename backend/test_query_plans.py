@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression suite for the database-backed routers
+Seeds a large synthetic database with create_sample_data.generate_dataset,
+captures every statement issued by crud.py, language_club.py,
+progression_tracking.py and progression_api.py, and checks with EXPLAIN QUERY PLAN that none of them falls back to a full table scan.
+"""
+
+import asyncio
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+import crud
+import language_club
+import progression_api
+import progression_tracking
+from create_sample_data import generate_dataset
+from database import Base, User, GameSession
+from models import ScoreCreate, GameSessionUpdate
+
+USERS = 3000
+TABLES = {table.name for table in Base.metadata.sorted_tables}
+AS_OF = datetime(2024, 6, 1)
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+
+def seed_large_database(engine):
+    generate_dataset(engine, USERS, seed=42, as_of=AS_OF)
+    with Session(engine) as db:
+        # The first learner with a played session
+        return db.execute(
+            select(User.nickname, GameSession.session_id).join(GameSession, GameSession.user_id == User.id).order_by(User.id).limit(1)
+        ).one()
+
+
+def exercise_queries(db, nickname, session_id):
+    """Run every read and write path of the sync crud layer once"""
+    user = crud.get_user_by_nickname(db, nickname)
+    user_id = user.id
+    crud.get_user_by_id(db, user_id)
+    activities = crud.get_user_activities(db, user_id, limit=2)
+    crud.get_user_activities(db, user_id, before=(activities[-1].timestamp, activities[-1].id))
+    scores = crud.get_user_scores(db, user_id, limit=2)
+    crud.get_user_scores(db, user_id, before=(scores[-1].created_at, scores[-1].id))
+    crud.get_user_highest_score(db, user_id)
+    for sort_by in ("score", "streak", "level"):
+        page = crud.get_leaderboard(db, limit=50, offset=100, sort_by=sort_by)
+        crud.get_leaderboard(db, limit=50, sort_by=sort_by, after=page[-1]["next"])
+    for window in crud.LEADERBOARD_WINDOWS:
+        crud.get_windowed_leaderboard(db, window, limit=50, offset=100, today=AS_OF.date())
+        crud.get_windowed_leaderboard(db, window, limit=50, language="twi", today=AS_OF.date())
+        crud.get_windowed_rank(db, window, user_id, today=AS_OF.date())
+    crud.get_user_streak(db, user_id)
+    crud.get_user_badges(db, user_id)
+    crud.check_badge_exists(db, user_id, "streak")
+    crud.get_game_session(db, session_id)
+    crud.get_user_stats(db, user_id)
+    crud.create_score(db, user_id, ScoreCreate(score=42, language="twi"))
+    crud.update_game_session(db, session_id, GameSessionUpdate(rounds_played=6, rounds_won=3))
+    crud.increment_streak(db, user_id)
+    crud.reset_streak(db, user_id)
+    crud.update_user_last_login(db, user_id)
+
+
+async def exercise_async_routers(session_factory, nickname):
+    """Run every endpoint of the async routers once"""
+    async with session_factory() as db:
+        await language_club.get_language_club("twi", limit=50, offset=0, db=db)
+        await language_club.get_club_member("twi", nickname, db=db)
+
+        await progression_tracking.get_user_streak(nickname, db=db)
+        await progression_tracking.update_user_streak(nickname, db=db)
+        await progression_tracking.add_user_xp(nickname, progression_tracking.XPUpdate(xp_amount=10, activity_type="lesson"), db=db)
+        await progression_tracking.get_user_total_xp(nickname, db=db)
+
+        await progression_api.get_user_progression(nickname, db=db)
+        await progression_api.unlock_stage(nickname, "basics_2", db=db)
+        await progression_api.unlock_stage(nickname, "intermediate", db=db)
+
+
+@pytest.fixture
+def captured_statements(engine, db, async_engine, async_session_factory):
+    nickname, session_id = seed_large_database(engine)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(("INSERT", "EXPLAIN", "PRAGMA")):
+            statements.append((statement, parameters))
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", capture)
+    exercise_queries(db, nickname, session_id)
+    asyncio.run(exercise_async_routers(async_session_factory, nickname))
+    for target in (engine, async_engine.sync_engine):
+        event.remove(target, "before_cursor_execute", capture)
+    return statements
+
+
+def full_table_scans(engine, statement, parameters):
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    details = [row[-1] for row in plan]
+    return [detail for detail in details if (match := FULL_SCAN.match(detail)) and match.group(1) in TABLES], details
+
+
+def test_no_query_falls_back_to_full_table_scan(engine, captured_statements):
+    assert len(captured_statements) > 30
+
+    offenders = []
+    for statement, parameters in captured_statements:
+        scans, details = full_table_scans(engine, statement, parameters)
+        if scans:
+            offenders.append(f"{' '.join(statement.split())}\n    plan: {details}")
+
+    assert not offenders, "Full table scans found:\n" + "\n".join(offenders)
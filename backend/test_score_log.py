@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only score log behind optimized_main's leaderboard
+"""
+
+import json
+import os
+import random
+
+from score_log import ScoreLog
+
+
+def entry(name, score):
+    return {"name": name, "score": score, "date": "2024-01-01T00:00:00"}
+
+
+def open_log(tmp_path, **kwargs):
+    kwargs.setdefault("legacy_path", None)
+    return ScoreLog(str(tmp_path / "leaderboard.ndjson"), **kwargs)
+
+
+def test_top_entries_follow_appends(tmp_path):
+    log = open_log(tmp_path, top_k=10)
+    rng = random.Random(5)
+    appended = []
+    for i in range(500):
+        appended.append(entry(f"p{i}", rng.randrange(100)))
+        log.append(appended[-1])
+
+    # Highest score first, earlier submissions first among ties
+    expected = sorted(enumerate(appended), key=lambda item: (-item[1]["score"], item[0]))[:10]
+    assert log.top() == [e for _, e in expected]
+    assert log.count == 500
+
+
+def test_restart_replays_snapshot_and_tail(tmp_path):
+    log = open_log(tmp_path, top_k=5, compact_every=40)
+    for i in range(100):
+        log.append(entry(f"p{i}", i % 37))
+    top, count = log.top(), log.count
+    log.close()
+
+    assert os.path.exists(log.snapshot_path)
+    assert json.load(open(log.snapshot_path))["count"] == 80
+    reopened = open_log(tmp_path, top_k=5, compact_every=40)
+    assert reopened.top() == top
+    assert reopened.count == count
+
+
+def test_torn_write_is_cut_off_and_history_kept(tmp_path):
+    log = open_log(tmp_path)
+    for i in range(3):
+        log.append(entry(f"p{i}", i))
+    log.close()
+    with open(log.path, "ab") as f:
+        f.write(b'{"name": "torn", "sco')
+
+    reopened = open_log(tmp_path)
+    reopened.append(entry("after", 10))
+    reopened.close()
+
+    lines = open(log.path, "rb").read().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["p0", "p1", "p2", "after"]
+    assert [e["name"] for e in open_log(tmp_path).top()] == ["after", "p2", "p1", "p0"]
+
+
+def test_legacy_json_leaderboard_is_imported(tmp_path):
+    legacy = tmp_path / "leaderboard.json"
+    legacy.write_text(json.dumps([entry("ama", 30), entry("kojo", 50)]), encoding="utf-8")
+
+    log = open_log(tmp_path, legacy_path=str(legacy))
+
+    assert [e["name"] for e in log.top()] == ["kojo", "ama"]
+    assert legacy.exists()
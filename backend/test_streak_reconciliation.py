@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the set-based streak reconciliation job
+"""
+
+from datetime import date, datetime, timedelta
+
+import leaderboard_index
+from crud import create_user, get_leaderboard, reconcile_streaks
+from database import UserScore, UserStreak
+from leaderboard_index import LeaderboardIndex
+from models import UserCreate
+from streak_reconciler import StreakReconciler, seconds_until_next_run
+
+TODAY = date(2024, 6, 10)
+
+
+def at(days_ago, hour=12):
+    return datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=hour)
+
+
+def player(db, nickname, played_days_ago, current_streak, longest_streak, last_activity):
+    user_id = create_user(db, UserCreate(nickname=nickname)).id
+    for days_ago in played_days_ago:
+        db.add(UserScore(user_id=user_id, score=10, language="twi", created_at=at(days_ago)))
+    streak = db.query(UserStreak).filter(UserStreak.user_id == user_id).first() or UserStreak(user_id=user_id)
+    streak.current_streak, streak.longest_streak, streak.last_activity_date = current_streak, longest_streak, last_activity
+    db.add(streak)
+    db.commit()
+    return user_id
+
+
+def streaks(db):
+    db.expire_all()
+    return {streak.user.nickname: (streak.current_streak, streak.longest_streak) for streak in db.query(UserStreak)}
+
+
+def test_streaks_follow_activity_days(db):
+    # Two separate scores on one day count once; yesterday keeps a run alive
+    ama = player(db, "ama", [0, 0, 1, 2, 5, 6, 7, 8], 1, 1, at(0))
+    # Stopped playing four days ago with a stored 6-day streak
+    kojo = player(db, "kojo", [4, 5, 6, 7, 8, 9], 6, 6, at(4))
+    # Advanced through the streak endpoint without scores: the stored live streak is kept
+    player(db, "esi", [1], 9, 12, at(0))
+    # Played yesterday, but the stored streak row is from an old run
+    yaw = player(db, "yaw", [1, 30, 31, 32], 3, 3, at(30))
+
+    drift = reconcile_streaks(db, today=TODAY, check_only=True)
+    assert {(entry["user_id"], entry["field"]) for entry in drift} >= {(ama, "current_streak"), (kojo, "current_streak")}
+    assert streaks(db)["kojo"] == (6, 6)
+
+    reconcile_streaks(db, today=TODAY)
+    assert streaks(db) == {"ama": (3, 4), "kojo": (1, 6), "esi": (9, 12), "yaw": (1, 3)}
+    assert db.query(UserStreak).filter(UserStreak.user_id == yaw).one().last_activity_date == at(1)
+    # Reconciling again changes nothing
+    assert reconcile_streaks(db, today=TODAY) == []
+
+
+def test_reconciliation_updates_leaderboards(db, monkeypatch, seed_players):
+    seed_players(6)
+    index = LeaderboardIndex(seed=1)
+    index.load(db)
+    monkeypatch.setattr(leaderboard_index, "_leaderboard_index", index)
+    # seed_players streaks were all last active just now; a week later every one has expired
+    reconcile_streaks(db, today=datetime.utcnow().date() + timedelta(days=7))
+
+    assert {entry["current_streak"] for entry in get_leaderboard(db, sort_by="streak")} == {1}
+    assert {entry["current_streak"] for entry in index.top(10)} == {1}
+
+
+def test_reconciler_runs_daily_at_the_configured_hour(db, engine):
+    assert seconds_until_next_run(datetime(2024, 6, 10, 23, 30), hour=2) == 2.5 * 3600
+    assert seconds_until_next_run(datetime(2024, 6, 10, 2, 0), hour=2) == 24 * 3600
+
+    player(db, "kojo", [], 6, 6, datetime.utcnow() - timedelta(days=4))
+    reconciler = StreakReconciler(hour=3)
+    assert len(reconciler.run(engine)) == 1
+    assert reconciler.runs == 1
+    assert streaks(db)["kojo"] == (1, 6)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the two-tier translation cache (translation_cache.py)
+"""
+
+import pytest
+
+import translation_cache
+from translation_cache import TranslationCache, cached_translation, is_cacheable
+
+
+class FakeEngine:
+    """Records each call; translates by upper-casing"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, src, tgt):
+        self.calls.append((text, src, tgt))
+        return text.upper()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "translation_cache.db")
+
+
+def test_memory_then_disk_tier(cache_path):
+    engine = FakeEngine()
+    cache = TranslationCache(cache_path)
+
+    assert cache.translate("nllb", "v1", engine, "Good  morning", "en", "twi") == ("GOOD  MORNING", False)
+    assert cache.translate("nllb", "v1", engine, " Good morning ", "EN", "twi") == ("GOOD  MORNING", True)
+    # Any other engine, model version or language pair is a different entry
+    cache.translate("nllb", "v2", engine, "Good morning", "en", "twi")
+    cache.translate("marian", "v1", engine, "Good morning", "en", "twi")
+    cache.translate("nllb", "v1", engine, "Good morning", "en", "ewe")
+    assert len(engine.calls) == 4
+
+    # A new process only has the persistent tier
+    restarted = TranslationCache(cache_path)
+    assert restarted.translate("nllb", "v1", engine, "Good morning", "en", "twi") == ("GOOD  MORNING", True)
+    assert restarted.translate("nllb", "v1", engine, "Good morning", "en", "twi") == ("GOOD  MORNING", True)
+    assert len(engine.calls) == 4
+    assert restarted.stats["disk_hits"] == 1 and restarted.stats["memory_hits"] == 1
+
+
+def test_failures_are_not_cached(cache_path):
+    cache = TranslationCache(cache_path)
+    calls = []
+
+    def failing(text, src, tgt):
+        calls.append(text)
+        raise RuntimeError("model unavailable")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            cache.translate("nllb", "", failing, "Hello", "en", "twi")
+        assert cache.translate("libre", "", lambda *args: "[Translation error]", "Hello", "en", "twi") == (
+            "[Translation error]", False
+        )
+    assert len(calls) == 2
+    assert cache.stats["rejected"] == 2 and cache.stats["stores"] == 0
+
+    assert not is_cacheable("")
+    assert not is_cacheable("  [Translation not available for twi]")
+    assert not is_cacheable("'AK' IS AN INVALID TARGET LANGUAGE . EXAMPLE: LANGPAIR=EN|IT USING 2 LETTER ISO OR RFC3066")
+    assert is_cacheable("Maakye")
+
+
+def test_expired_entries_are_recomputed(cache_path):
+    engine = FakeEngine()
+    cache = TranslationCache(cache_path, ttl_days=0)
+
+    cache.translate("nllb", "", engine, "Hello", "en", "twi")
+    assert cache.translate("nllb", "", engine, "Hello", "en", "twi") == ("HELLO", False)
+    assert cache.purge_expired() == 1
+
+
+def test_memory_tier_is_bounded():
+    engine = FakeEngine()
+    cache = TranslationCache(None, max_size=2)
+
+    for text in ("one", "two", "three", "one"):
+        cache.translate("nllb", "", engine, text, "en", "twi")
+    assert [call[0] for call in engine.calls] == ["one", "two", "three", "one"]
+    assert cache.summary()["memory_entries"] == 2
+
+
+def test_decorator_and_summary(cache_path, monkeypatch):
+    monkeypatch.setattr(translation_cache, "_translation_cache", TranslationCache(cache_path))
+    engine = FakeEngine()
+
+    @cached_translation("libre")
+    def translate(text, source, target):
+        engine(text, source, target)
+        return f"{text} ({target})"
+
+    assert translate("Thank you", "en", "ewe") == "Thank you (ewe)"
+    assert translate.with_status("Thank you", "en", "ewe") == ("Thank you (ewe)", True)
+    assert len(engine.calls) == 1
+
+    summary = translation_cache.get_translation_cache().summary()
+    assert summary["hit_ratio"] == 0.5
+    assert summary["disk_entries"] == 1
+    assert summary["saved_ms"] >= 0
+
+
+def test_disabled_cache_always_translates(cache_path):
+    engine = FakeEngine()
+    cache = TranslationCache(cache_path, enabled=False)
+
+    cache.translate("nllb", "", engine, "Hello", "en", "twi")
+    assert cache.translate("nllb", "", engine, "Hello", "en", "twi") == ("HELLO", False)
+    assert len(engine.calls) == 2
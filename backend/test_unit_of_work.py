@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the request-scoped unit of work behind get_db
+"""
+
+import pytest
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, sessionmaker
+
+import database
+from crud import create_score
+from database import get_db, UnitOfWorkSession, User, UserActivity, UserStatsRollup, UserStreak, UserScore
+from models import ScoreCreate
+from user_api import router as user_router
+from game_api import router as game_router
+
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    monkeypatch.setattr(database, "RequestSessionLocal", sessionmaker(
+        class_=UnitOfWorkSession, autoflush=False, expire_on_commit=False, bind=engine
+    ))
+    app = FastAPI()
+    app.include_router(user_router, prefix="/api/v1")
+    app.include_router(game_router, prefix="/api/v1")
+
+    @app.post("/broken/{nickname}")
+    def broken_write(nickname: str, db: Session = Depends(get_db)):
+        user = db.query(User).filter(User.nickname == nickname).first()
+        create_score(db, user.id, ScoreCreate(score=10, language="twi"))
+        raise HTTPException(status_code=409, detail="conflict")
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def engine_events(engine):
+    counts = {"statements": 0, "commits": 0, "checkouts": 0}
+
+    def bump(key):
+        return lambda *args: counts.__setitem__(key, counts[key] + 1)
+
+    event.listen(engine, "before_cursor_execute", bump("statements"))
+    event.listen(engine, "commit", bump("commits"))
+    event.listen(engine.pool, "checkout", bump("checkouts"))
+    return counts
+
+
+def test_create_user_commits_once(client, db, engine_events):
+    response = client.post("/api/v1/users", json={"nickname": "yaw"})
+
+    assert response.status_code == 200
+    assert response.json()["nickname"] == "yaw"
+    assert engine_events["commits"] == 1
+    # SELECT existing user, then INSERT user, streak, rollup and activity; no refresh SELECTs
+    assert engine_events["statements"] == 5
+    user_id = response.json()["id"]
+    assert db.get(UserStreak, 1).user_id == user_id
+    assert db.get(UserStatsRollup, user_id) is not None
+    assert db.query(UserActivity).filter(UserActivity.user_id == user_id).count() == 1
+
+
+def test_read_only_requests_do_not_commit(client, engine_events):
+    client.post("/api/v1/users", json={"nickname": "yaw"})
+    engine_events.update(statements=0, commits=0, checkouts=0)
+
+    assert client.get("/api/v1/users/yaw").status_code == 200
+    assert engine_events == {"statements": 1, "commits": 0, "checkouts": 1}
+
+
+def test_requests_that_skip_the_database_check_out_no_connection(client, engine_events):
+    response = client.get("/api/v1/users/validate", params={"nickname": "ab"})
+
+    assert response.json()["valid"] is False
+    assert engine_events["checkouts"] == 0
+
+
+def test_failed_request_rolls_back_its_unit(client, db):
+    client.post("/api/v1/users", json={"nickname": "yaw"})
+
+    assert client.post("/broken/yaw").status_code == 409
+
+    assert db.query(func.count(UserScore.id)).scalar() == 0
+    assert db.query(UserStatsRollup).one().total_score == 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the incrementally maintained user_stats rollup
+"""
+
+from database import UserScore, UserStatsRollup
+from crud import (
+    create_user, create_score, create_badge, create_game_session, update_game_session,
+    get_user_stats, rebuild_user_stats
+)
+from models import UserCreate, ScoreCreate, BadgeCreate, GameSessionCreate, GameSessionUpdate
+
+
+def play(db):
+    user = create_user(db, UserCreate(nickname="kofi"))
+    for value in range(60):
+        create_score(db, user.id, ScoreCreate(score=value, language="twi"))
+    create_score(db, user.id, ScoreCreate(score=100, language="ewe"))
+    create_badge(db, user.id, BadgeCreate(badge_type="highscore", badge_name="High Score"))
+    create_game_session(db, user.id, GameSessionCreate(session_id="s1", language="twi"))
+    create_game_session(db, user.id, GameSessionCreate(session_id="s2", language="ewe"))
+    update_game_session(db, "s1", GameSessionUpdate(rounds_played=5, rounds_won=3))
+    update_game_session(db, "s1", GameSessionUpdate(rounds_played=6, rounds_won=4))
+    update_game_session(db, "s2", GameSessionUpdate(rounds_played=4, rounds_won=0))
+    return user
+
+
+def test_stats_cover_full_history(db):
+    user = play(db)
+
+    stats = get_user_stats(db, user.id)
+
+    assert stats["total_score"] == sum(range(60)) + 100
+    assert stats["highest_score"] == 100
+    assert stats["games_played"] == 2
+    assert stats["badges_count"] == 1
+    assert stats["favorite_language"] == "twi"
+    assert stats["total_rounds_won"] == 4
+    assert stats["total_rounds_played"] == 10
+    assert stats["win_rate"] == 40.0
+
+
+def test_stats_read_is_constant_cost(db, query_counter):
+    user_id = play(db).id
+
+    query_counter.reset()
+    get_user_stats(db, user_id)
+
+    assert query_counter.count == 2  # rollup row and streak
+
+
+def test_rebuild_detects_and_fixes_drift(db):
+    user = play(db)
+    assert rebuild_user_stats(db, check_only=True) == []
+
+    # Raw inserts bypass the rollup, e.g. bulk imports
+    db.add(UserScore(user_id=user.id, score=500, language="gaa"))
+    db.commit()
+
+    drift = rebuild_user_stats(db, check_only=True)
+    assert {entry["field"] for entry in drift} == {"total_score", "highest_score", "scores_count", "language_counts"}
+    assert get_user_stats(db, user.id)["highest_score"] == 100
+
+    rebuild_user_stats(db)
+    assert rebuild_user_stats(db, check_only=True) == []
+    assert get_user_stats(db, user.id)["highest_score"] == 500
+
+
+def test_missing_rollup_is_backfilled(db):
+    user = play(db)
+    db.query(UserStatsRollup).delete()
+    db.commit()
+
+    assert get_user_stats(db, user.id)["total_score"] == sum(range(60)) + 100
+    assert get_user_stats(db, 9999) == {}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the daily score buckets behind the windowed leaderboards
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import crud
+from crud import (
+    create_score, create_user, get_windowed_leaderboard, prune_daily_scores, rebuild_daily_scores,
+    record_daily_score, record_score_stats
+)
+from database import UserDailyScore, UserScore, UserStatsRollup, UserStreak
+from models import ScoreCreate, UserCreate
+from progression_tracking import add_xp
+
+
+def buckets(db):
+    db.expire_all()
+    return {(row.user_id, row.language, row.day): (row.score, row.highest_score, row.scores_count)
+            for row in db.query(UserDailyScore)}
+
+
+def backdated_score(db, user_id, score, language, days_ago):
+    """A score written days_ago days before today, as record_daily_score would have seen it"""
+    scored_at = datetime.utcnow() - timedelta(days=days_ago)
+    record_score_stats(db, user_id, score, language)
+    record_daily_score(db, user_id, language, score, scored_at=scored_at)
+    db.add(UserScore(user_id=user_id, score=score, language=language, created_at=scored_at))
+    db.commit()
+
+
+def test_buckets_follow_score_writes_and_match_rebuild(db, async_session_factory):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    create_score(db, ama, ScoreCreate(score=30, language="twi"))
+    create_score(db, ama, ScoreCreate(score=50, language="twi"))
+    create_score(db, ama, ScoreCreate(score=5, language="ewe"))
+
+    async def grant():
+        async with async_session_factory() as session:
+            return await add_xp(session, ama, 40, "lesson")
+
+    asyncio.run(grant())
+    today = datetime.utcnow().date()
+
+    maintained = buckets(db)
+    assert maintained[(ama, "twi", today)] == (80, 50, 2)
+    assert maintained[(ama, "ewe", today)] == (5, 5, 1)
+    assert (ama, "system", today) in maintained
+    rebuild_daily_scores(db)
+    assert buckets(db) == maintained
+
+
+def test_windows_sum_the_days_they_cover(db):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    kojo = create_user(db, UserCreate(nickname="kojo")).id
+    backdated_score(db, ama, 100, "twi", days_ago=20)
+    backdated_score(db, ama, 10, "twi", days_ago=3)
+    backdated_score(db, kojo, 40, "ewe", days_ago=5)
+    backdated_score(db, kojo, 25, "twi", days_ago=0)
+
+    def board(window, **kwargs):
+        return [(entry["nickname"], entry["total_score"]) for entry in get_windowed_leaderboard(db, window, **kwargs)]
+
+    assert board("daily") == [("kojo", 25)]
+    assert board("weekly") == [("kojo", 65), ("ama", 10)]
+    assert board("monthly") == [("ama", 110), ("kojo", 65)]
+    assert board("weekly", language="twi") == [("kojo", 25), ("ama", 10)]
+    assert board("monthly", sort_dir="asc", limit=1) == [("kojo", 65)]
+
+
+def test_old_buckets_roll_off(db, monkeypatch):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    backdated_score(db, ama, 100, "twi", days_ago=45)
+    backdated_score(db, ama, 10, "twi", days_ago=29)
+    # The first write of a day rolls off everything no window reaches
+    monkeypatch.setattr(crud, "_last_daily_score_prune", (None, None))
+    create_score(db, ama, ScoreCreate(score=1, language="twi"))
+
+    today = datetime.utcnow().date()
+    assert sorted(day for _, _, day in buckets(db)) == [today - timedelta(days=29), today]
+    assert prune_daily_scores(db, today + timedelta(days=29)) == 1
+    rebuild_daily_scores(db)
+    assert len(buckets(db)) == 2
+
+
+def test_roll_off_is_marked_done_on_commit(db, monkeypatch):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    monkeypatch.setattr(crud, "_last_daily_score_prune", (None, None))
+    today = datetime.utcnow().date()
+
+    record_daily_score(db, ama, "twi", 10)
+    db.rollback()
+    assert crud._last_daily_score_prune == (None, None)
+    record_daily_score(db, ama, "twi", 10)
+    assert crud._last_daily_score_prune == (None, None)
+    db.commit()
+    assert crud._last_daily_score_prune == (db.get_bind(), today)
+
+
+def test_endpoints_take_a_window(db, client):
+    ama = create_user(db, UserCreate(nickname="ama")).id
+    kojo = create_user(db, UserCreate(nickname="kojo")).id
+    esi = create_user(db, UserCreate(nickname="esi")).id
+    backdated_score(db, ama, 500, "twi", days_ago=10)
+    backdated_score(db, kojo, 30, "twi", days_ago=1)
+    backdated_score(db, esi, 20, "gaa", days_ago=2)
+
+    weekly = client.get("/api/v1/leaderboard", params={"window": "weekly"})
+    assert [entry["nickname"] for entry in weekly.json()] == ["kojo", "esi"]
+    assert client.get("/api/v1/leaderboard", params={"window": "weekly", "language": "gaa"}).json()[0]["nickname"] == "esi"
+    assert [p["nickname"] for p in client.get("/api/v1/leaderboard/top", params={"window": "monthly"}).json()] == ["ama", "kojo", "esi"]
+
+    rank = client.get("/api/v1/leaderboard/rank/esi", params={"window": "monthly"}).json()
+    assert (rank["rank"], rank["total_players"], rank["total_score"]) == (3, 3, 20)
+    around = client.get("/api/v1/leaderboard/around/kojo", params={"window": "monthly", "count": 1}).json()
+    assert [p["rank"] for p in around] == [1, 2, 3]
+    assert client.get("/api/v1/leaderboard/rank/ama", params={"window": "weekly"}).status_code == 404
+
+    assert client.get("/api/v1/leaderboard", params={"language": "twi"}).status_code == 400
+    assert client.get("/api/v1/leaderboard", params={"window": "weekly", "cursor": "x"}).status_code == 400
+    assert client.get("/api/v1/leaderboard", params={"window": "yearly"}).status_code == 422
+
+
+def test_players_without_a_rollup_are_ranked_in_windows(db, client):
+    alice = create_user(db, UserCreate(nickname="alice")).id
+    backdated_score(db, alice, 10, "twi", days_ago=0)
+    # A legacy player whose buckets came from migration 0005, with no rollup or streak row
+    bob = create_user(db, UserCreate(nickname="legacybob")).id
+    db.query(UserStatsRollup).filter(UserStatsRollup.user_id == bob).delete()
+    db.query(UserStreak).filter(UserStreak.user_id == bob).delete()
+    db.add(UserDailyScore(day=datetime.utcnow().date(), user_id=bob, language="ewe", score=50, highest_score=50, scores_count=1))
+    db.commit()
+
+    bob_rank = client.get("/api/v1/leaderboard/rank/legacybob", params={"window": "daily"}).json()
+    assert (bob_rank["nickname"], bob_rank["rank"], bob_rank["total_score"], bob_rank["current_streak"]) == ("legacybob", 1, 50, 0)
+    alice_rank = client.get("/api/v1/leaderboard/rank/alice", params={"window": "daily"}).json()
+    assert (alice_rank["nickname"], alice_rank["rank"], alice_rank["total_players"]) == ("alice", 2, 2)
+    around = client.get("/api/v1/leaderboard/around/alice", params={"window": "daily", "count": 1}).json()
+    assert [p["nickname"] for p in around] == ["legacybob", "alice"]
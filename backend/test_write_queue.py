@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-writer group-commit pipeline (write_queue.py)
+"""
+
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func
+from sqlalchemy.orm import sessionmaker
+
+import write_queue
+from crud import create_user, create_score, get_user_stats
+from database import get_db, UserActivity, UserScore
+from models import UserCreate, ScoreCreate
+from user_api import router as user_router
+from write_queue import WriteQueue
+
+WRITERS = 300
+WRITES_PER_WRITER = 3
+
+
+@pytest.fixture
+def write_queue_for(engine):
+    queues = []
+
+    def factory(**kwargs):
+        queue = WriteQueue(bind=engine, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield factory
+    for queue in queues:
+        queue.stop()
+
+
+def test_concurrent_writers_are_group_committed(engine, db, write_queue_for):
+    user_ids = [create_user(db, UserCreate(nickname=f"writer_{i}")).id for i in range(10)]
+    queue = write_queue_for(max_batch=64, max_delay_ms=5)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    errors = []
+    start = threading.Barrier(WRITERS)
+
+    def writer(index):
+        start.wait()
+        try:
+            for n in range(WRITES_PER_WRITER):
+                score = ScoreCreate(score=n + 1, language="twi")
+                result = queue.execute(create_score, user_ids[index % len(user_ids)], score)
+                assert result.id is not None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    total_writes = WRITERS * WRITES_PER_WRITER
+    assert db.query(func.count(UserScore.id)).scalar() == total_writes
+    assert queue.stats["writes"] == total_writes
+    assert queue.stats["failures"] == 0
+    # Many writes share each commit
+    assert len(commits) < total_writes / 4
+    # The stats rollup saw every score too
+    db.expire_all()
+    assert sum(get_user_stats(db, user_id)["total_score"] for user_id in user_ids) == WRITERS * sum(range(1, WRITES_PER_WRITER + 1))
+
+
+def test_failing_intent_does_not_fail_its_batch(db, write_queue_for):
+    user_id = create_user(db, UserCreate(nickname="batch_user")).id
+    queue = write_queue_for(max_batch=16, max_delay_ms=50)
+
+    def broken_write(write_db):
+        write_db.add(UserScore(user_id=user_id, score=1, language="twi"))
+        raise ValueError("invalid intent")
+
+    good = [queue.submit(create_score, user_id, ScoreCreate(score=5, language="twi")) for _ in range(3)]
+    bad = queue.submit(broken_write)
+    good += [queue.submit(create_score, user_id, ScoreCreate(score=5, language="twi")) for _ in range(3)]
+
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert all(future.result(timeout=5).score == 5 for future in good)
+    assert db.query(func.count(UserScore.id)).scalar() == 6
+
+
+def test_login_goes_through_write_queue(engine, write_queue_for, monkeypatch):
+    queue = write_queue_for()
+    monkeypatch.setattr(write_queue, "WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(write_queue, "_write_queue", queue)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(user_router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    created = client.post("/api/v1/users", json={"nickname": "queued_user"})
+    login = client.post("/api/v1/users/queued_user/login")
+
+    assert created.status_code == 200
+    assert created.json()["nickname"] == "queued_user"
+    assert login.status_code == 200
+    db = session_factory()
+    activity_types = [a.activity_type for a in db.query(UserActivity).order_by(UserActivity.id).all()]
+    db.close()
+    assert activity_types == ["user_created", "login"]
+    assert queue.stats["writes"] == 2
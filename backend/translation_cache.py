@@ -0,0 +1,212 @@
+"""
+Two-tier cache for translations, shared by every translation engine.
+
+The scenario sentences and stock AI replies are translated over and over,
+by models that take hundreds of milliseconds per sentence or by remote
+services. A translation is keyed by (normalized text, source language,
+target language, engine, model version), so switching a model or its
+quantization never serves stale output. Entries live in an in-process LRU
+of TRANSLATION_CACHE_SIZE entries in front of a SQLite table at
+TRANSLATION_CACHE_DB that survives restarts; both expire after
+TRANSLATION_CACHE_TTL_DAYS. Failed translations (exceptions, empty or
+bracketed error strings, service error messages) are never stored.
+
+Set TRANSLATION_CACHE=false to disable it, or TRANSLATION_CACHE_DB= (empty)
+to keep only the in-process tier.
+"""
+
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+TRANSLATION_CACHE = os.getenv("TRANSLATION_CACHE", "true").lower() in ("1", "true", "yes")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 2048))
+TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB", "./translation_cache.db")
+TRANSLATION_CACHE_TTL_DAYS = float(os.getenv("TRANSLATION_CACHE_TTL_DAYS", 30))
+
+# Error messages the remote services return in place of a translation
+SERVICE_ERROR_MARKERS = ("INVALID SOURCE LANGUAGE", "INVALID TARGET LANGUAGE", "MYMEMORY WARNING", "QUERY LENGTH LIMIT")
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace collapsed; case and punctuation are kept since they change the translation"""
+    return " ".join(text.split())
+
+
+def is_cacheable(translation) -> bool:
+    """Only real translations are stored, never empty results or error strings"""
+    if not isinstance(translation, str) or not translation.strip() or translation.lstrip().startswith("["):
+        return False
+    upper = translation.upper()
+    return not any(marker in upper for marker in SERVICE_ERROR_MARKERS)
+
+
+class TranslationCache:
+    """In-process LRU in front of a persistent SQLite table; path=None keeps only the LRU"""
+
+    def __init__(self, path: Optional[str] = TRANSLATION_CACHE_DB, max_size: int = TRANSLATION_CACHE_SIZE,
+                 ttl_days: float = TRANSLATION_CACHE_TTL_DAYS, enabled: bool = TRANSLATION_CACHE):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl_days * 86400
+        self.enabled = enabled
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "rejected": 0, "saved_ms": 0.0}
+        self._entries: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()  # key -> (translation, stored_at, compute_ms)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if enabled and path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    key TEXT PRIMARY KEY,
+                    engine TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    compute_ms REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    @staticmethod
+    def make_key(text: str, src: str, tgt: str, engine: str, model_version: str = "") -> str:
+        parts = (normalize_text(text), src.lower(), tgt.lower(), engine, model_version)
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, text: str, src: str, tgt: str, engine: str, model_version: str = "") -> Optional[str]:
+        """The cached translation, or None"""
+        if not self.enabled:
+            return None
+        key = self.make_key(text, src, tgt, engine, model_version)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.stats["saved_ms"] += entry[2]
+                return entry[0]
+            self._entries.pop(key, None)
+
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT translation, stored_at, compute_ms FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self._remember(key, row)
+            self.stats["disk_hits"] += 1
+            self.stats["saved_ms"] += row[2]
+            return row[0]
+
+    def put(self, text: str, src: str, tgt: str, engine: str, model_version: str, translation: str,
+            compute_ms: float = 0.0, is_valid: Callable[[str], bool] = is_cacheable) -> bool:
+        """Store a translation that took compute_ms to produce; returns False when it is not a real one"""
+        if not self.enabled:
+            return False
+        if not is_valid(translation):
+            with self._lock:
+                self.stats["rejected"] += 1
+            return False
+        key = self.make_key(text, src, tgt, engine, model_version)
+        entry = (translation, time.time(), compute_ms)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, engine, translation, stored_at, compute_ms) VALUES (?, ?, ?, ?, ?)",
+                    (key, engine) + entry,
+                )
+                self._db.commit()
+            self.stats["stores"] += 1
+        return True
+
+    def translate(self, engine: str, model_version: str, fn: Callable[[str, str, str], str], text: str, src: str,
+                  tgt: str, is_valid: Callable[[str], bool] = is_cacheable) -> Tuple[str, bool]:
+        """(translation, whether it came from the cache) for fn(text, src, tgt); exceptions from fn propagate"""
+        cached = self.get(text, src, tgt, engine, model_version)
+        if cached is not None:
+            return cached, True
+        start = time.perf_counter()
+        translation = fn(text, src, tgt)
+        self.put(text, src, tgt, engine, model_version, translation, (time.perf_counter() - start) * 1000, is_valid)
+        return translation, False
+
+    def summary(self) -> Dict[str, float]:
+        """stats plus the hit ratio and the current number of entries"""
+        with self._lock:
+            summary = dict(self.stats)
+            summary["memory_entries"] = len(self._entries)
+            summary["disk_entries"] = (
+                self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] if self._db is not None else 0
+            )
+        lookups = summary["memory_hits"] + summary["disk_hits"] + summary["misses"]
+        summary["hit_ratio"] = round((summary["memory_hits"] + summary["disk_hits"]) / lookups, 4) if lookups else 0.0
+        summary["saved_ms"] = round(summary["saved_ms"], 1)
+        return summary
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier; returns how many"""
+        if self._db is None:
+            return 0
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM translations WHERE stored_at < ?", (time.time() - self.ttl,)).rowcount
+            self._db.commit()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def _remember(self, key: str, entry: Tuple[str, float, float]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+_translation_cache: Optional[TranslationCache] = None
+_translation_cache_lock = threading.Lock()
+
+
+def get_translation_cache() -> TranslationCache:
+    """The process-wide cache shared by all engines"""
+    global _translation_cache
+    with _translation_cache_lock:
+        if _translation_cache is None:
+            _translation_cache = TranslationCache()
+        return _translation_cache
+
+
+def cached_translation(engine: str, model_version: str = "", is_valid: Callable[[str], bool] = is_cacheable):
+    """Decorator caching a translate function whose last three arguments are (text, src, tgt).
+
+    The wrapped function still returns the translation;
+    wrapper.with_status(...) returns (translation, from cache) instead.
+    The shared cache is only opened on the first call.
+    """
+    def decorator(fn):
+        def with_status(*args):
+            *prefix, text, src, tgt = args
+            return get_translation_cache().translate(
+                engine, model_version, lambda *key: fn(*prefix, *key), text, src, tgt, is_valid
+            )
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            return with_status(*args)[0]
+
+        wrapper.with_status = with_status
+        return wrapper
+    return decorator
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
@@ -7,6 +7,8 @@ from crud import (
     create_user, get_user_by_nickname, get_user_by_id, update_user, 
     update_user_last_login, create_activity, get_user_activities
 )
+from write_queue import run_write
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_time
 import re
 
 router = APIRouter()
@@ -49,14 +51,16 @@ def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists.")
     
-    # Create user
-    db_user = create_user(db, user)
+    def create_user_with_activity(write_db: Session):
+        # Create user
+        db_user = create_user(write_db, user)
+        
+        # Log activity
+        activity = ActivityCreate(activity_type="user_created", details={"nickname": name})
+        create_activity(write_db, db_user.id, activity)
+        return db_user
     
-    # Log activity
-    activity = ActivityCreate(activity_type="user_created", details={"nickname": name})
-    create_activity(db, db_user.id, activity)
-    
-    return db_user
+    return run_write(db, create_user_with_activity)
 
 @router.get("/users/{nickname}", response_model=UserResponse)
 def get_user(nickname: str, db: Session = Depends(get_db)):
@@ -73,14 +77,18 @@ def update_user_profile(nickname: str, user_update: UserUpdate, db: Session = De
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    updated_user = update_user(db, user.id, user_update)
+    def update_profile_with_activity(write_db: Session):
+        updated_user = update_user(write_db, user.id, user_update)
+        if updated_user:
+            # Log activity
+            activity = ActivityCreate(activity_type="profile_updated", details={"updated_fields": list(user_update.dict(exclude_unset=True).keys())})
+            create_activity(write_db, user.id, activity)
+        return updated_user
+    
+    updated_user = run_write(db, update_profile_with_activity)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    # Log activity
-    activity = ActivityCreate(activity_type="profile_updated", details={"updated_fields": list(user_update.dict(exclude_unset=True).keys())})
-    create_activity(db, user.id, activity)
-    
     return updated_user
 
 @router.post("/users/{nickname}/login")
@@ -90,20 +98,39 @@ def user_login(nickname: str, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    update_user_last_login(db, user.id)
+    def record_login(write_db: Session):
+        update_user_last_login(write_db, user.id)
+        
+        # Log activity
+        activity = ActivityCreate(activity_type="login", details={"timestamp": "now"})
+        create_activity(write_db, user.id, activity)
     
-    # Log activity
-    activity = ActivityCreate(activity_type="login", details={"timestamp": "now"})
-    create_activity(db, user.id, activity)
+    run_write(db, record_login)
     
     return {"success": True, "message": "Login recorded"}
 
 @router.get("/users/{nickname}/activities", response_model=List[ActivityResponse])
-def get_user_activity_history(nickname: str, limit: int = Query(50, ge=1, le=100), db: Session = Depends(get_db)):
-    """Get user activity history"""
+def get_user_activity_history(
+    nickname: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get user activity history, newest first. Pass the X-Next-Cursor header of a full page as cursor to get the next one."""
+    before = None
+    if cursor:
+        try:
+            payload = decode_cursor(cursor)
+            before = (parse_cursor_time(payload["timestamp"]), int(payload["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    
     user = get_user_by_nickname(db, nickname)
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    activities = get_user_activities(db, user.id, limit)
+    activities = get_user_activities(db, user.id, limit, before)
+    if len(activities) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"timestamp": activities[-1].timestamp, "id": activities[-1].id})
     return activities 
\ No newline at end of file